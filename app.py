@@ -53,16 +53,22 @@ def create_app(config_class=Config):
 
     # Создание директорий для загрузки файлов и базы данных
     create_upload_directories(app)
-    with app.app_context():
-        db.create_all()
+    if app.config['CREATE_DB_ON_STARTUP']:
+        with app.app_context():
+            db.create_all()
 
-    @app.after_request
-    def add_no_cache_headers(response):
-        """Добавляет заголовки для отключения кеширования"""
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-        return response
+    # Прогрев общих модулей в родительском процессе, чтобы воркеры получили их после форка
+    if app.config['PRELOAD_HEAVY_MODULES']:
+        from utils.startup import preload_shared_modules
+        preload_shared_modules()
+
+    # Кэширование: версии статических файлов, ETag, no-store только для страниц пользователя
+    from utils.http_cache import init_http_cache
+    init_http_cache(app)
+
+    # Сжатие JSON/SVG (выполняется до расчета ETag, поэтому ETag зависит от кодировки)
+    from utils.compression import init_compression
+    init_compression(app)
 
     return app
 
@@ -74,6 +80,8 @@ def create_upload_directories(app):
     os.makedirs(app.config['TEMP_FOLDER'], exist_ok=True)
     # Создаем директорию для изображений
     os.makedirs(app.config['IMAGES_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['IMAGE_CACHE_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['DATASET_CACHE_FOLDER'], exist_ok=True)
 
 
 # Для продакшена
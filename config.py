@@ -20,13 +20,63 @@ class Config:
     TEMP_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'temp')
     # Новая директория для сохранения изображений
     IMAGES_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'images')
+    # Кэш разобранных входных таблиц (колоночные npz-файлы по SHA-256 содержимого)
+    DATASET_CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'dataset_cache')
     ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB макс. размер файла
+    # Макс. размер запроса (файла), байт; большие истории добычи читаются потоково
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16 MB по умолчанию
+    # Время хранения файла предварительного просмотра до запроса его статистики, секунд
+    PREVIEW_FILE_MAX_AGE = 3600
 
     # Настройки сохранения изображений
     IMAGE_FORMATS = ['png', 'svg']  # Поддерживаемые форматы изображений
     DEFAULT_IMAGE_FORMAT = 'png'  # Формат по умолчанию
     SAVE_IMAGES = True  # Флаг для включения/отключения сохранения изображений
+    IMAGE_DPI = 300  # Разрешение сохраняемых изображений
+    # Сохранение всех изображений сразу после расчета (иначе - построение при первом запросе)
+    EAGER_IMAGE_RENDERING = os.environ.get('EAGER_IMAGE_RENDERING', '0') == '1'
+    # Кэш изображений, построенных по запросу (вытесняются давно не использованные)
+    IMAGE_CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'image_cache')
+    IMAGE_CACHE_MAX_MB = int(os.environ.get('IMAGE_CACHE_MAX_MB', 500))
+    # Сжатие JSON/SVG-ответов gzip/brotli (артефакты сжимаются один раз при записи)
+    COMPRESS_RESPONSES = True
+    PRECOMPRESS_ARTIFACTS = True
+    # Уменьшенные PNG для страницы: ширина в пикселях (размер 'full' - разрешение IMAGE_DPI)
+    IMAGE_SIZES = {'thumb': 320, 'preview': 960}
+    # Процессы пула построения изображений (0 - построение в процессе запроса).
+    # Пул свой в каждом процессе приложения: под сервером server.py всего процессов Matplotlib
+    # (SERVER_WORKERS + SERVER_SIMULATION_WORKERS) * RENDER_WORKERS, поэтому пул по умолчанию небольшой
+    RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', 2))
+    # Максимум значений поля в контурном графике (прореживание с сохранением фронта)
+    VISUALIZATION_MAX_CELLS = 20000
+    # Тип чисел в бинарных массивах графиков Plotly: 'f4' (float32) или 'f8' (float64)
+    VISUALIZATION_ARRAY_DTYPE = 'f4'
+
+    # Настройки запуска приложения
+    # Создание таблиц при каждом старте (при запуске с предзагрузкой выполняется один раз в родительском процессе)
+    CREATE_DB_ON_STARTUP = os.environ.get('CREATE_DB_ON_STARTUP', '1') == '1'
+    # Предзагрузка тяжелых модулей (NumPy, pandas, Plotly, Matplotlib) до форка воркеров
+    PRELOAD_HEAVY_MODULES = os.environ.get('PRELOAD_HEAVY_MODULES', '0') == '1'
+
+    # Настройки production-сервера (python server.py)
+    SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.environ.get('PORT', 5000))
+    # Воркеры для страниц и API
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 4))
+    # Отдельные воркеры для запуска моделирования (0 - моделирование выполняют обычные воркеры)
+    SERVER_SIMULATION_WORKERS = int(os.environ.get('SERVER_SIMULATION_WORKERS', 2))
+    # Внутренний порт воркеров моделирования (слушается только на 127.0.0.1)
+    SERVER_SIMULATION_PORT = int(os.environ.get('SERVER_SIMULATION_PORT', 5001))
+    # Запросы, которые передаются воркерам моделирования (регулярные выражения для пути)
+    SERVER_SIMULATION_ROUTES = [r'^/project/\d+/run$']
+    # После тайм-аута расчет продолжается, а пользователь перенаправляется на страницу проекта
+    SERVER_SIMULATION_TIMEOUT = 600  # секунд
+    # Ожидание готовности нового воркера при поочередном перезапуске (SIGHUP), секунд
+    SERVER_WORKER_START_TIMEOUT = 60
+    # Перезапуск воркера после N запросов или превышения RSS (Matplotlib накапливает память)
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 1000))
+    SERVER_SIMULATION_MAX_REQUESTS = int(os.environ.get('SERVER_SIMULATION_MAX_REQUESTS', 20))
+    SERVER_MAX_RSS_MB = int(os.environ.get('SERVER_MAX_RSS_MB', 1024))
 
     # Настройки сессии
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
@@ -36,6 +86,23 @@ class Config:
     DEFAULT_TIME_STEP = 0.05
     DEFAULT_GRID_SIZE = 100
 
+    # Вязкости флюидов в ячейках по давлению из загруженной PVT-таблицы
+    # (иначе - постоянные mu_oil и mu_water для всего пласта). Вязкости, заданные в проекте,
+    # остаются средними по пласту. Отключено по умолчанию: включение меняет результаты существующих проектов
+    PVT_PRESSURE_DEPENDENT_VISCOSITY = os.environ.get('PVT_PRESSURE_DEPENDENT_VISCOSITY', '0') == '1'
+
+    # Относительные проницаемости по лабораторной кривой образца параметров модели (relative_perm.csv)
+    # вместо зависимостей Кори; образец сохраняется в parameters.relative_permeability_sample результата.
+    # Отключено по умолчанию: включение меняет результаты существующих проектов
+    TABULATED_RELATIVE_PERMEABILITY = os.environ.get('TABULATED_RELATIVE_PERMEABILITY', '0') == '1'
+
+    # Сохранение полной истории насыщенности для просмотра произвольных срезов без перезапуска
+    SAVE_SATURATION_HISTORY = True
+    HISTORY_DTYPE = 'float32'  # 'float32' или 'float64'
+    HISTORY_COMPRESSION = False  # сжатие блоками по времени (без memmap)
+    HISTORY_BLOCK_STEPS = 200  # шагов по времени в сжатом блоке
+    HISTORY_MAX_VALUES = 500000  # максимум значений в одном ответе API
+
     # Ограничения параметров для пользовательского ввода
     PARAM_LIMITS = {
         'length': {'min': 10.0, 'max': 1000.0, 'default': 100.0, 'step': 10.0, 'unit': 'м'},
@@ -44,6 +111,8 @@ class Config:
         'mu_water': {'min': 0.2, 'max': 5.0, 'default': 1.0, 'step': 0.1, 'unit': 'мПа·с'},
         'initial_water_saturation': {'min': 0.0, 'max': 0.5, 'default': 0.2, 'step': 0.05, 'unit': 'д.ед.'},
         'residual_oil_saturation': {'min': 0.0, 'max': 0.5, 'default': 0.2, 'step': 0.05, 'unit': 'д.ед.'},
+        'injection_pressure': {'min': 1.0, 'max': 60.0, 'default': 25.0, 'step': 0.5, 'unit': 'МПа'},
+        'production_pressure': {'min': 0.5, 'max': 50.0, 'default': 15.0, 'step': 0.5, 'unit': 'МПа'},
         'entry_pressure': {'min': 0.1, 'max': 5.0, 'default': 1.0, 'step': 0.1, 'unit': 'МПа'},
         'pore_distribution_index': {'min': 0.5, 'max': 5.0, 'default': 1.5, 'step': 0.1, 'unit': 'отн.ед.'},
         'wettability_factor': {'min': 0.0, 'max': 1.0, 'default': 0.6, 'step': 0.05, 'unit': 'отн.ед.'},
@@ -96,6 +165,8 @@ class ProductionConfig(Config):
     RESULTS_FOLDER = os.path.join(BASE_DIR, 'results')
     TEMP_FOLDER = os.path.join(BASE_DIR, 'temp')
     IMAGES_FOLDER = os.path.join(BASE_DIR, 'images')
+    IMAGE_CACHE_FOLDER = os.path.join(BASE_DIR, 'image_cache')
+    DATASET_CACHE_FOLDER = os.path.join(BASE_DIR, 'dataset_cache')
 
     # База данных
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'oil_filtration.db')
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Консольный запуск пакетных расчетов: python -m core params.json -o results/ -j 16
+
+import argparse
+import os
+import sys
+import time
+
+from core.batch import load_parameter_sets, run_batch
+
+
+def main(argv=None):
+    """Точка входа консольной утилиты пакетного моделирования"""
+    parser = argparse.ArgumentParser(
+        prog='python -m core',
+        description='Пакетное моделирование фильтрации без запуска веб-приложения'
+    )
+    parser.add_argument('input', help='JSON- или CSV-файл с наборами параметров')
+    parser.add_argument('-o', '--output', default='batch_results',
+                        help='Директория для результатов (по умолчанию batch_results)')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help='Число процессов (по умолчанию - число ядер)')
+    parser.add_argument('--profiles', action='store_true',
+                        help='Сохранять профили насыщенности на контрольные дни')
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default='float32',
+                        help='Тип данных для рядов в .npz-файлах (по умолчанию float32)')
+    args = parser.parse_args(argv)
+
+    parameter_sets = load_parameter_sets(args.input)
+    print(f"Загружено наборов параметров: {len(parameter_sets)}")
+
+    start_time = time.perf_counter()
+    summaries = run_batch(parameter_sets, args.output, workers=args.workers,
+                          save_profiles=args.profiles, dtype=args.dtype)
+    elapsed = time.perf_counter() - start_time
+
+    errors = sum(1 for summary in summaries if summary['status'] != 'success')
+    print(f"Готово за {elapsed:.1f} с: успешно {len(summaries) - errors}, с ошибкой {errors}")
+    print(f"Сводка: {os.path.join(args.output, 'summary.csv')}")
+
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Пакетный запуск моделирования без веб-приложения.
+# Модуль намеренно зависит только от NumPy и стандартной библиотеки:
+# импорт Flask, SQLAlchemy, pandas и библиотек визуализации здесь не нужен.
+
+import csv
+import json
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from core.model import OilFiltrationModel
+from core.carbonate_model import CarbonateModel
+
+# Доступные типы моделей (совпадают со значениями Project.model_type)
+MODEL_TYPES = {
+    'basic': OilFiltrationModel,
+    'carbonate': CarbonateModel
+}
+
+# Служебные поля набора параметров, которые не передаются в модель
+RESERVED_FIELDS = ('run_id', 'model_type')
+
+# Разделы результатов с рядами данных, которые сохраняются в бинарный файл, а не в сводку
+SERIES_SECTIONS = ('recovery_factor', 'saturation_profiles', 'matrix_fracture_profiles')
+
+
+def load_parameter_sets(file_path):
+    """
+    Загрузка наборов параметров из JSON- или CSV-файла
+
+    JSON может содержать список наборов параметров или объект вида
+    {"defaults": {...}, "runs": [...]}, где defaults дополняют каждый набор.
+    В CSV каждая строка - отдельный набор, заголовок - имена параметров.
+
+    Args:
+        file_path (str): Путь к файлу с параметрами
+
+    Returns:
+        list: Список словарей параметров с заполненными run_id и model_type
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext == '.json':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if isinstance(data, dict):
+            defaults = data.get('defaults', {})
+            runs = data.get('runs', [data] if 'defaults' not in data else [])
+        else:
+            defaults = {}
+            runs = data
+
+        parameter_sets = [dict(defaults, **run) for run in runs]
+    elif ext == '.csv':
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            parameter_sets = [
+                {key.strip(): _parse_value(value) for key, value in row.items()
+                 if key and value is not None and value.strip() != ''}
+                for row in reader
+            ]
+    else:
+        raise ValueError(f"Неподдерживаемый формат файла параметров: {ext}")
+
+    for i, params in enumerate(parameter_sets):
+        params.setdefault('run_id', f'run_{i:05d}')
+        params['run_id'] = re.sub(r'[^\w.-]', '_', str(params['run_id']))
+        params.setdefault('model_type', 'basic')
+
+        if params['model_type'] not in MODEL_TYPES:
+            raise ValueError(f"Неизвестный тип модели '{params['model_type']}' в наборе {params['run_id']}")
+
+    return parameter_sets
+
+
+def _parse_value(value):
+    """Преобразование строкового значения из CSV в число, если это возможно"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def create_model(params):
+    """
+    Создание модели по набору параметров
+
+    Args:
+        params (dict): Набор параметров, включая необязательный model_type
+
+    Returns:
+        OilFiltrationModel: Экземпляр базовой или карбонатной модели
+    """
+    model_class = MODEL_TYPES[params.get('model_type', 'basic')]
+    model_params = {key: value for key, value in params.items() if key not in RESERVED_FIELDS}
+    return model_class(model_params)
+
+
+def run_model(model):
+    """Запуск расчета подходящим для типа модели методом"""
+    if isinstance(model, CarbonateModel):
+        model.run_dual_porosity_simulation()
+    else:
+        model.run_simulation()
+
+
+def flatten_metrics(results, prefix=''):
+    """
+    Преобразование вложенного словаря результатов в плоский словарь скалярных показателей
+
+    Ряды данных (профили, динамика нефтеотдачи) пропускаются.
+
+    Args:
+        results (dict): Результаты из extract_results()
+        prefix (str, optional): Префикс ключей. Defaults to ''.
+
+    Returns:
+        dict: Словарь вида {'breakthrough_time.with_cap': 42.0, ...}
+    """
+    metrics = {}
+    for key, value in results.items():
+        if not prefix and key in SERIES_SECTIONS:
+            continue
+
+        name = f'{prefix}.{key}' if prefix else str(key)
+        if isinstance(value, dict):
+            metrics.update(flatten_metrics(value, name))
+        elif isinstance(value, (int, float, np.integer, np.floating)):
+            metrics[name] = float(value)
+
+    return metrics
+
+
+def run_parameter_set(params, output_dir, save_profiles=False, dtype='float32'):
+    """
+    Расчет одного набора параметров и сохранение результата в сжатый .npz-файл
+
+    Args:
+        params (dict): Набор параметров
+        output_dir (str): Директория для файлов результатов
+        save_profiles (bool, optional): Сохранять профили насыщенности. Defaults to False.
+        dtype (str, optional): Тип данных для рядов. Defaults to 'float32'.
+
+    Returns:
+        dict: Сводка расчета (run_id, model_type, status, runtime, error, metrics)
+    """
+    run_id = params['run_id']
+    summary = {
+        'run_id': run_id,
+        'model_type': params.get('model_type', 'basic'),
+        'status': 'success',
+        'runtime': 0.0,
+        'error': '',
+        'metrics': {}
+    }
+
+    start_time = time.perf_counter()
+    try:
+        model = create_model(params)
+        run_model(model)
+        results = model.extract_results()
+
+        arrays = {
+            'time': model.t,
+            'recovery_with_cap': results['recovery_factor']['with_cap'],
+            'recovery_without_cap': results['recovery_factor']['without_cap']
+        }
+
+        if save_profiles:
+            days = sorted(results['saturation_profiles'].keys())
+            arrays['x'] = model.x
+            arrays['profile_days'] = days
+            arrays['profiles_with_cap'] = [results['saturation_profiles'][day]['with_cap'] for day in days]
+            arrays['profiles_without_cap'] = [results['saturation_profiles'][day]['without_cap'] for day in days]
+
+        np.savez_compressed(
+            os.path.join(output_dir, f'{run_id}.npz'),
+            **{name: np.asarray(values, dtype=dtype) for name, values in arrays.items()}
+        )
+
+        summary['metrics'] = flatten_metrics(results)
+    except Exception as e:
+        summary['status'] = 'error'
+        summary['error'] = f"{e}\n{traceback.format_exc()}"
+
+    summary['runtime'] = time.perf_counter() - start_time
+    return summary
+
+
+def run_batch(parameter_sets, output_dir, workers=None, save_profiles=False, dtype='float32'):
+    """
+    Пакетный расчет наборов параметров в пуле процессов
+
+    Args:
+        parameter_sets (list): Наборы параметров из load_parameter_sets()
+        output_dir (str): Директория для файлов результатов и сводки
+        workers (int, optional): Число процессов. Defaults to None (по числу ядер).
+        save_profiles (bool, optional): Сохранять профили насыщенности. Defaults to False.
+        dtype (str, optional): Тип данных для рядов. Defaults to 'float32'.
+
+    Returns:
+        list: Сводки расчетов в порядке наборов параметров
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    total = len(parameter_sets)
+    summaries = [None] * total
+
+    if workers == 1 or total <= 1:
+        # Без пула процессов, например для отладки
+        for i, params in enumerate(parameter_sets):
+            summaries[i] = run_parameter_set(params, output_dir, save_profiles, dtype)
+            print(f"[{i + 1}/{total}] {summaries[i]['run_id']}: {summaries[i]['status']}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(run_parameter_set, params, output_dir, save_profiles, dtype): i
+                for i, params in enumerate(parameter_sets)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                summaries[i] = future.result()
+                print(f"[{done}/{total}] {summaries[i]['run_id']}: {summaries[i]['status']}")
+
+    write_summary(summaries, os.path.join(output_dir, 'summary.csv'))
+    return summaries
+
+
+def write_summary(summaries, file_path):
+    """
+    Запись сводной таблицы пакетного расчета в CSV
+
+    Args:
+        summaries (list): Сводки расчетов из run_parameter_set()
+        file_path (str): Путь к CSV-файлу
+    """
+    metric_names = sorted({name for summary in summaries for name in summary['metrics']})
+    fieldnames = ['run_id', 'model_type', 'status', 'runtime'] + metric_names + ['error']
+
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for summary in summaries:
+            row = {
+                'run_id': summary['run_id'],
+                'model_type': summary['model_type'],
+                'status': summary['status'],
+                'runtime': f"{summary['runtime']:.3f}",
+                'error': summary['error'].splitlines()[0] if summary['error'] else ''
+            }
+            row.update(summary['metrics'])
+            writer.writerow(row)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Подбор параметров модели Брукса-Кори по лабораторным кривым капиллярного давления.
+# Pc = Pe * Sw_eff^(-1/lambda), Sw_eff = (Sw - Swc) / (1 - Swc).
+# Все образцы обрабатываются одновременно: таблица группируется по образцу один раз,
+# линейная регрессия ln(Pc) от ln(Sw_eff) считается суммами по группам (np.bincount).
+# Дополнительно: уточнение нелинейным МНК по Pc (Гаусс-Ньютон, также по всем образцам сразу)
+# и доверительные интервалы бутстрепом (точки перевыбираются внутри каждого образца).
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Минимальное число точек кривой для подбора параметров
+MIN_POINTS = 3
+
+# Итерации уточнения нелинейным МНК
+REFINE_ITERATIONS = 20
+
+# Уровень доверительных интервалов бутстрепа
+CONFIDENCE_LEVEL = 0.95
+
+# Версия расчета (входит в ключ кэша подобранных параметров)
+FIT_VERSION = 1
+
+
+def _group_sums(groups, n_groups, *values):
+    """Суммы значений по группам"""
+    return [np.bincount(groups, weights=value, minlength=n_groups) for value in values]
+
+
+def _log_linear_fit(groups, n_groups, x, y):
+    """
+    Линейная регрессия y = intercept + slope * x в каждой группе
+
+    Returns:
+        tuple: (slope, intercept, r_squared, n) - массивы по группам
+    """
+    n, sx, sy, sxx, sxy, syy = _group_sums(groups, n_groups, np.ones_like(x), x, y, x * x, x * y, y * y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sxx_c = sxx - sx * sx / n
+        sxy_c = sxy - sx * sy / n
+        syy_c = syy - sy * sy / n
+        slope = sxy_c / sxx_c
+        intercept = (sy - slope * sx) / n
+        r_squared = sxy_c * sxy_c / (sxx_c * syy_c)
+    return slope, intercept, r_squared, n
+
+
+def _refine(groups, n_groups, x, pc, log_pe, exponent, weights=None):
+    """
+    Уточнение параметров нелинейным МНК по Pc: Pc = exp(log_pe + exponent * x)
+
+    Шаг Гаусса-Ньютона принимается в группе, только если взвешенная сумма квадратов
+    невязок уменьшилась; иначе шаг группы уменьшается вдвое.
+    """
+    w = np.ones_like(pc) if weights is None else weights
+
+    def sse(a, b):
+        residual = pc - np.exp(a[groups] + b[groups] * x)
+        return np.bincount(groups, weights=w * residual * residual, minlength=n_groups)
+
+    current = sse(log_pe, exponent)
+    scale = np.ones(n_groups)
+    for _ in range(REFINE_ITERATIONS):
+        model = np.exp(log_pe[groups] + exponent[groups] * x)
+        residual = pc - model
+        j_a = model
+        j_b = model * x
+        s_aa, s_ab, s_bb, g_a, g_b = _group_sums(groups, n_groups, w * j_a * j_a, w * j_a * j_b,
+                                                 w * j_b * j_b, w * j_a * residual, w * j_b * residual)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            det = s_aa * s_bb - s_ab * s_ab
+            step_a = (s_bb * g_a - s_ab * g_b) / det
+            step_b = (s_aa * g_b - s_ab * g_a) / det
+        step_ok = np.isfinite(step_a) & np.isfinite(step_b)
+        step_a = np.where(step_ok, step_a, 0.0) * scale
+        step_b = np.where(step_ok, step_b, 0.0) * scale
+
+        new_a = log_pe + step_a
+        new_b = exponent + step_b
+        candidate = sse(new_a, new_b)
+        improved = candidate < current
+        log_pe = np.where(improved, new_a, log_pe)
+        exponent = np.where(improved, new_b, exponent)
+        current = np.where(improved, candidate, current)
+        scale = np.where(improved, 1.0, scale * 0.5)
+
+    return log_pe, exponent
+
+
+def fit_brooks_corey(sample_ids, sw, pc, refine=False, weights=None, bootstrap=0, seed=0):
+    """
+    Параметры Брукса-Кори для всех образцов
+
+    Args:
+        sample_ids (array-like): Идентификаторы образцов для каждой точки
+        sw (array-like): Водонасыщенность
+        pc (array-like): Капиллярное давление дренирования, МПа
+        refine (bool, optional): Уточнение нелинейным МНК по Pc. Defaults to False.
+        weights (array-like, optional): Веса точек для уточнения. Defaults to None (равные).
+        bootstrap (int, optional): Число выборок бутстрепа для доверительных интервалов. Defaults to 0.
+        seed (int, optional): Начальное значение генератора бутстрепа. Defaults to 0.
+
+    Returns:
+        pandas.DataFrame: Таблица по образцам: ID_Sample, entry_pressure, pore_distribution_index,
+            initial_water_saturation, n_points, r_squared; при bootstrap > 0 - границы интервалов
+            <параметр>_low / <параметр>_high
+    """
+    sw = np.asarray(sw, dtype=float)
+    pc = np.asarray(pc, dtype=float)
+    weights = None if weights is None else np.asarray(weights, dtype=float)
+
+    # Фильтрация нулевых значений
+    valid = (pc > 0) & (sw > 0) & (sw < 1)
+    codes, samples = pd.factorize(np.asarray(sample_ids)[valid], sort=True)
+    sw = sw[valid]
+    pc = pc[valid]
+    if weights is not None:
+        weights = weights[valid]
+    n_groups = len(samples)
+
+    # Начальная водонасыщенность образца - минимальная насыщенность кривой
+    swc = np.full(n_groups, np.inf)
+    np.minimum.at(swc, codes, sw)
+    n_raw = np.bincount(codes, minlength=n_groups)
+
+    # Линеаризация: ln(Pc) = ln(Pe) - (1/lambda) * ln(Sw_eff); точка Sw = Swc исключается
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.log((sw - swc[codes]) / (1 - swc[codes]))
+    fit = np.isfinite(x)
+    groups, x, pc = codes[fit], x[fit], pc[fit]
+    if weights is not None:
+        weights = weights[fit]
+    y = np.log(pc)
+
+    slope, intercept, r_squared, n = _log_linear_fit(groups, n_groups, x, y)
+    if refine:
+        intercept, slope = _refine(groups, n_groups, x, pc, intercept, slope, weights)
+
+    with np.errstate(divide='ignore'):
+        table = pd.DataFrame({
+            'ID_Sample': samples,
+            'entry_pressure': np.exp(intercept),
+            'pore_distribution_index': -1 / slope,
+            'initial_water_saturation': swc,
+            'n_points': n.astype(int),
+            'r_squared': r_squared
+        })
+
+    if bootstrap:
+        intervals = _bootstrap(groups, n_groups, x, y, pc, bootstrap, seed, refine, weights)
+        for column, (low, high) in intervals.items():
+            table[f'{column}_low'] = low
+            table[f'{column}_high'] = high
+
+    keep = ((n_raw >= MIN_POINTS) & (n >= MIN_POINTS)
+            & np.isfinite(table['entry_pressure']) & np.isfinite(table['pore_distribution_index']))
+    return table[keep].reset_index(drop=True)
+
+
+def _bootstrap(groups, n_groups, x, y, pc, n_samples, seed, refine, weights):
+    """
+    Доверительные интервалы параметров: точки перевыбираются с возвращением внутри образца
+
+    Returns:
+        dict: {параметр: (нижняя граница, верхняя граница)} - массивы по группам
+    """
+    rng = np.random.default_rng(seed)
+
+    # Точки отсортированы по группам: выборка - случайные индексы внутри отрезка группы
+    order = np.argsort(groups, kind='stable')
+    groups, x, y, pc = groups[order], x[order], y[order], pc[order]
+    if weights is not None:
+        weights = weights[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    pe = np.empty((n_samples, n_groups))
+    lam = np.empty((n_samples, n_groups))
+    for i in range(n_samples):
+        idx = starts[groups] + (rng.random(len(groups)) * counts[groups]).astype(int)
+        slope, intercept, _, _ = _log_linear_fit(groups, n_groups, x[idx], y[idx])
+        if refine:
+            intercept, slope = _refine(groups, n_groups, x[idx], pc[idx], intercept, slope,
+                                       None if weights is None else weights[idx])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pe[i] = np.exp(intercept)
+            lam[i] = -1 / slope
+
+    alpha = (1 - CONFIDENCE_LEVEL) / 2 * 100
+    intervals = {}
+    for column, values in (('entry_pressure', pe), ('pore_distribution_index', lam)):
+        # Вырожденные выборки (все точки совпали) не учитываются
+        values = np.where(np.isfinite(values), values, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanpercentile(values, [alpha, 100 - alpha], axis=0)
+        intervals[column] = (low, high)
+    return intervals
+
+
+def table_to_params(table):
+    """
+    Таблица параметров в виде словаря {образец: {параметр: значение}}
+
+    Returns:
+        dict: Параметры по образцам (формат DataLoader.get_brooks_corey_params)
+    """
+    columns = [column for column in table.columns if column != 'ID_Sample']
+    records = table[columns].to_dict(orient='records')
+    return dict(zip(table['ID_Sample'].tolist(), records))
@@ -11,9 +11,9 @@ class CarbonateModel(OilFiltrationModel):
     двойной пористости и детального моделирования капиллярных эффектов
     """
 
-    def __init__(self, params=None):
+    def __init__(self, params=None, pvt_table=None, kr_table=None):
         # Инициализация базовой модели
-        super().__init__(params)
+        super().__init__(params, pvt_table, kr_table)
 
         # Дополнительные параметры для карбонатных коллекторов
         self.fracture_porosity = 0.01  # Пористость трещин
@@ -31,6 +31,7 @@ class CarbonateModel(OilFiltrationModel):
                     setattr(self, key, float(value))
 
         # Пересчитываем зависимые параметры
+        self.nx = int(self.nx)
         self.matrix_porosity = self.porosity - self.fracture_porosity
 
         # Массивы для хранения результатов для матрицы и трещин
@@ -45,31 +46,32 @@ class CarbonateModel(OilFiltrationModel):
         """Запуск моделирования с учетом двойной пористости"""
         print("Запуск моделирования карбонатного коллектора с двойной пористостью...")
 
-        # Моделирование течения в трещинах (быстрое течение)
+        mu_oil, mu_water = self.grid_viscosities()
+
+        # Моделирование течения в трещинах (быстрое течение); внутренние узлы слоя обновляются векторно
         for n in range(self.nt - 1):
-            for i in range(1, self.nx):
-                # Апвинд схема для конвективного члена в трещинах
-                f_i = self.fractional_flow(self.Sw_fracture[n, i])
-                f_im1 = self.fractional_flow(self.Sw_fracture[n, i - 1])
+            Sw = self.Sw_fracture[n]
+
+            # Апвинд схема для конвективного члена в трещинах
+            f = self.fractional_flow_array(Sw, mu_oil, mu_water)
 
-                # Схема апвинд для трещин (без капиллярных эффектов в трещинах)
-                self.Sw_fracture[n + 1, i] = self.Sw_fracture[n, i] - \
-                                             (self.dt / self.dx) * (f_i - f_im1) + \
-                                             self.dt * self.transfer_term(n, i)
+            # Схема апвинд для трещин (без капиллярных эффектов в трещинах)
+            self.Sw_fracture[n + 1, 1:-1] = Sw[1:-1] - \
+                                            (self.dt / self.dx) * (f[1:-1] - f[:-2]) + \
+                                            self.dt * self.transfer_term_array(n)
 
             # Граничное условие на правом конце
             self.Sw_fracture[n + 1, -1] = self.Sw_fracture[n + 1, -2]
 
         # Моделирование течения в матрице (медленное течение с капиллярными эффектами)
         for n in range(self.nt - 1):
-            for i in range(1, self.nx):
-                # Капиллярное давление в матрице
-                pc_gradient = self.matrix_capillary_gradient(n, i)
+            # Капиллярное давление в матрице
+            pc_gradient = self.matrix_capillary_gradient_array(n)
 
-                # Обновление насыщенности в матрице
-                self.Sw_matrix[n + 1, i] = self.Sw_matrix[n, i] + \
-                                           self.dt * pc_gradient - \
-                                           self.dt * self.transfer_term(n, i)
+            # Обновление насыщенности в матрице
+            self.Sw_matrix[n + 1, 1:-1] = self.Sw_matrix[n, 1:-1] + \
+                                          self.dt * pc_gradient - \
+                                          self.dt * self.transfer_term_array(n)
 
             # Граничное условие на правом конце
             self.Sw_matrix[n + 1, -1] = self.Sw_matrix[n + 1, -2]
@@ -94,9 +96,7 @@ class CarbonateModel(OilFiltrationModel):
         self.Sw_without_cap = Sw_without_cap_initial
 
         # ТЕПЕРЬ заполняем массив Sw_with_cap результатами карбонатного моделирования
-        for n in range(self.nt):
-            for i in range(self.nx + 1):
-                self.Sw_with_cap[n, i] = matrix_volume * self.Sw_matrix[n, i] + fracture_volume * self.Sw_fracture[n, i]
+        self.Sw_with_cap[:, :] = matrix_volume * self.Sw_matrix + fracture_volume * self.Sw_fracture
 
         # Восстанавливаем результаты моделирования без учета капиллярных эффектов
         self.Sw_without_cap = Sw_without_cap_results
@@ -115,6 +115,22 @@ class CarbonateModel(OilFiltrationModel):
 
         return exchange_rate
 
+    def transfer_term_array(self, n):
+        """Обмен флюидами между трещинами и матрицей во внутренних узлах слоя n"""
+        pc_matrix = self.capillary_pressure_array(self.Sw_matrix[n, 1:-1])
+        return self.shape_factor * (0 - pc_matrix)
+
+    def matrix_capillary_gradient_array(self, n):
+        """Градиент капиллярного давления в матрице во внутренних узлах слоя n"""
+        pc = self.capillary_pressure_array(self.Sw_matrix[n])
+        pc_grad = (pc[2:] - pc[:-2]) / (2 * self.dx)
+
+        # Коэффициент мобильности
+        _, mu_water = self.grid_viscosities()
+        mobility = self.matrix_permeability / (mu_water[1:-1] * self.matrix_porosity)
+
+        return mobility * pc_grad
+
     def matrix_capillary_gradient(self, n, i):
         """Расчет градиента капиллярного давления в матрице"""
         # Рассчитываем градиент капиллярного давления
@@ -132,37 +148,33 @@ class CarbonateModel(OilFiltrationModel):
                        self.capillary_pressure(self.Sw_matrix[n, i - 1])) / (2 * self.dx)
 
         # Коэффициент мобильности
-        mobility = self.matrix_permeability / (self.mu_water * self.matrix_porosity)
+        mu_water = self.mu_water_cells[i] if self.mu_water_cells is not None else self.mu_water
+        mobility = self.matrix_permeability / (mu_water * self.matrix_porosity)
 
         return mobility * pc_grad
 
-    # В carbonate_model.py метод calculate_recovery_factor()
     def calculate_recovery_factor(self):
         """Расчет коэффициента нефтеотдачи с учетом двойной пористости"""
         initial_oil = 1 - self.initial_water_saturation
 
-        recovery_with_cap = np.zeros(self.nt)
-        recovery_without_cap = np.zeros(self.nt)
-
         # Вычисляем взвешенное среднее для матрицы и трещин
         matrix_volume = self.matrix_porosity / self.porosity
         fracture_volume = self.fracture_porosity / self.porosity
 
-        for n in range(self.nt):
-            # Средняя нефтенасыщенность для двойной пористости
-            avg_oil_matrix = 1 - np.mean(self.Sw_matrix[n, :])
-            avg_oil_fracture = 1 - np.mean(self.Sw_fracture[n, :])
+        # Средняя нефтенасыщенность для двойной пористости
+        avg_oil_matrix = 1 - self.Sw_matrix.mean(axis=1)
+        avg_oil_fracture = 1 - self.Sw_fracture.mean(axis=1)
 
-            # Этот расчет должен соответствовать расчету в методе get_saturation_profile
-            # для корректного отображения данных
-            avg_oil_with_cap = matrix_volume * avg_oil_matrix + fracture_volume * avg_oil_fracture
+        # Этот расчет должен соответствовать расчету в get_saturation_profile
+        # для корректного отображения данных
+        avg_oil_with_cap = matrix_volume * avg_oil_matrix + fracture_volume * avg_oil_fracture
 
-            # Средняя нефтенасыщенность без учета капиллярных эффектов
-            avg_oil_without_cap = 1 - np.mean(self.Sw_without_cap[n, :])
+        # Средняя нефтенасыщенность без учета капиллярных эффектов
+        avg_oil_without_cap = 1 - self.Sw_without_cap.mean(axis=1)
 
-            # Коэффициент нефтеотдачи
-            recovery_with_cap[n] = (initial_oil - avg_oil_with_cap) / initial_oil
-            recovery_without_cap[n] = (initial_oil - avg_oil_without_cap) / initial_oil
+        # Коэффициент нефтеотдачи
+        recovery_with_cap = (initial_oil - avg_oil_with_cap) / initial_oil
+        recovery_without_cap = (initial_oil - avg_oil_without_cap) / initial_oil
 
         return recovery_with_cap, recovery_without_cap
 
@@ -1,164 +1,313 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import functools
 import os
-import pandas as pd
-import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.brooks_corey import FIT_VERSION, fit_brooks_corey, table_to_params
+from core.pvt import PVTTable
+from core.relperm import RelativePermeabilityTable
+from core.sample_index import SampleIndex
+from utils.csv_dialect import detect_file_dialect, read_table
+from utils.dataset_cache import load_dataframe, load_derived
+from utils.file_schema import FILE_SCHEMAS, validate_file
+
+
+# Файлы данных: {тип файла: метод загрузки}
+DATA_FILES = {
+    'rock_properties': 'load_rock_properties',
+    'capillary_pressure': 'load_capillary_pressure',
+    'relative_perm': 'load_relative_permeability',
+    'pvt_data': 'load_pvt_data',
+    'production_data': 'load_production_data'
+}
+
+# Потоков для одновременной загрузки независимых файлов
+LOAD_WORKERS = 3
+
+
+def requires(*file_types):
+    """
+    Декоратор метода DataLoader: объявляет файлы, которые нужны методу
+
+    Незагруженные файлы из списка загружаются (одновременно) перед вызовом метода.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            self.require(*file_types)
+            return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _table(file_type):
+    """Таблица данных, которая загружается при первом обращении"""
+    def getter(self):
+        if file_type not in self._tables:
+            self.require(file_type)
+        return self._tables.get(file_type)
+
+    def setter(self, value):
+        self._tables[file_type] = value
+
+    return property(getter, setter)
 
 
 class DataLoader:
     """Класс для загрузки и обработки данных из CSV-файлов"""
 
-    def __init__(self, data_dir='data/uploads'):
+    # Таблицы загружаются при первом обращении (или через require)
+    rock_data = _table('rock_properties')
+    capillary_data = _table('capillary_pressure')
+    perm_data = _table('relative_perm')
+    pvt_data = _table('pvt_data')
+    production_data = _table('production_data')
+
+    def __init__(self, data_dir='data/uploads', cache_dir=None, dialects=None):
         self.data_dir = data_dir
-        self.rock_data = None
-        self.capillary_data = None
-        self.perm_data = None
-        self.pvt_data = None
-        self.production_data = None
-        self.encoding = 'utf-8'  # Кодировка по умолчанию
+        # Директория кэша разобранных таблиц (utils.dataset_cache); None - файлы разбираются при каждой загрузке
+        self.cache_dir = cache_dir
+        # Сохраненные при загрузке форматы CSV-файлов {тип файла: {encoding, sep, decimal}}
+        self.dialects = dialects or {}
+        # Пути загруженных файлов {тип файла: путь}
+        self.files = {}
+        # Отчеты проверки загруженных файлов {тип файла: отчет utils.file_schema}
+        self.reports = {}
+        # Индексы таблиц по образцу и типу породы {(ключ, сортировка): (таблица, SampleIndex)}
+        self._indices = {}
+        # Буфер сообщений потока загрузки (require)
+        self._output = threading.local()
+        # Таблица PVT-свойств: (PVT-данные, PVTTable)
+        self._pvt_table = None
+        # Файлы данных, заданные для загрузки {тип файла: путь}, и загруженные таблицы {тип файла: таблица}
+        self.sources = {}
+        self._tables = {}
+
+    def set_data_files(self, rock_file=None, cap_file=None, perm_file=None, pvt_file=None, prod_file=None):
+        """
+        Файлы данных без загрузки: каждая таблица разбирается при первом обращении
+
+        Файлы, которые не указаны, ищутся в data_dir под именами по умолчанию.
+        """
+        files = zip(DATA_FILES, (rock_file, cap_file, perm_file, pvt_file, prod_file))
+        self.sources = {file_type: file_path for file_type, file_path in files if file_path}
+        # Таблицы, загруженные из прежних файлов, загружаются заново
+        self._tables = {}
+        self.reports = {}
 
     def load_all_data(self, rock_file=None, cap_file=None, perm_file=None, pvt_file=None, prod_file=None):
         """Загрузка всех доступных данных из указанных файлов"""
         print("Загрузка данных...")
-        self.load_rock_properties(rock_file)
-        self.load_capillary_pressure(cap_file)
-        self.load_relative_permeability(perm_file)
-        self.load_pvt_data(pvt_file)
-        self.load_production_data(prod_file)
+        self.set_data_files(rock_file, cap_file, perm_file, pvt_file, prod_file)
+        self.require(*DATA_FILES)
         print("Данные успешно загружены.")
 
+    def require(self, *file_types):
+        """
+        Загрузка еще не загруженных таблиц (независимые файлы читаются одновременно в пуле потоков)
+
+        Args:
+            *file_types (str): Типы файлов (ключи DATA_FILES)
+        """
+        pending = [file_type for file_type in dict.fromkeys(file_types) if file_type not in self._tables]
+        if not pending:
+            return
+
+        def load(file_type):
+            # Сообщения загрузки копятся и выводятся после загрузки всех файлов в порядке pending
+            messages = []
+            self._output.messages = messages
+            try:
+                getattr(self, DATA_FILES[file_type])(self.sources.get(file_type))
+            except Exception as e:
+                self._load_failed(file_type, f"Ошибка при загрузке файла: {e}")
+            finally:
+                self._output.messages = None
+            return messages
+
+        if len(pending) == 1:
+            results = [load(pending[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(LOAD_WORKERS, len(pending))) as executor:
+                results = list(executor.map(load, pending))
+
+        for messages in results:
+            for message in messages:
+                print(message)
+
+        # Отсутствующие и нечитаемые файлы не загружаются повторно
+        for file_type in pending:
+            self._tables.setdefault(file_type, None)
+
+    def _log(self, message):
+        """Сообщение загрузки: в буфер потока загрузки (require) или сразу в вывод"""
+        messages = getattr(self._output, 'messages', None)
+        if messages is not None:
+            messages.append(message)
+        else:
+            print(message)
+
+    def _load_failed(self, file_type, message):
+        """Файл не загружен: сообщение и отчет с ошибкой в reports"""
+        self._log(message)
+        self.reports[file_type] = {
+            'file_type': file_type,
+            'loaded': False,
+            'valid': False,
+            'message': message,
+            'errors': [message],
+            'warnings': []
+        }
+
+    def get_load_errors(self):
+        """
+        Файлы, которые не удалось загрузить
+
+        Returns:
+            dict: {тип файла: сообщение об ошибке}
+        """
+        return {file_type: report['message'] for file_type, report in self.reports.items()
+                if report.get('loaded') is False}
+
+    def _resolve_path(self, file_path, default_name):
+        """Путь к файлу данных: имена файлов без директории ищутся в data_dir"""
+        if not file_path:
+            return os.path.join(self.data_dir, default_name)
+        if not os.path.dirname(file_path):
+            return os.path.join(self.data_dir, file_path)
+        return file_path
+
+    def _read_table(self, file_path, file_type):
+        """
+        Чтение CSV- или Excel-файла (через кэш разобранных таблиц, если он задан)
+
+        Файл проверяется по схеме типа (utils.file_schema); отчет, сохраненный при загрузке файла,
+        берется из кэша, замечания выводятся как предупреждения.
+        """
+        self.files[file_type] = file_path
+        dialect = self.dialects.get(file_type)
+        df = load_dataframe(file_path, cache_dir=self.cache_dir, dialect=dialect)
+
+        report = validate_file(file_path, file_type, cache_dir=self.cache_dir, dialect=dialect, df=df)
+        self.reports[file_type] = report
+        title = FILE_SCHEMAS[file_type]['title']
+        for message in report['errors'] + report['warnings']:
+            self._log(f"ПРЕДУПРЕЖДЕНИЕ: файл {title}: {message}")
+        return df
+
     def load_rock_properties(self, file_path=None):
         """Загрузка данных о свойствах породы"""
-        if not file_path:
-            file_path = os.path.join(self.data_dir, 'rock_properties.csv')
+        file_path = self._resolve_path(file_path, 'rock_properties.csv')
 
         if os.path.exists(file_path):
             try:
-                # Пробуем разные кодировки, так как некоторые файлы могут быть в CP1252
-                try:
-                    self.rock_data = pd.read_csv(file_path, encoding=self.encoding)
-                except UnicodeDecodeError:
-                    self.rock_data = pd.read_csv(file_path, encoding='cp1252')
+                self.rock_data = self._read_table(file_path, 'rock_properties')
 
-                print(f"Загружено {len(self.rock_data)} записей о свойствах породы.")
-
-                # Проверяем наличие необходимых колонок
-                required_columns = ['ID_Sample', 'Porosity_fr', 'Permeability_mD', 'Rock_Type']
-                for col in required_columns:
-                    if col not in self.rock_data.columns:
-                        print(f"ПРЕДУПРЕЖДЕНИЕ: В файле свойств породы отсутствует колонка {col}")
+                self._log(f"Загружено {len(self.rock_data)} записей о свойствах породы.")
 
                 return True
             except Exception as e:
-                print(f"Ошибка при загрузке файла свойств породы: {e}")
+                self._load_failed('rock_properties', f"Ошибка при загрузке файла свойств породы: {e}")
                 return False
         else:
-            print(f"Файл {file_path} не найден.")
+            if 'rock_properties' in self.sources:
+                self._load_failed('rock_properties', f"Файл {os.path.basename(file_path)} не найден.")
+            else:
+                self._log(f"Файл {file_path} не найден.")
             return False
 
     def load_capillary_pressure(self, file_path=None):
         """Загрузка данных о капиллярном давлении"""
-        if not file_path:
-            file_path = os.path.join(self.data_dir, 'capillary_pressure.csv')
+        file_path = self._resolve_path(file_path, 'capillary_pressure.csv')
 
         if os.path.exists(file_path):
             try:
-                self.capillary_data = pd.read_csv(file_path, encoding=self.encoding)
-                print(f"Загружено {len(self.capillary_data)} записей о капиллярном давлении.")
-
-                # Проверяем наличие необходимых колонок
-                required_columns = ['ID_Sample', 'Water_Saturation', 'Pc_Drainage_MPa']
-                for col in required_columns:
-                    if col not in self.capillary_data.columns:
-                        print(f"ПРЕДУПРЕЖДЕНИЕ: В файле капиллярного давления отсутствует колонка {col}")
+                self.capillary_data = self._read_table(file_path, 'capillary_pressure')
+                self._log(f"Загружено {len(self.capillary_data)} записей о капиллярном давлении.")
 
                 return True
             except Exception as e:
-                print(f"Ошибка при загрузке файла капиллярного давления: {e}")
+                self._load_failed('capillary_pressure', f"Ошибка при загрузке файла капиллярного давления: {e}")
                 return False
         else:
-            print(f"Файл {file_path} не найден.")
+            if 'capillary_pressure' in self.sources:
+                self._load_failed('capillary_pressure', f"Файл {os.path.basename(file_path)} не найден.")
+            else:
+                self._log(f"Файл {file_path} не найден.")
             return False
 
     def load_relative_permeability(self, file_path=None):
         """Загрузка данных об относительной проницаемости"""
-        if not file_path:
-            file_path = os.path.join(self.data_dir, 'relative_perm.csv')
+        file_path = self._resolve_path(file_path, 'relative_perm.csv')
 
         if os.path.exists(file_path):
             try:
-                self.perm_data = pd.read_csv(file_path, encoding=self.encoding)
-                print(f"Загружено {len(self.perm_data)} записей об относительной проницаемости.")
-
-                # Проверяем наличие необходимых колонок
-                required_columns = ['ID_Sample', 'Water_Saturation', 'Krw_Drainage', 'Kro_Drainage']
-                for col in required_columns:
-                    if col not in self.perm_data.columns:
-                        print(f"ПРЕДУПРЕЖДЕНИЕ: В файле относительной проницаемости отсутствует колонка {col}")
+                self.perm_data = self._read_table(file_path, 'relative_perm')
+                self._log(f"Загружено {len(self.perm_data)} записей об относительной проницаемости.")
 
                 return True
             except Exception as e:
-                print(f"Ошибка при загрузке файла относительной проницаемости: {e}")
+                self._load_failed('relative_perm', f"Ошибка при загрузке файла относительной проницаемости: {e}")
                 return False
         else:
-            print(f"Файл {file_path} не найден.")
+            if 'relative_perm' in self.sources:
+                self._load_failed('relative_perm', f"Файл {os.path.basename(file_path)} не найден.")
+            else:
+                self._log(f"Файл {file_path} не найден.")
             return False
 
     def load_pvt_data(self, file_path=None):
         """Загрузка PVT-данных флюидов"""
-        if not file_path:
-            file_path = os.path.join(self.data_dir, 'pvt_data.csv')
+        file_path = self._resolve_path(file_path, 'pvt_data.csv')
 
         if os.path.exists(file_path):
             try:
-                self.pvt_data = pd.read_csv(file_path, encoding=self.encoding)
-                print(f"Загружено {len(self.pvt_data)} записей PVT-данных.")
-
-                # Проверяем наличие необходимых колонок
-                required_columns = ['Pressure_MPa', 'Oil_Viscosity_cP']
-                for col in required_columns:
-                    if col not in self.pvt_data.columns:
-                        print(f"ПРЕДУПРЕЖДЕНИЕ: В файле PVT-данных отсутствует колонка {col}")
+                self.pvt_data = self._read_table(file_path, 'pvt_data')
+                self._log(f"Загружено {len(self.pvt_data)} записей PVT-данных.")
 
                 return True
             except Exception as e:
-                print(f"Ошибка при загрузке файла PVT-данных: {e}")
+                self._load_failed('pvt_data', f"Ошибка при загрузке файла PVT-данных: {e}")
                 return False
         else:
-            print(f"Файл {file_path} не найден.")
+            if 'pvt_data' in self.sources:
+                self._load_failed('pvt_data', f"Файл {os.path.basename(file_path)} не найден.")
+            else:
+                self._log(f"Файл {file_path} не найден.")
             return False
 
     def load_production_data(self, file_path=None):
         """Загрузка данных о добыче"""
-        if not file_path:
-            file_path = os.path.join(self.data_dir, 'production_data.csv')
+        file_path = self._resolve_path(file_path, 'production_data.csv')
 
         if os.path.exists(file_path):
             try:
-                self.production_data = pd.read_csv(file_path, encoding=self.encoding)
-                print(f"Загружено {len(self.production_data)} записей о добыче.")
-
-                # Проверяем наличие необходимых колонок
-                required_columns = ['Date', 'Oil_Rate_m3_day', 'Water_Rate_m3_day']
-                for col in required_columns:
-                    if col not in self.production_data.columns:
-                        print(f"ПРЕДУПРЕЖДЕНИЕ: В файле данных добычи отсутствует колонка {col}")
+                self.production_data = self._read_table(file_path, 'production_data')
+                self._log(f"Загружено {len(self.production_data)} записей о добыче.")
 
                 return True
             except Exception as e:
-                print(f"Ошибка при загрузке файла данных добычи: {e}")
+                self._load_failed('production_data', f"Ошибка при загрузке файла данных добычи: {e}")
                 return False
         else:
-            print(f"Файл {file_path} не найден.")
+            if 'production_data' in self.sources:
+                self._load_failed('production_data', f"Файл {os.path.basename(file_path)} не найден.")
+            else:
+                self._log(f"Файл {file_path} не найден.")
             return False
 
-    def get_brooks_corey_params(self, rock_type=None):
+    @requires('rock_properties', 'capillary_pressure')
+    def get_brooks_corey_params(self, rock_type=None, refine=False, bootstrap=0):
         """
         Получение параметров модели Брукса-Кори для заданного типа породы
 
         Args:
             rock_type (str, optional): Тип породы. Defaults to None.
+            refine (bool, optional): Уточнение нелинейным МНК по Pc. Defaults to False.
+            bootstrap (int, optional): Число выборок бутстрепа для доверительных интервалов. Defaults to 0.
 
         Returns:
             dict: Словарь параметров Брукса-Кори для образцов указанного типа породы
@@ -167,66 +316,59 @@ class DataLoader:
             print("Данные о породе или капиллярном давлении не загружены.")
             return {}
 
-        # Фильтрация данных по типу породы, если указан
+        table = self.get_brooks_corey_table(refine=refine, bootstrap=bootstrap)
+
+        # Фильтрация по типу породы, если указан
         if rock_type:
-            samples = self.rock_data[self.rock_data['Rock_Type'] == rock_type]['ID_Sample'].tolist()
+            samples = self._get_rock_index().get(rock_type, 'ID_Sample')
+            samples = samples if samples is not None else []
         else:
-            samples = self.rock_data['ID_Sample'].tolist()
-
-        # Получение уникальных образцов
-        unique_samples = set(samples).intersection(set(self.capillary_data['ID_Sample'].unique()))
-
-        # Расчет параметров для каждого образца
-        results = {}
-        for sample in unique_samples:
-            try:
-                sample_data = self.capillary_data[self.capillary_data['ID_Sample'] == sample]
-
-                # Только для дренирования (Pc_Drainage_MPa)
-                Sw = sample_data['Water_Saturation'].values
-                Pc = sample_data['Pc_Drainage_MPa'].values
+            samples = self.rock_data['ID_Sample']
+        table = table[table['ID_Sample'].isin(samples)]
 
-                # Фильтрация нулевых значений
-                valid_idx = (Pc > 0) & (Sw > 0) & (Sw < 1)
-                Sw = Sw[valid_idx]
-                Pc = Pc[valid_idx]
+        return table_to_params(table)
 
-                if len(Sw) < 3:
-                    continue
+    def get_brooks_corey_table(self, refine=False, bootstrap=0):
+        """
+        Таблица параметров Брукса-Кори для всех образцов (core.brooks_corey)
 
-                # Вычисление параметров Брукса-Кори
-                # Нахождение параметров для Pc = Pe * (Sw_eff)^(-1/lambda)
-                # Линеаризация: ln(Pc) = ln(Pe) - (1/lambda) * ln(Sw_eff)
+        Подбор выполняется для всех образцов сразу; результат кэшируется по хэшу файла
+        капиллярного давления.
 
-                # Расчет эффективной насыщенности
-                Swc = min(Sw)  # Начальная водонасыщенность
-                Sw_eff = (Sw - Swc) / (1 - Swc)
+        Returns:
+            pandas.DataFrame: Параметры по образцам
+        """
+        if self.capillary_data is None:
+            return None
 
-                # Линеаризация
-                log_Pc = np.log(Pc)
-                log_Sw_eff = np.log(Sw_eff)
+        def build():
+            return fit_brooks_corey(self.capillary_data['ID_Sample'].to_numpy(),
+                                    self.capillary_data['Water_Saturation'].to_numpy(),
+                                    self.capillary_data['Pc_Drainage_MPa'].to_numpy(),
+                                    refine=refine, bootstrap=bootstrap)
 
-                # Линейная регрессия
-                valid = ~np.isnan(log_Sw_eff) & ~np.isnan(log_Pc) & ~np.isinf(log_Sw_eff) & ~np.isinf(log_Pc)
-                if sum(valid) < 3:
-                    continue
+        name = f'brooks_corey.v{FIT_VERSION}.refine{int(refine)}.bootstrap{bootstrap}'
+        return load_derived(self.cache_dir, self.files.get('capillary_pressure'), name, build)
 
-                slope, intercept = np.polyfit(log_Sw_eff[valid], log_Pc[valid], 1)
+    def _get_index(self, data, key, columns, sort_by=None):
+        """
+        Индекс загруженной таблицы по ключу (core.sample_index)
 
-                # Расчет параметров
-                lambda_value = -1 / slope
-                Pe = np.exp(intercept)
+        Строится один раз для каждой загруженной таблицы; при замене таблицы строится заново.
+        """
+        cache_key = (key, sort_by)
+        cached = self._indices.get(cache_key)
+        if cached is not None and cached[0] is data:
+            return cached[1]
 
-                # Добавление в результаты
-                results[sample] = {
-                    'entry_pressure': Pe,
-                    'pore_distribution_index': lambda_value,
-                    'initial_water_saturation': Swc
-                }
-            except Exception as e:
-                print(f"Ошибка при обработке образца {sample}: {e}")
+        index = SampleIndex(data, key, [column for column in columns if column in data.columns], sort_by)
+        self._indices[cache_key] = (data, index)
+        return index
 
-        return results
+    def _get_rock_index(self):
+        """Индекс свойств породы по типу породы"""
+        return self._get_index(self.rock_data, 'Rock_Type',
+                               ['ID_Sample', 'Porosity_fr', 'Permeability_mD', 'Wettability_Index'])
 
     def get_relative_permeability_data(self, sample_id):
         """
@@ -236,28 +378,73 @@ class DataLoader:
             sample_id (str): Идентификатор образца
 
         Returns:
-            tuple: Кортеж массивов (Sw, Krw, Kro)
+            tuple: Кортеж массивов (Sw, Krw, Kro), отсортированных по насыщенности (только для чтения)
         """
         if self.perm_data is None:
             print("Данные об относительной проницаемости не загружены.")
             return None
 
-        if sample_id not in self.perm_data['ID_Sample'].unique():
+        # Строки образца - непрерывный срез, заранее отсортированный по насыщенности
+        columns = ['Water_Saturation', 'Krw_Drainage', 'Kro_Drainage']
+        index = self._get_index(self.perm_data, 'ID_Sample', columns, sort_by='Water_Saturation')
+        if sample_id not in index:
             print(f"Образец {sample_id} не найден в данных.")
             return None
 
-        sample_data = self.perm_data[self.perm_data['ID_Sample'] == sample_id]
+        Sw, Krw, Kro = (index.get(sample_id, column) for column in columns)
+        return Sw, Krw, Kro
+
+    @requires('rock_properties', 'capillary_pressure')
+    def get_parameter_sample(self, rock_type=None):
+        """
+        Образец, по которому задаются параметры модели (extract_model_parameters):
+        первый образец типа породы с подобранными параметрами Брукса-Кори
+
+        Returns:
+            str: Образец или None
+        """
+        bc_params = self.get_brooks_corey_params(rock_type)
+        return next(iter(bc_params), None) if bc_params else None
 
-        # Выбираем только нужные столбцы и сортируем по насыщенности
-        result = sample_data[['Water_Saturation', 'Krw_Drainage', 'Kro_Drainage']].copy()
-        result.sort_values('Water_Saturation', inplace=True)
+    @requires('relative_perm')
+    def get_kr_table(self, rock_type=None, sample_id=None):
+        """
+        Табличные относительные проницаемости образца для модели (core.relperm)
 
-        # Преобразуем в numpy массивы для удобства
-        Sw = result['Water_Saturation'].values
-        Krw = result['Krw_Drainage'].values
-        Kro = result['Kro_Drainage'].values
+        Без явного образца берется образец параметров модели (get_parameter_sample),
+        а если для него нет кривой - первый образец типа породы с кривой проницаемости.
 
-        return Sw, Krw, Kro
+        Args:
+            rock_type (str, optional): Тип породы. Defaults to None.
+            sample_id (str, optional): Образец (приоритетнее типа породы). Defaults to None.
+
+        Returns:
+            RelativePermeabilityTable: Таблица (с образцом в sample_id) или None, если кривой нет
+        """
+        if self.perm_data is None:
+            return None
+
+        index = self._get_index(self.perm_data, 'ID_Sample',
+                                ['Water_Saturation', 'Krw_Drainage', 'Kro_Drainage'], sort_by='Water_Saturation')
+        if sample_id is None:
+            candidates = index.keys
+            if rock_type and self.rock_data is not None:
+                samples = self._get_rock_index().get(rock_type, 'ID_Sample')
+                candidates = [s for s in (samples if samples is not None else []) if s in index]
+            parameter_sample = None
+            if self.rock_data is not None and self.capillary_data is not None:
+                parameter_sample = self.get_parameter_sample(rock_type)
+            if parameter_sample in index:
+                sample_id = parameter_sample
+            elif candidates:
+                sample_id = candidates[0]
+            else:
+                return None
+
+        table = RelativePermeabilityTable.from_arrays(self.get_relative_permeability_data(sample_id), sample_id)
+        if table is not None:
+            print(f"Табличные относительные проницаемости по образцу {sample_id}")
+        return table
 
     def get_average_parameters(self, rock_type=None):
         """
@@ -273,23 +460,19 @@ class DataLoader:
             print("Данные о породе не загружены.")
             return None
 
-        # Фильтрация данных по типу породы, если указан
-        if rock_type:
-            data = self.rock_data[self.rock_data['Rock_Type'] == rock_type]
-        else:
-            data = self.rock_data
-
-        if len(data) == 0:
+        index = self._get_rock_index()
+        if len(self.rock_data) == 0 or (rock_type and rock_type not in index):
             print(f"Нет данных для типа породы {rock_type}.")
             return None
 
-        # Расчет средних значений
-        avg_porosity = data['Porosity_fr'].mean()
-        avg_permeability = data['Permeability_mD'].mean()
+        # Средние значения по типам породы считаются один раз при построении индекса
+        key = rock_type or None
+        avg_porosity = index.mean('Porosity_fr', key)
+        avg_permeability = index.mean('Permeability_mD', key)
 
         # Проверка наличия колонки Wettability_Index
-        if 'Wettability_Index' in data.columns:
-            avg_wettability = data['Wettability_Index'].mean()
+        if 'Wettability_Index' in self.rock_data.columns:
+            avg_wettability = index.mean('Wettability_Index', key)
         else:
             avg_wettability = 0.5  # Значение по умолчанию
 
@@ -299,12 +482,27 @@ class DataLoader:
             'wettability_index': avg_wettability
         }
 
+    def get_pvt_table(self):
+        """
+        Таблица PVT-свойств с интерполяцией по давлению (core.pvt.PVTTable)
+
+        Строится один раз для загруженных PVT-данных.
+
+        Returns:
+            PVTTable: Таблица или None, если PVT-данные не загружены или в них нет давления
+        """
+        if self.pvt_data is None:
+            return None
+        if self._pvt_table is None or self._pvt_table[0] is not self.pvt_data:
+            self._pvt_table = (self.pvt_data, PVTTable.from_dataframe(self.pvt_data))
+        return self._pvt_table[1]
+
     def get_pvt_properties(self, pressure=None):
         """
         Получение PVT-свойств флюидов при заданном давлении
 
         Args:
-            pressure (float, optional): Давление в МПа. Defaults to None.
+            pressure (float, optional): Давление в МПа. Defaults to None (давление первой строки данных).
 
         Returns:
             dict: Словарь PVT-свойств флюидов
@@ -313,32 +511,28 @@ class DataLoader:
             print("PVT-данные не загружены.")
             return None
 
-        if pressure is None:
-            # Возвращаем первую строку данных
-            row = self.pvt_data.iloc[0]
-        else:
-            # Находим ближайшее давление
-            idx = (self.pvt_data['Pressure_MPa'] - pressure).abs().idxmin()
-            row = self.pvt_data.iloc[idx]
+        table = self.get_pvt_table()
+        if pressure is None and len(self.pvt_data) and 'Pressure_MPa' in self.pvt_data.columns:
+            pressure = self.pvt_data['Pressure_MPa'].iloc[0]
 
-        # Формируем словарь свойств, проверяя наличие каждой колонки
-        properties = {'pressure': row.get('Pressure_MPa', 0)}
+        # Свойства интерполируются по давлению (монотонный сплайн по точкам таблицы)
+        properties = {'pressure': pressure if pressure is not None else 0}
 
-        if 'Oil_Viscosity_cP' in row:
-            properties['oil_viscosity'] = row['Oil_Viscosity_cP']
-        else:
-            properties['oil_viscosity'] = 5.0  # Значение по умолчанию
-
-        properties['water_viscosity'] = 1.0  # Значение по умолчанию для воды
+        def value(name, default=None):
+            if table is not None and table.has(name) and pressure is not None:
+                return table.evaluate(name, pressure)
+            return default
 
-        if 'Oil_Density_kg_m3' in row:
-            properties['oil_density'] = row['Oil_Density_kg_m3']
+        properties['oil_viscosity'] = value('oil_viscosity', 5.0)  # 5.0 - значение по умолчанию
+        properties['water_viscosity'] = value('water_viscosity', 1.0)  # 1.0 - значение по умолчанию для воды
 
-        if 'Gas_Density_kg_m3' in row:
-            properties['gas_density'] = row['Gas_Density_kg_m3']
+        for name in ('oil_density', 'gas_density'):
+            if value(name) is not None:
+                properties[name] = value(name)
 
         return properties
 
+    @requires('rock_properties', 'capillary_pressure', 'pvt_data')
     def extract_model_parameters(self, rock_type=None):
         """
         Извлечение параметров модели из загруженных данных
@@ -360,8 +554,8 @@ class DataLoader:
         # Получение параметров модели Брукса-Кори
         bc_params = self.get_brooks_corey_params(rock_type)
         if bc_params and len(bc_params) > 0:
-            # Берем первый доступный образец
-            sample_id = list(bc_params.keys())[0]
+            # Берем первый доступный образец (get_parameter_sample)
+            sample_id = next(iter(bc_params))
             params_bc = bc_params[sample_id]
 
             params['entry_pressure'] = params_bc['entry_pressure']
@@ -394,56 +588,26 @@ class DataLoader:
             if not os.path.exists(file_path):
                 return False, f"Файл не найден по пути {file_path}"
 
-            # Попытка прочитать файл с разными кодировками и разделителями
-            encodings = ['utf-8', 'cp1251', 'latin1', 'windows-1252']
-            separators = [',', ';', '\t']
-
-            df = None
-            successful_encoding = None
-            successful_separator = None
-
-            # Читаем первые несколько строк для анализа
-            with open(file_path, 'rb') as f:
-                first_bytes = f.read(1024)
-
-            # Выводим первые байты для диагностики
-            print(f"Первые байты файла (hex): {first_bytes.hex()[:50]}...")
-
-            # Пробуем разные комбинации кодировок и разделителей
-            for encoding in encodings:
-                for sep in separators:
-                    try:
-                        print(f"Пробуем прочитать с кодировкой {encoding} и разделителем '{sep}'")
-                        df = pd.read_csv(file_path, encoding=encoding, sep=sep,
-                                         quotechar='"', escapechar='\\', engine='python')
-
-                        # Если успешно прочитали и получили более одной колонки
-                        if df is not None and len(df.columns) > 1:
-                            successful_encoding = encoding
-                            successful_separator = sep
-                            print(f"Успешно прочитан файл с кодировкой {encoding} и разделителем '{sep}'")
-                            print(f"Колонки: {list(df.columns)}")
-
-                            # Проверяем, есть ли одна колонка, которая содержит все данные (неправильный разделитель)
-                            if len(df.columns) == 1 and df.iloc[0, 0] and isinstance(df.iloc[0, 0], str) and sep in \
-                                    df.iloc[0, 0]:
-                                print(f"Кажется, разделитель неправильный, продолжаем поиск")
-                                continue
-
-                            break
-                    except Exception as e:
-                        print(f"Ошибка при чтении с кодировкой {encoding} и разделителем '{sep}': {str(e)}")
-                        continue
-
-                if df is not None and len(df.columns) > 1:
-                    break
+            # Формат определяется по началу файла, файл читается один раз
+            dialect = detect_file_dialect(file_path)
+            if dialect:
+                print(f"Определен формат файла: кодировка {dialect['encoding']}, "
+                      f"разделитель '{dialect['sep']}', десятичный знак '{dialect['decimal']}'")
+
+            try:
+                df = read_table(file_path, file_path, dialect)
+            except Exception as e:
+                print(f"Ошибка при чтении файла: {str(e)}")
+                df = None
+            format_info = (f"кодировка: {dialect['encoding']}, разделитель: '{dialect['sep']}'"
+                           if dialect else "формат Excel")
 
             if df is None:
                 return False, "Не удалось прочитать файл. Проверьте формат и кодировку файла."
 
             # Если список обязательных колонок пустой, просто проверяем, что файл читается
             if not required_columns:
-                return True, f"Файл успешно загружен (кодировка: {successful_encoding}, разделитель: '{successful_separator}')"
+                return True, f"Файл успешно загружен ({format_info})"
 
             # Проверяем наличие всех необходимых колонок
             missing_columns = [col for col in required_columns if col not in df.columns]
@@ -470,7 +634,7 @@ class DataLoader:
 
                 return False, f"В файле отсутствуют следующие обязательные колонки: {', '.join(missing_columns)}.{suggestion_msg}{available_cols}"
 
-            return True, f"Файл соответствует требованиям (кодировка: {successful_encoding}, разделитель: '{successful_separator}')"
+            return True, f"Файл соответствует требованиям ({format_info})"
 
         except Exception as e:
             import traceback
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Прореживание двумерных полей (время × координата) для визуализации.
+# Размер результата ограничен числом ячеек и не зависит от разрешения расчета;
+# точки распределяются с учетом градиента, чтобы фронт вытеснения не размывался.
+
+import numpy as np
+
+# Максимальное число значений поля в одном графике по умолчанию
+DEFAULT_MAX_CELLS = 20000
+
+# Доля точек, распределяемых равномерно (остальные - пропорционально градиенту)
+UNIFORM_SHARE = 0.5
+
+# Минимальное число моментов времени, под которое резервируется лимит при выборе
+# пространственного разрешения
+MIN_TIME_POINTS = 50
+
+
+def select_indices(importance, count, uniform_share=UNIFORM_SHARE):
+    """
+    Выбор индексов вдоль оси с уплотнением в областях большого градиента
+
+    Индексы выбираются равномерно по накопленной мере, которая складывается
+    из равномерной части и нормированного градиента. Крайние индексы сохраняются всегда.
+Совпавшие в областях большого градиента индексы добираются равномерно из оставшихся,
+так что лимит используется полностью.
+
+    Args:
+        importance (numpy.ndarray): Неотрицательная мера изменения поля для каждого индекса
+        count (int): Требуемое число индексов
+        uniform_share (float, optional): Доля равномерной части меры. Defaults to UNIFORM_SHARE.
+
+    Returns:
+        numpy.ndarray: Отсортированные уникальные индексы (min(count, len(importance)) штук)
+    """
+    n = len(importance)
+    if count >= n:
+        return np.arange(n)
+
+    total = importance.sum()
+    weights = np.full(n, uniform_share / n)
+    if total > 0:
+        weights += (1.0 - uniform_share) * importance / total
+    else:
+        weights += (1.0 - uniform_share) / n
+
+    cumulative = np.cumsum(weights)
+    cumulative /= cumulative[-1]
+
+    targets = np.linspace(0.0, 1.0, count)
+    indices = np.searchsorted(cumulative, targets, side='left')
+    indices = np.clip(indices, 0, n - 1)
+    indices[0] = 0
+    indices[-1] = n - 1
+    indices = np.unique(indices)
+
+    if len(indices) < count:
+        rest = np.setdiff1d(np.arange(n), indices)
+        picks = np.round(np.linspace(0, len(rest) - 1, count - len(indices))).astype(int)
+        indices = np.union1d(indices, rest[picks])
+    return indices
+
+
+def axis_importance(fields, axis):
+    """
+    Максимальный модуль приращения полей вдоль оси для каждого индекса
+
+    Args:
+        fields (list): Двумерные массивы одинаковой формы
+        axis (int): 0 - время, 1 - координата
+
+    Returns:
+        numpy.ndarray: Мера изменения для каждого индекса оси
+    """
+    length = fields[0].shape[axis]
+    importance = np.zeros(length)
+    other_axis = 1 - axis
+    for values in fields:
+        steps = np.abs(np.diff(values, axis=axis)).max(axis=other_axis)
+        # Приращение относим к обоим соседним индексам
+        importance[1:] = np.maximum(importance[1:], steps)
+        importance[:-1] = np.maximum(importance[:-1], steps)
+    return importance
+
+
+def decimate_fields(fields, t, x, max_cells=DEFAULT_MAX_CELLS):
+    """
+    Прореживание полей с общими осями до заданного числа ячеек
+
+    Пространственное разрешение сохраняется полностью, пока это позволяет лимит
+    с учетом не менее MIN_TIME_POINTS моментов времени (или всех, если их меньше),
+    остальная часть лимита распределяется по времени. Если одна из осей короткая,
+    лимит расходуется на другую, и число ячеек результата близко к max_cells.
+
+    Args:
+        fields (list): Двумерные массивы (len(t), len(x))
+        t (numpy.ndarray): Моменты времени
+        x (numpy.ndarray): Координаты
+        max_cells (int, optional): Максимум значений в каждом поле. Defaults to DEFAULT_MAX_CELLS.
+
+    Returns:
+        tuple: (прореженные поля, t, x, метаданные прореживания)
+    """
+    fields = [np.asarray(values) for values in fields]
+    nt, nx = fields[0].shape
+
+    if nt * nx <= max_cells:
+        time_indices = np.arange(nt)
+        cell_indices = np.arange(nx)
+    else:
+        nx_target = min(nx, max(2, max_cells // min(nt, MIN_TIME_POINTS)))
+        nt_target = min(nt, max(2, max_cells // nx_target))
+        cell_indices = select_indices(axis_importance(fields, 1), nx_target)
+        time_indices = select_indices(axis_importance(fields, 0), nt_target)
+
+    decimated = [values[np.ix_(time_indices, cell_indices)] for values in fields]
+
+    meta = {
+        'method': 'max_gradient',
+        'max_cells': int(max_cells),
+        'original_shape': [int(nt), int(nx)],
+        'shape': [int(len(time_indices)), int(len(cell_indices))],
+        'decimated': bool(len(time_indices) < nt or len(cell_indices) < nx)
+    }
+
+    return decimated, np.asarray(t)[time_indices], np.asarray(x)[cell_indices], meta
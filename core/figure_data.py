@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Данные для графиков результата моделирования.
+# Все производные ряды (профили, нефтеотдача, кривые Pc/kr/f) считаются один раз
+# векторизованно и используются обоими визуализаторами (Plotly и Matplotlib).
+# Сохраняются рядом с результатом, поэтому графики можно построить без модели.
+
+import os
+
+import numpy as np
+
+from core.decimation import DEFAULT_MAX_CELLS, decimate_fields
+
+# Дни, для которых строятся профили насыщенности
+PROFILE_DAYS = (10, 50, 100)
+
+# Число точек кривых капиллярного давления, относительной проницаемости и функции Баклея-Леверетта
+CURVE_POINTS = 150
+
+# Имя файла с данными графиков в директории результата
+FIGURE_DATA_FILENAME = 'figure_data.npz'
+
+# Графики, сохраняемые в виде изображений (метод create_<имя> MatplotlibVisualizer)
+FIGURE_NAMES = (
+    'saturation_profiles',
+    'saturation_difference',
+    'recovery_factor',
+    'breakthrough_time',
+    'saturation_evolution',
+    'capillary_pressure',
+    'relative_permeability',
+    'fractional_flow'
+)
+
+
+def get_saturation_profiles(model, time_indices):
+    """
+    Профили насыщенности для набора моментов времени
+
+    Для карбонатной модели профиль с учетом капиллярных эффектов - взвешенное
+    среднее насыщенности матрицы и трещин.
+
+    Args:
+        model (OilFiltrationModel): Модель после расчета
+        time_indices (numpy.ndarray): Индексы моментов времени
+
+    Returns:
+        tuple: (профили с учетом, профили без учета капиллярных эффектов), массивы (len(time_indices), nx + 1)
+    """
+    if hasattr(model, 'Sw_matrix') and hasattr(model, 'Sw_fracture'):
+        matrix_volume = model.matrix_porosity / model.porosity
+        fracture_volume = model.fracture_porosity / model.porosity
+        with_cap = matrix_volume * model.Sw_matrix[time_indices] + fracture_volume * model.Sw_fracture[time_indices]
+    else:
+        with_cap = model.Sw_with_cap[time_indices]
+
+    return with_cap, model.Sw_without_cap[time_indices]
+
+
+def build_figure_data(model, results=None, max_cells=DEFAULT_MAX_CELLS, days=PROFILE_DAYS):
+    """
+    Расчет всех рядов данных для графиков результата
+
+    Args:
+        model (OilFiltrationModel): Модель после расчета
+        results (dict, optional): Результаты extract_results(), чтобы не пересчитывать нефтеотдачу.
+            Defaults to None.
+        max_cells (int, optional): Лимит значений поля для графика эволюции насыщенности.
+            Defaults to DEFAULT_MAX_CELLS.
+        days (tuple, optional): Дни для профилей насыщенности. Defaults to PROFILE_DAYS.
+
+    Returns:
+        dict: Словарь {имя ряда: numpy.ndarray}
+    """
+    days = np.array([day for day in days if day <= model.days], dtype=float)
+    time_indices = (days / model.dt).astype(int)
+    profiles_with_cap, profiles_without_cap = get_saturation_profiles(model, time_indices)
+
+    if results and 'recovery_factor' in results:
+        recovery_with_cap = np.asarray(results['recovery_factor']['with_cap'])
+        recovery_without_cap = np.asarray(results['recovery_factor']['without_cap'])
+    else:
+        recovery_with_cap, recovery_without_cap = model.calculate_recovery_factor()
+
+    if results and 'breakthrough_time' in results:
+        breakthrough_with_cap = results['breakthrough_time']['with_cap']
+        breakthrough_without_cap = results['breakthrough_time']['without_cap']
+    else:
+        breakthrough_with_cap, breakthrough_without_cap = model.get_breakthrough_time()
+
+    # Поле насыщенности для контурных графиков - с ограниченным числом ячеек
+    (evolution_without_cap, evolution_with_cap), evolution_t, evolution_x, decimation = decimate_fields(
+        [model.Sw_without_cap, model.Sw_with_cap], model.t, model.x, max_cells
+    )
+
+    sw_curve = np.linspace(0.0, 1.0, CURVE_POINTS)
+
+    return {
+        'x': model.x,
+        't': model.t,
+        'dt': np.float64(model.dt),
+        'model_days': np.float64(model.days),
+        'swc': np.float64(model.initial_water_saturation),
+        'sor': np.float64(model.residual_oil_saturation),
+        'days': days,
+        'profiles_with_cap': profiles_with_cap,
+        'profiles_without_cap': profiles_without_cap,
+        'recovery_with_cap': recovery_with_cap,
+        'recovery_without_cap': recovery_without_cap,
+        'breakthrough_with_cap': np.float64(breakthrough_with_cap),
+        'breakthrough_without_cap': np.float64(breakthrough_without_cap),
+        'evolution_t': evolution_t,
+        'evolution_x': evolution_x,
+        'evolution_with_cap': evolution_with_cap,
+        'evolution_without_cap': evolution_without_cap,
+        'evolution_original_shape': np.array(decimation['original_shape']),
+        'evolution_max_cells': np.int64(decimation['max_cells']),
+        'sw_curve': sw_curve,
+        'pc_curve': model.capillary_pressure_array(sw_curve),
+        'krw_curve': model.relative_permeability_water_array(sw_curve),
+        'kro_curve': model.relative_permeability_oil_array(sw_curve),
+        'fw_curve': model.fractional_flow_array(sw_curve)
+    }
+
+
+def decimation_meta(data):
+    """Описание прореживания поля эволюции насыщенности (для layout.meta графика)"""
+    original_shape = [int(size) for size in data['evolution_original_shape']]
+    shape = [len(data['evolution_t']), len(data['evolution_x'])]
+    return {
+        'method': 'max_gradient',
+        'max_cells': int(data['evolution_max_cells']),
+        'original_shape': original_shape,
+        'shape': shape,
+        'decimated': shape != original_shape
+    }
+
+
+def save_figure_data(file_path, data):
+    """Сохранение данных графиков в .npz-файл"""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    np.savez_compressed(file_path, **data)
+
+
+def load_figure_data(file_path):
+    """
+    Загрузка данных графиков из .npz-файла
+
+    Returns:
+        dict: Словарь {имя ряда: numpy.ndarray} или None, если файла нет
+    """
+    if not os.path.exists(file_path):
+        return None
+
+    with np.load(file_path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def profile_time_index(data, day):
+    """Индекс момента времени для заданного дня (как int(day / dt) в модели)"""
+    return int(day / float(data['dt']))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Монотонная кусочно-кубическая интерполяция (PCHIP, метод Фрича-Карлсона).
+# Интерполянт сохраняет монотонность данных (без выбросов между точками таблицы)
+# и вычисляется векторно для массивов. Используется для лабораторных таблиц:
+# PVT-свойства по давлению (core.pvt), относительные проницаемости по насыщенности (core.relperm).
+# За пределами диапазона узлов используются значения на границе.
+
+import numpy as np
+
+
+def pchip_slopes(x, y):
+    """
+    Наклоны монотонного кубического эрмитова сплайна в узлах (метод Фрича-Карлсона)
+
+    Args:
+        x (numpy.ndarray): Возрастающие узлы
+        y (numpy.ndarray): Значения в узлах
+
+    Returns:
+        numpy.ndarray: Производные в узлах
+    """
+    n = len(x)
+    if n < 2:
+        return np.zeros(n)
+
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    if n == 2:
+        return np.array([delta[0], delta[0]])
+
+    d = np.zeros(n)
+
+    # Внутренние узлы: взвешенное гармоническое среднее наклонов соседних отрезков,
+    # ноль в локальных экстремумах
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    same_sign = delta[:-1] * delta[1:] > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        interior = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+    d[1:-1] = np.where(same_sign, interior, 0.0)
+
+    # Концевые узлы: трехточечная формула с ограничением монотонности
+    d[0] = _edge_slope(h[0], h[1], delta[0], delta[1])
+    d[-1] = _edge_slope(h[-1], h[-2], delta[-1], delta[-2])
+    return d
+
+
+def _edge_slope(h0, h1, delta0, delta1):
+    """Наклон в концевом узле"""
+    d = ((2 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+    if np.sign(d) != np.sign(delta0):
+        return 0.0
+    if np.sign(delta0) != np.sign(delta1) and abs(d) > 3 * abs(delta0):
+        return 3 * delta0
+    return d
+
+
+class MonotoneInterpolator:
+    """Монотонный кубический интерполянт по таблице точек"""
+
+    def __init__(self, x, y):
+        """
+        Args:
+            x (array-like): Узлы (пропуски отбрасываются, повторяющиеся узлы усредняются)
+            y (array-like): Значения в узлах
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = np.isfinite(x) & np.isfinite(y)
+        if not valid.any():
+            raise ValueError('Нет точек для интерполяции')
+
+        self.x, inverse = np.unique(x[valid], return_inverse=True)
+        self.y = np.bincount(inverse, weights=y[valid]) / np.bincount(inverse)
+        self.slopes = pchip_slopes(self.x, self.y)
+
+    def _locate(self, value):
+        """Номер отрезка, его длина и относительное положение точки"""
+        x = self.x
+        p = np.clip(np.asarray(value, dtype=float), x[0], x[-1])
+        k = np.clip(np.searchsorted(x, p, side='right') - 1, 0, len(x) - 2)
+        h = x[k + 1] - x[k]
+        return k, h, (p - x[k]) / h
+
+    def __call__(self, value):
+        """
+        Значение интерполянта
+
+        Returns:
+            float or numpy.ndarray: Значения той же формы, что и value
+        """
+        if len(self.x) == 1:
+            result = np.full(np.shape(value), self.y[0])
+        else:
+            y, d = self.y, self.slopes
+            k, h, t = self._locate(value)
+            t2 = t * t
+            t3 = t2 * t
+            result = ((2 * t3 - 3 * t2 + 1) * y[k] + (t3 - 2 * t2 + t) * h * d[k]
+                      + (-2 * t3 + 3 * t2) * y[k + 1] + (t3 - t2) * h * d[k + 1])
+        return float(result) if np.ndim(result) == 0 else result
+
+    def derivative(self, value):
+        """
+        Производная интерполянта (вне диапазона узлов - ноль)
+
+        Returns:
+            float or numpy.ndarray: Значения той же формы, что и value
+        """
+        value = np.asarray(value, dtype=float)
+        if len(self.x) == 1:
+            result = np.zeros(value.shape)
+        else:
+            y, d = self.y, self.slopes
+            k, h, t = self._locate(value)
+            t2 = t * t
+            result = ((6 * t2 - 6 * t) * (y[k] - y[k + 1]) / h + (3 * t2 - 4 * t + 1) * d[k]
+                      + (3 * t2 - 2 * t) * d[k + 1])
+            result = np.where((value < self.x[0]) | (value > self.x[-1]), 0.0, result)
+        return float(result) if result.ndim == 0 else result
@@ -10,6 +10,8 @@ from matplotlib.ticker import MultipleLocator
 import matplotlib.colors as mcolors
 from matplotlib import cm
 
+from core.figure_data import FIGURE_NAMES, build_figure_data, profile_time_index
+
 # Настраиваем стиль для графиков
 plt.style.use('default')
 plt.rcParams['axes.grid'] = True
@@ -21,24 +23,69 @@ plt.rcParams['xtick.labelsize'] = 12
 plt.rcParams['ytick.labelsize'] = 12
 
 
+def save_figure(fig, file_path, dpi=300, width=None):
+    """
+    Сохранение фигуры в файл
+
+    Args:
+        fig (matplotlib.figure.Figure): Фигура
+        file_path (str): Путь к файлу (формат - по расширению)
+        dpi (int, optional): Разрешение. Defaults to 300.
+        width (int, optional): Ширина растрового изображения в пикселях; если задана,
+            разрешение подбирается по ширине фигуры. Defaults to None.
+    """
+    if width:
+        dpi = width / fig.get_figwidth()
+    fig.savefig(file_path, dpi=dpi, bbox_inches='tight')
+
+
 class MatplotlibVisualizer:
     """Класс для визуализации результатов моделирования с использованием matplotlib"""
 
-    def __init__(self, model, output_dir=None, image_output_dir=None):
+    def __init__(self, model=None, output_dir=None, image_output_dir=None, figure_data=None):
         self.model = model
+        # Ряды данных для графиков: считаются один раз (core.figure_data) и общие с Visualizer
+        self.data = figure_data if figure_data is not None else build_figure_data(model)
         self.output_dir = output_dir or 'data/results'
         self.image_output_dir = image_output_dir or 'data/images'
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(self.image_output_dir, exist_ok=True)
 
-    def save_visualizations_as_images(self, project_id, user_id=None, formats=None):
+    def get_image_dir(self, project_id, user_id=None):
+        """Директория изображений проекта"""
+        if user_id:
+            # Если указан ID пользователя, сохраняем в папке пользователя/проекта
+            return os.path.join(self.image_output_dir, f"user_{user_id}", f"project_{project_id}")
+        # Иначе сохраняем только в папке проекта
+        return os.path.join(self.image_output_dir, f"project_{project_id}")
+
+    def create_figure(self, name):
+        """
+        Создание графика по имени
+
+        Args:
+            name (str): Имя графика из FIGURE_NAMES
+
+        Returns:
+            matplotlib.figure.Figure: Фигура с графиком
+        """
+        if name not in FIGURE_NAMES:
+            raise ValueError(f"Неизвестный график: {name}")
+        return getattr(self, f"create_{name}")()
+
+    def save_visualizations_as_images(self, project_id, user_id=None, formats=None, dpi=300, workers=0):
         """
         Сохранение визуализаций в виде изображений
 
+        При workers > 0 графики строятся параллельно в пуле процессов (core.render_pool):
+        метод возвращается, как только сохранены PNG, остальные форматы дописываются в фоне.
+
         Args:
             project_id (int): ID проекта
             user_id (int, optional): ID пользователя. Defaults to None.
             formats (list, optional): Форматы сохранения. Defaults to ['png', 'svg'].
+            dpi (int, optional): Разрешение изображений. Defaults to 300.
+            workers (int, optional): Число процессов пула (0 - построение в текущем процессе). Defaults to 0.
 
         Returns:
             dict: Словарь с путями к сохраненным изображениям
@@ -47,41 +94,30 @@ class MatplotlibVisualizer:
             formats = ['png', 'svg']
 
         # Создаем структуру директорий
-        if user_id:
-            # Если указан ID пользователя, сохраняем в папке пользователя/проекта
-            image_dir = os.path.join(self.image_output_dir, f"user_{user_id}", f"project_{project_id}")
-        else:
-            # Иначе сохраняем только в папке проекта
-            image_dir = os.path.join(self.image_output_dir, f"project_{project_id}")
-
+        image_dir = self.get_image_dir(project_id, user_id)
         os.makedirs(image_dir, exist_ok=True)
 
         print(f"Сохранение визуализаций в форматах {formats} в директорию: {image_dir}")
 
+        if workers:
+            from core.render_pool import render_images
+            image_paths = render_images(self.data, image_dir, FIGURE_NAMES, formats=formats,
+                                        wait_formats=['png'], dpi=dpi, workers=workers)
+            print(f"Сохранено изображений PNG: {len(image_paths.get('png', {}))}, остальные форматы - в фоне")
+            return image_paths
+
         # Словарь для хранения путей к файлам
         image_paths = {fmt: {} for fmt in formats}
 
-        # Строим и сохраняем все визуализации
-        visualization_functions = {
-            'saturation_profiles': self.create_saturation_profiles,
-            'saturation_difference': self.create_saturation_difference,
-            'recovery_factor': self.create_recovery_factor,
-            'breakthrough_time': self.create_breakthrough_time,
-            'saturation_evolution': self.create_saturation_evolution,
-            'capillary_pressure': self.create_capillary_pressure,
-            'relative_permeability': self.create_relative_permeability,
-            'fractional_flow': self.create_fractional_flow
-        }
-
         # Создаем и сохраняем каждую визуализацию
-        for name, func in visualization_functions.items():
+        for name in FIGURE_NAMES:
             try:
                 print(f"Создание визуализации: {name}")
-                fig = func()
+                fig = self.create_figure(name)
 
                 for fmt in formats:
                     file_path = os.path.join(image_dir, f"{name}.{fmt}")
-                    fig.savefig(file_path, dpi=300, bbox_inches='tight')
+                    save_figure(fig, file_path, dpi=dpi)
                     print(f"Сохранено изображение: {file_path}")
                     image_paths[fmt][name] = file_path
 
@@ -104,27 +140,19 @@ class MatplotlibVisualizer:
         if days is None:
             days = [10, 50, 100]
 
-        # Отфильтруем дни, которые превышают время моделирования
-        days = [day for day in days if day <= self.model.days]
-
         # Создаем фигуру с подграфиками
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 14), sharex=True)
 
         linestyles = ['-', '--', '-.']
         colors = ['blue', 'green', 'red']
 
-        for i, day in enumerate(days):
-            time_index = int(day / self.model.dt)
-
-            # Получаем данные насыщенности
-            with_cap_data, without_cap_data = self.get_saturation_profile(time_index)
-
+        for i, (with_cap_data, without_cap_data, day) in enumerate(self.get_saturation_profiles(days)):
             # Верхний график - без капиллярных эффектов
-            ax1.plot(self.model.x, without_cap_data, linestyle=linestyles[i % len(linestyles)],
+            ax1.plot(self.data['x'], without_cap_data, linestyle=linestyles[i % len(linestyles)],
                      color=colors[i % len(colors)], linewidth=3, label=f'День {day}')
 
             # Нижний график - с капиллярными эффектами
-            ax2.plot(self.model.x, with_cap_data, linestyle=linestyles[i % len(linestyles)],
+            ax2.plot(self.data['x'], with_cap_data, linestyle=linestyles[i % len(linestyles)],
                      color=colors[i % len(colors)], linewidth=3, label=f'День {day}')
 
         ax1.set_title('Профиль насыщенности без учета капиллярных эффектов', fontsize=18)
@@ -153,27 +181,22 @@ class MatplotlibVisualizer:
         if days is None:
             days = [10, 50, 100]
 
-        # Отфильтруем дни, которые превышают время моделирования
-        days = [day for day in days if day <= self.model.days]
+        # Профили только для дней в пределах времени моделирования
+        profiles = self.get_saturation_profiles(days)
 
         # Создаем фигуру
-        fig, axs = plt.subplots(len(days), 1, figsize=(12, 4 * len(days)), sharex=True)
+        fig, axs = plt.subplots(len(profiles), 1, figsize=(12, 4 * len(profiles)), sharex=True)
 
         # Если только один день, превращаем axs в список для единообразия
-        if len(days) == 1:
+        if len(profiles) == 1:
             axs = [axs]
 
-        for i, day in enumerate(days):
-            time_index = int(day / self.model.dt)
-
-            # Получаем данные насыщенности
-            with_cap_data, without_cap_data = self.get_saturation_profile(time_index)
-
+        for i, (with_cap_data, without_cap_data, day) in enumerate(profiles):
             # Вычисляем разницу
             diff = with_cap_data - without_cap_data
 
             # Строим график разницы
-            axs[i].plot(self.model.x, diff, linewidth=3, color='purple')
+            axs[i].plot(self.data['x'], diff, linewidth=3, color='purple')
             axs[i].axhline(y=0, color='k', linestyle='--', alpha=0.7)
             axs[i].set_title(f'Разница в насыщенности (с кап. - без кап.), день {day}', fontsize=16)
             axs[i].set_ylabel('Разница Sw, д.ед.', fontsize=14)
@@ -184,10 +207,10 @@ class MatplotlibVisualizer:
             negative_mask = diff < -0.005
 
             if positive_mask.any():
-                axs[i].fill_between(self.model.x, diff, 0, where=positive_mask,
+                axs[i].fill_between(self.data['x'], diff, 0, where=positive_mask,
                                     color='green', alpha=0.3, label='Зона повышенной насыщенности')
             if negative_mask.any():
-                axs[i].fill_between(self.model.x, diff, 0, where=negative_mask,
+                axs[i].fill_between(self.data['x'], diff, 0, where=negative_mask,
                                     color='red', alpha=0.3, label='Зона пониженной насыщенности')
 
             # Добавляем легенду, если есть выделенные зоны
@@ -206,22 +229,24 @@ class MatplotlibVisualizer:
             matplotlib.figure.Figure: Фигура с графиком
         """
         # Получаем данные о коэффициенте нефтеотдачи
-        recovery_with_cap, recovery_without_cap = self.model.calculate_recovery_factor()
+        recovery_with_cap = self.data['recovery_with_cap']
+        recovery_without_cap = self.data['recovery_without_cap']
+        model_days = float(self.data['model_days'])
 
         # Создаем фигуру
         fig, ax = plt.subplots(figsize=(12, 8))
 
         # Строим графики
-        ax.plot(self.model.t, recovery_without_cap, linewidth=3, color='blue',
+        ax.plot(self.data['t'], recovery_without_cap, linewidth=3, color='blue',
                 label='Без капиллярных эффектов')
-        ax.plot(self.model.t, recovery_with_cap, linewidth=3, color='red',
+        ax.plot(self.data['t'], recovery_with_cap, linewidth=3, color='red',
                 label='С капиллярными эффектами')
 
         # Добавляем аннотации с разницей в ключевых точках
         time_points = [10, 30, 50, 70, 100]
         for day in time_points:
-            if day <= self.model.days:
-                time_index = int(day / self.model.dt)
+            if day <= model_days:
+                time_index = profile_time_index(self.data, day)
                 diff = recovery_with_cap[time_index] - recovery_without_cap[time_index]
                 average_recovery = (recovery_with_cap[time_index] + recovery_without_cap[time_index]) / 2
 
@@ -250,7 +275,8 @@ class MatplotlibVisualizer:
             matplotlib.figure.Figure: Фигура с графиком
         """
         # Получаем время прорыва
-        breakthrough_with_cap, breakthrough_without_cap = self.model.get_breakthrough_time()
+        breakthrough_with_cap = float(self.data['breakthrough_with_cap'])
+        breakthrough_without_cap = float(self.data['breakthrough_without_cap'])
 
         # Создаем фигуру
         fig, ax = plt.subplots(figsize=(10, 8))
@@ -293,18 +319,18 @@ class MatplotlibVisualizer:
         # Создаем фигуру с подграфиками
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8), sharey=True)
 
-        # Создаем сетку X и T для контурного графика
-        X, T = np.meshgrid(self.model.x, self.model.t)
+        # Создаем сетку X и T для контурного графика (поле прорежено с сохранением фронта)
+        X, T = np.meshgrid(self.data['evolution_x'], self.data['evolution_t'])
 
         # Контурный график для модели без капиллярных эффектов
-        contour1 = ax1.contourf(X, T, self.model.Sw_without_cap, levels=20, cmap='viridis')
+        contour1 = ax1.contourf(X, T, self.data['evolution_without_cap'], levels=20, cmap='viridis')
         ax1.set_xlabel('Расстояние, м', fontsize=14)
         ax1.set_ylabel('Время, дни', fontsize=14)
         ax1.set_title('Эволюция насыщенности без учета капиллярных эффектов', fontsize=16)
         fig.colorbar(contour1, ax=ax1, label='Водонасыщенность, д.ед.')
 
         # Контурный график для модели с капиллярными эффектами
-        contour2 = ax2.contourf(X, T, self.model.Sw_with_cap, levels=20, cmap='viridis')
+        contour2 = ax2.contourf(X, T, self.data['evolution_with_cap'], levels=20, cmap='viridis')
         ax2.set_xlabel('Расстояние, м', fontsize=14)
         ax2.set_title('Эволюция насыщенности с учетом капиллярных эффектов', fontsize=16)
         fig.colorbar(contour2, ax=ax2, label='Водонасыщенность, д.ед.')
@@ -319,13 +345,9 @@ class MatplotlibVisualizer:
         Returns:
             matplotlib.figure.Figure: Фигура с графиком
         """
-        # Создаем массив насыщенностей
-        sw_values = np.linspace(0.0, 1.0, 100)
-        pc_values = np.zeros_like(sw_values)
-
-        # Вычисляем капиллярное давление для каждого значения насыщенности
-        for i, sw in enumerate(sw_values):
-            pc_values[i] = self.model.capillary_pressure(sw)
+        # Кривая рассчитана заранее (core.figure_data)
+        sw_values = self.data['sw_curve']
+        pc_values = self.data['pc_curve']
 
         # Создаем фигуру
         fig, ax = plt.subplots(figsize=(12, 8))
@@ -336,10 +358,6 @@ class MatplotlibVisualizer:
         # Добавляем нулевую линию
         ax.axhline(y=0, color='k', linestyle='--', alpha=0.7)
 
-        # Находим границы зон смачиваемости
-        swc = self.model.initial_water_saturation
-        sor = self.model.residual_oil_saturation
-
         # Выделяем зоны
         ax.fill_between(sw_values[sw_values <= 0.3], pc_values[sw_values <= 0.3],
                         alpha=0.3, color='red', label='Гидрофобная зона')
@@ -365,15 +383,10 @@ class MatplotlibVisualizer:
         Returns:
             matplotlib.figure.Figure: Фигура с графиком
         """
-        # Создаем массив насыщенностей
-        sw_values = np.linspace(0.0, 1.0, 100)
-        krw_values = np.zeros_like(sw_values)
-        kro_values = np.zeros_like(sw_values)
-
-        # Вычисляем относительные проницаемости
-        for i, sw in enumerate(sw_values):
-            krw_values[i] = self.model.relative_permeability_water(sw)
-            kro_values[i] = self.model.relative_permeability_oil(sw)
+        # Кривые рассчитаны заранее (core.figure_data)
+        sw_values = self.data['sw_curve']
+        krw_values = self.data['krw_curve']
+        kro_values = self.data['kro_curve']
 
         # Создаем фигуру
         fig, ax = plt.subplots(figsize=(12, 8))
@@ -383,8 +396,8 @@ class MatplotlibVisualizer:
         ax.plot(sw_values, kro_values, 'o-', linewidth=3, color='green', label='Kro (нефть)')
 
         # Находим критические точки
-        swc = self.model.initial_water_saturation
-        sor = self.model.residual_oil_saturation
+        swc = float(self.data['swc'])
+        sor = float(self.data['sor'])
 
         # Находим точку пересечения
         intersection_idx = np.argmin(np.abs(krw_values - kro_values))
@@ -415,13 +428,9 @@ class MatplotlibVisualizer:
         Returns:
             matplotlib.figure.Figure: Фигура с графиком
         """
-        # Создаем массив насыщенностей
-        sw_values = np.linspace(0.0, 1.0, 100)
-        f_values = np.zeros_like(sw_values)
-
-        # Вычисляем функцию Баклея-Леверетта
-        for i, sw in enumerate(sw_values):
-            f_values[i] = self.model.fractional_flow(sw)
+        # Кривая рассчитана заранее (core.figure_data)
+        sw_values = self.data['sw_curve']
+        f_values = self.data['fw_curve']
 
         # Создаем фигуру
         fig, ax = plt.subplots(figsize=(12, 8))
@@ -457,29 +466,19 @@ class MatplotlibVisualizer:
         plt.tight_layout()
         return fig
 
-    def get_saturation_profile(self, time_index):
+    def get_saturation_profiles(self, days):
         """
-        Получение профилей насыщенности для заданного момента времени
+        Профили насыщенности для заданных дней из данных графиков
 
         Args:
-            time_index (int): Индекс времени
+            days (list): Дни моделирования
 
         Returns:
-            tuple: (with_cap_data, without_cap_data) - профили насыщенности
+            list: Кортежи (with_cap_data, without_cap_data, day)
         """
-        # Если используется карбонатная модель
-        if hasattr(self.model, 'Sw_matrix') and hasattr(self.model, 'Sw_fracture'):
-            # Рассчитываем насыщенность с учетом капиллярных эффектов как взвешенное среднее
-            matrix_volume = self.model.matrix_porosity / self.model.porosity
-            fracture_volume = self.model.fracture_porosity / self.model.porosity
-            with_cap_data = matrix_volume * self.model.Sw_matrix[time_index, :] + \
-                            fracture_volume * self.model.Sw_fracture[time_index, :]
-
-            # Для данных без учета капиллярных эффектов используем имеющийся массив
-            without_cap_data = self.model.Sw_without_cap[time_index, :]
-        else:
-            # Для базовой модели используем имеющиеся массивы
-            with_cap_data = self.model.Sw_with_cap[time_index, :]
-            without_cap_data = self.model.Sw_without_cap[time_index, :]
-
-        return with_cap_data, without_cap_data
\ No newline at end of file
+        profiles = []
+        for i, day in enumerate(self.data['days']):
+            day = int(day)
+            if day in days:
+                profiles.append((self.data['profiles_with_cap'][i], self.data['profiles_without_cap'][i], day))
+        return profiles
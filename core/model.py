@@ -10,7 +10,7 @@ class OilFiltrationModel:
     с использованием метода апвинд и учетом капиллярных эффектов
     """
 
-    def __init__(self, params=None):
+    def __init__(self, params=None, pvt_table=None, kr_table=None):
         # Стандартные параметры пласта
         self.length = 100.0  # длина пласта, м
         self.porosity = 0.2  # пористость
@@ -33,6 +33,10 @@ class OilFiltrationModel:
         self.pore_distribution_index = 1.5  # индекс распределения пор (λ)
         self.wettability_factor = 0.6  # коэффициент смачиваемости (1 - гидрофильная, 0 - гидрофобная)
 
+        # Давление на входе и выходе пласта, МПа (для свойств флюидов из PVT-таблицы)
+        self.injection_pressure = 25.0
+        self.production_pressure = 15.0
+
         # Если переданы пользовательские параметры, обновляем значения
         if params:
             for key, value in params.items():
@@ -40,6 +44,7 @@ class OilFiltrationModel:
                     setattr(self, key, float(value))
 
         # Пересчитываем зависимые параметры
+        self.nx = int(self.nx)  # параметры приводятся к float, а число узлов должно быть целым
         self.dx = self.length / self.nx
         self.nt = int(self.days / self.dt) + 1
 
@@ -56,8 +61,65 @@ class OilFiltrationModel:
         self.Sw_with_cap[:, 0] = 0.8
         self.Sw_without_cap[:, 0] = 0.8
 
+        # Вязкости флюидов по ячейкам (None - постоянные mu_oil и mu_water)
+        self.pvt_table = None
+        self.pressure = None
+        self.mu_oil_cells = None
+        self.mu_water_cells = None
+        if pvt_table is not None:
+            self.set_pvt_table(pvt_table)
+
+        # Табличные относительные проницаемости (core.relperm.RelativePermeabilityTable);
+        # None - зависимости Кори с показателями 3 и 2
+        self.kr_table = kr_table
+
+    def pressure_profile(self):
+        """
+        Давление в узлах сетки, МПа
+
+        Уравнение давления в модели не решается: давление принимается стационарным
+        и линейно распределенным между входом и выходом пласта.
+        """
+        return self.injection_pressure + (self.production_pressure - self.injection_pressure) * self.x / self.length
+
+    def set_pvt_table(self, pvt_table, viscosities=None):
+        """
+        Вязкости флюидов в узлах сетки по PVT-таблице (core.pvt.PVTTable)
+
+        Вязкости вычисляются один раз для всей сетки. Вязкость, заданная пользователем
+        (viscosities), остается средней по пласту: таблица задает только распределение по давлению.
+        Иначе mu_oil и mu_water принимают средние по пласту значения из таблицы (для отчета и кривых).
+
+        Args:
+            pvt_table (PVTTable): Таблица PVT-свойств
+            viscosities (dict, optional): Вязкости, заданные пользователем {'mu_oil': ..., 'mu_water': ...}.
+                Defaults to None.
+        """
+        viscosities = viscosities or {}
+        self.pvt_table = pvt_table
+        self.pressure = self.pressure_profile()
+
+        for name, attr, cells_attr in (('oil_viscosity', 'mu_oil', 'mu_oil_cells'),
+                                       ('water_viscosity', 'mu_water', 'mu_water_cells')):
+            if not pvt_table.has(name):
+                continue
+            cells = pvt_table.evaluate(name, self.pressure)
+            if viscosities.get(attr) is not None:
+                cells = cells * (float(viscosities[attr]) / cells.mean())
+            setattr(self, cells_attr, cells)
+            setattr(self, attr, float(cells.mean()))
+
+    def grid_viscosities(self):
+        """Вязкости нефти и воды во всех узлах сетки (массивы)"""
+        mu_oil = self.mu_oil_cells if self.mu_oil_cells is not None else np.full(self.nx + 1, self.mu_oil)
+        mu_water = self.mu_water_cells if self.mu_water_cells is not None else np.full(self.nx + 1, self.mu_water)
+        return mu_oil, mu_water
+
     def relative_permeability_water(self, Sw):
         """Относительная проницаемость для воды"""
+        if self.kr_table is not None:
+            return self.kr_table.krw(Sw)
+
         Swc = self.initial_water_saturation
         Sor = self.residual_oil_saturation
 
@@ -71,6 +133,9 @@ class OilFiltrationModel:
 
     def relative_permeability_oil(self, Sw):
         """Относительная проницаемость для нефти"""
+        if self.kr_table is not None:
+            return self.kr_table.kro(Sw)
+
         Swc = self.initial_water_saturation
         Sor = self.residual_oil_saturation
 
@@ -82,13 +147,15 @@ class OilFiltrationModel:
             Son = (1 - Sw - Sor) / (1 - Swc - Sor)
             return Son ** 2  # квадратичная зависимость
 
-    def fractional_flow(self, Sw):
-        """Функция Баклея-Леверетта"""
+    def fractional_flow(self, Sw, mu_oil=None, mu_water=None):
+        """Функция Баклея-Леверетта (вязкости по умолчанию - mu_oil и mu_water модели)"""
         krw = self.relative_permeability_water(Sw)
         kro = self.relative_permeability_oil(Sw)
+        mu_oil = self.mu_oil if mu_oil is None else mu_oil
+        mu_water = self.mu_water if mu_water is None else mu_water
 
         # Добавляем малое число для избежания деления на ноль
-        M = (krw / self.mu_water) / (kro / self.mu_oil + 1e-10)
+        M = (krw / mu_water) / (kro / mu_oil + 1e-10)
         return M / (1 + M)
 
     def capillary_pressure(self, Sw):
@@ -127,7 +194,62 @@ class OilFiltrationModel:
 
             return pc
 
-    def diffusion_coefficient(self, Sw):
+    def relative_permeability_water_array(self, Sw):
+        """Относительная проницаемость для воды (для массива насыщенностей)"""
+        if self.kr_table is not None:
+            return self.kr_table.krw(np.asarray(Sw, dtype=float))
+
+        Swc = self.initial_water_saturation
+        Sor = self.residual_oil_saturation
+
+        Swn = np.clip((np.asarray(Sw, dtype=float) - Swc) / (1 - Swc - Sor), 0.0, 1.0)
+        return Swn ** 3
+
+    def relative_permeability_oil_array(self, Sw):
+        """Относительная проницаемость для нефти (для массива насыщенностей)"""
+        if self.kr_table is not None:
+            return self.kr_table.kro(np.asarray(Sw, dtype=float))
+
+        Swc = self.initial_water_saturation
+        Sor = self.residual_oil_saturation
+
+        Son = np.clip((1 - np.asarray(Sw, dtype=float) - Sor) / (1 - Swc - Sor), 0.0, 1.0)
+        return Son ** 2
+
+    def fractional_flow_array(self, Sw, mu_oil=None, mu_water=None):
+        """Функция Баклея-Леверетта (для массива насыщенностей; вязкости - числа или массивы по ячейкам)"""
+        krw = self.relative_permeability_water_array(Sw)
+        kro = self.relative_permeability_oil_array(Sw)
+        mu_oil = self.mu_oil if mu_oil is None else mu_oil
+        mu_water = self.mu_water if mu_water is None else mu_water
+
+        M = (krw / mu_water) / (kro / mu_oil + 1e-10)
+        return M / (1 + M)
+
+    def capillary_pressure_array(self, Sw):
+        """Капиллярное давление по модели Брукса-Кори (для массива насыщенностей)"""
+        Sw = np.asarray(Sw, dtype=float)
+        Swc = self.initial_water_saturation
+        Sor = self.residual_oil_saturation
+        epsilon = 0.01
+
+        # Те же три зоны, что и в capillary_pressure
+        low = Sw <= Swc + epsilon
+        high = ~low & (Sw >= 1 - Sor - epsilon)
+
+        alpha_low = (Sw - Swc) / epsilon
+        max_pc = self.entry_pressure * 3.0
+        pc_low = max_pc * (1.0 - alpha_low) + self.entry_pressure * alpha_low
+
+        pc_high = self.entry_pressure * 0.05 * ((1 - Sor - Sw) / epsilon)
+
+        # В граничных зонах Se не используется, ограничиваем его, чтобы избежать деления на ноль
+        Se = np.clip((Sw - Swc) / (1 - Swc - Sor), epsilon, None)
+        pc_middle = self.entry_pressure * Se ** (-1.0 / self.pore_distribution_index) * (2.0 - self.wettability_factor)
+
+        return np.where(low, pc_low, np.where(high, pc_high, pc_middle))
+
+    def diffusion_coefficient(self, Sw, mu_oil=None, mu_water=None):
         """Коэффициент капиллярной диффузии"""
         # Предотвращаем выход за граничные значения
         Sw = max(min(Sw, 0.99), 0.01)
@@ -137,7 +259,11 @@ class OilFiltrationModel:
         Sw_minus = max(Sw - delta, 0.01)
         Sw_plus = min(Sw + delta, 0.99)
 
-        df_dS = (self.fractional_flow(Sw_plus) - self.fractional_flow(Sw_minus)) / (2 * delta)
+        if self.kr_table is not None:
+            df_dS = self.fractional_flow_derivative(Sw, mu_oil, mu_water)
+        else:
+            df_dS = (self.fractional_flow(Sw_plus, mu_oil, mu_water) -
+                     self.fractional_flow(Sw_minus, mu_oil, mu_water)) / (2 * delta)
 
         # Вычисление производной капиллярного давления
         dpc_dS = (self.capillary_pressure(Sw_plus) - self.capillary_pressure(Sw_minus)) / (2 * delta)
@@ -145,7 +271,9 @@ class OilFiltrationModel:
         # Предполагаем, что проницаемость k = 1.0 Дарси
         k = 1.0
 
-        mu = max(self.mu_water * Sw + self.mu_oil * (1 - Sw), 0.1)
+        mu_oil = self.mu_oil if mu_oil is None else mu_oil
+        mu_water = self.mu_water if mu_water is None else mu_water
+        mu = max(mu_water * Sw + mu_oil * (1 - Sw), 0.1)
 
         # Теоретическая формула для коэффициента капиллярной диффузии
         D = -k / (self.porosity * mu) * df_dS * dpc_dS
@@ -159,38 +287,82 @@ class OilFiltrationModel:
         else:
             return min(D * 1.0, max_diffusion)
 
+    def fractional_flow_derivative(self, Sw, mu_oil=None, mu_water=None):
+        """
+        Производная функции Баклея-Леверетта по водонасыщенности (число или массив)
+
+        Для табличных проницаемостей - производная интерполянтов, иначе - центральная разность.
+        """
+        mu_oil = self.mu_oil if mu_oil is None else mu_oil
+        mu_water = self.mu_water if mu_water is None else mu_water
+        if self.kr_table is not None:
+            return self.kr_table.fractional_flow_derivative(Sw, mu_oil, mu_water)
+
+        delta = 1e-4
+        return (self.fractional_flow_array(np.asarray(Sw) + delta, mu_oil, mu_water) -
+                self.fractional_flow_array(np.asarray(Sw) - delta, mu_oil, mu_water)) / (2 * delta)
+
+    def diffusion_coefficient_array(self, Sw, mu_oil=None, mu_water=None):
+        """Коэффициент капиллярной диффузии (для массива насыщенностей, те же ограничения, что и в diffusion_coefficient)"""
+        Sw = np.clip(np.asarray(Sw, dtype=float), 0.01, 0.99)
+
+        delta = 1e-4
+        Sw_minus = np.maximum(Sw - delta, 0.01)
+        Sw_plus = np.minimum(Sw + delta, 0.99)
+
+        if self.kr_table is not None:
+            df_dS = self.fractional_flow_derivative(Sw, mu_oil, mu_water)
+        else:
+            df_dS = (self.fractional_flow_array(Sw_plus, mu_oil, mu_water) -
+                     self.fractional_flow_array(Sw_minus, mu_oil, mu_water)) / (2 * delta)
+        dpc_dS = (self.capillary_pressure_array(Sw_plus) - self.capillary_pressure_array(Sw_minus)) / (2 * delta)
+
+        k = 1.0
+        mu_oil = self.mu_oil if mu_oil is None else mu_oil
+        mu_water = self.mu_water if mu_water is None else mu_water
+        mu = np.maximum(mu_water * Sw + mu_oil * (1 - Sw), 0.1)
+
+        D = -k / (self.porosity * mu) * df_dS * dpc_dS
+
+        max_diffusion = 0.45 * self.dx ** 2 / self.dt
+        return np.minimum(np.abs(D), max_diffusion)
+
     def run_simulation(self):
-        """Запуск моделирования"""
+        """
+        Запуск моделирования
+
+        Схема явная: новый слой по времени зависит только от предыдущего,
+        поэтому все внутренние узлы слоя обновляются одной векторной операцией.
+        """
+        mu_oil, mu_water = self.grid_viscosities()
+
         # Моделирование с учетом капиллярных эффектов
         for n in range(self.nt - 1):
-            for i in range(1, self.nx):
-                # Апвинд схема для конвективного члена
-                f_i = self.fractional_flow(self.Sw_with_cap[n, i])
-                f_im1 = self.fractional_flow(self.Sw_with_cap[n, i - 1])
+            Sw = self.Sw_with_cap[n]
+
+            # Апвинд схема для конвективного члена
+            f = self.fractional_flow_array(Sw, mu_oil, mu_water)
 
-                # Диффузионный член (капиллярные эффекты)
-                D_i = self.diffusion_coefficient(self.Sw_with_cap[n, i])
+            # Диффузионный член (капиллярные эффекты)
+            D = self.diffusion_coefficient_array(Sw[1:-1], mu_oil[1:-1], mu_water[1:-1])
 
-                # Схема апвинд с учетом капиллярных эффектов
-                self.Sw_with_cap[n + 1, i] = self.Sw_with_cap[n, i] - \
-                                             (self.dt / self.dx) * (f_i - f_im1) + \
-                                             (self.dt / self.dx ** 2) * D_i * (
-                                                     self.Sw_with_cap[n, i + 1] - 2 * self.Sw_with_cap[n, i] +
-                                                     self.Sw_with_cap[n, i - 1])
+            # Схема апвинд с учетом капиллярных эффектов
+            self.Sw_with_cap[n + 1, 1:-1] = Sw[1:-1] - \
+                                            (self.dt / self.dx) * (f[1:-1] - f[:-2]) + \
+                                            (self.dt / self.dx ** 2) * D * (Sw[2:] - 2 * Sw[1:-1] + Sw[:-2])
 
             # Граничное условие на правом конце
             self.Sw_with_cap[n + 1, -1] = self.Sw_with_cap[n + 1, -2]
 
         # Моделирование без учета капиллярных эффектов
         for n in range(self.nt - 1):
-            for i in range(1, self.nx):
-                # Апвинд схема для конвективного члена
-                f_i = self.fractional_flow(self.Sw_without_cap[n, i])
-                f_im1 = self.fractional_flow(self.Sw_without_cap[n, i - 1])
+            Sw = self.Sw_without_cap[n]
 
-                # Схема апвинд без учета капиллярных эффектов
-                self.Sw_without_cap[n + 1, i] = self.Sw_without_cap[n, i] - \
-                                                (self.dt / self.dx) * (f_i - f_im1)
+            # Апвинд схема для конвективного члена
+            f = self.fractional_flow_array(Sw, mu_oil, mu_water)
+
+            # Схема апвинд без учета капиллярных эффектов
+            self.Sw_without_cap[n + 1, 1:-1] = Sw[1:-1] - (self.dt / self.dx) * (f[1:-1] - f[:-2])
 
             # Граничное условие на правом конце
             self.Sw_without_cap[n + 1, -1] = self.Sw_without_cap[n + 1, -2]
@@ -199,17 +371,13 @@ class OilFiltrationModel:
         """Расчет коэффициента нефтеотдачи"""
         initial_oil = 1 - self.initial_water_saturation
 
-        recovery_with_cap = np.zeros(self.nt)
-        recovery_without_cap = np.zeros(self.nt)
-
-        for n in range(self.nt):
-            # Средняя нефтенасыщенность
-            avg_oil_with_cap = 1 - np.mean(self.Sw_with_cap[n, :])
-            avg_oil_without_cap = 1 - np.mean(self.Sw_without_cap[n, :])
+        # Средняя нефтенасыщенность на каждом шаге по времени
+        avg_oil_with_cap = 1 - self.Sw_with_cap.mean(axis=1)
+        avg_oil_without_cap = 1 - self.Sw_without_cap.mean(axis=1)
 
-            # Коэффициент нефтеотдачи
-            recovery_with_cap[n] = (initial_oil - avg_oil_with_cap) / initial_oil
-            recovery_without_cap[n] = (initial_oil - avg_oil_without_cap) / initial_oil
+        # Коэффициент нефтеотдачи
+        recovery_with_cap = (initial_oil - avg_oil_with_cap) / initial_oil
+        recovery_without_cap = (initial_oil - avg_oil_without_cap) / initial_oil
 
         return recovery_with_cap, recovery_without_cap
 
@@ -217,19 +385,14 @@ class OilFiltrationModel:
         """Определение времени прорыва воды"""
         threshold = self.initial_water_saturation + 0.05
 
-        # Время прорыва с учетом капиллярных эффектов
-        breakthrough_with_cap = self.days
-        for n in range(self.nt):
-            if self.Sw_with_cap[n, -1] > threshold:
-                breakthrough_with_cap = self.t[n]
-                break
+        def first_crossing(outlet_saturation):
+            # Первый момент, когда насыщенность на выходе превысила порог (иначе - конец расчета)
+            crossed = outlet_saturation > threshold
+            return self.t[np.argmax(crossed)] if crossed.any() else self.days
 
-        # Время прорыва без учета капиллярных эффектов
-        breakthrough_without_cap = self.days
-        for n in range(self.nt):
-            if self.Sw_without_cap[n, -1] > threshold:
-                breakthrough_without_cap = self.t[n]
-                break
+        # Время прорыва с учетом и без учета капиллярных эффектов
+        breakthrough_with_cap = first_crossing(self.Sw_with_cap[:, -1])
+        breakthrough_without_cap = first_crossing(self.Sw_without_cap[:, -1])
 
         return breakthrough_with_cap, breakthrough_without_cap
 
@@ -363,7 +526,11 @@ class OilFiltrationModel:
         # Берем значение при насыщенности 0.5
         krw_at_50 = self.relative_permeability_water(0.5)
         kro_at_50 = self.relative_permeability_oil(0.5)
-        mobility_ratio = (krw_at_50 / self.mu_water) / (kro_at_50 / self.mu_oil)
+        # При нулевой подвижности нефти (табличная Kro может обращаться в ноль) отношение не определено
+        if kro_at_50 > 0:
+            mobility_ratio = float((krw_at_50 / self.mu_water) / (kro_at_50 / self.mu_oil))
+        else:
+            mobility_ratio = None
 
         # Формирование результата
         results = {
@@ -377,9 +544,13 @@ class OilFiltrationModel:
                 'entry_pressure': self.entry_pressure,
                 'pore_distribution_index': self.pore_distribution_index,
                 'wettability_factor': self.wettability_factor,
+                'injection_pressure': self.injection_pressure,
+                'production_pressure': self.production_pressure,
                 'days': self.days,
                 'nx': self.nx,
-                'dt': self.dt
+                'dt': self.dt,
+                # Образец лабораторной кривой табличных относительных проницаемостей (None - зависимости Кори)
+                'relative_permeability_sample': self.kr_table.sample_id if self.kr_table is not None else None
             },
             'recovery_factor': {
                 'time': self.t.tolist(),
@@ -431,7 +602,7 @@ class OilFiltrationModel:
             'physical_parameters': {
                 'max_capillary_pressure_difference': float(max_pc_diff),
                 'capillary_number': float(capillary_number),
-                'mobility_ratio': float(mobility_ratio)
+                'mobility_ratio': mobility_ratio
             }
         }
 
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Компактное представление числовых массивов графиков Plotly.
+# Массивы трасс хранятся в формате typed array Plotly: {"dtype": "f4", "bdata": "<base64>", "shape": "r, c"}.
+# Такой массив в 3-5 раз меньше списка чисел в JSON и декодируется в браузере без разбора текста
+# (static/js/charts.js, decodeTypedArray).
+
+import base64
+
+import numpy as np
+
+# Поля трасс, которые могут содержать числовые массивы
+ARRAY_KEYS = ('x', 'y', 'z', 'customdata')
+
+# Короткие массивы остаются списками: выигрыш в размере меньше накладных расходов
+MIN_TYPED_LENGTH = 20
+
+# Соответствие кодов dtype Plotly типам NumPy
+PLOTLY_DTYPES = {
+    'f8': np.float64, 'f4': np.float32,
+    'i4': np.int32, 'u4': np.uint32,
+    'i2': np.int16, 'u2': np.uint16,
+    'i1': np.int8, 'u1': np.uint8
+}
+
+# Наибольшее по модулю значение, представимое в float32
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def decode_typed_array(value):
+    """
+    Преобразование typed array Plotly в массив NumPy
+
+    Args:
+        value (dict): Объект {"dtype", "bdata", "shape"}
+
+    Returns:
+        numpy.ndarray: Массив с исходной формой
+    """
+    array = np.frombuffer(base64.b64decode(value['bdata']), dtype=PLOTLY_DTYPES[value['dtype']])
+    shape = value.get('shape')
+    if shape:
+        if isinstance(shape, str):
+            shape = [int(size) for size in shape.split(',')]
+        array = array.reshape(shape)
+    return array
+
+
+def encode_typed_array(values, float_dtype='f4'):
+    """
+    Преобразование числового массива в typed array Plotly
+
+    Значения с плавающей точкой сохраняются в float32, если они укладываются
+    в его диапазон, иначе в float64.
+
+    Args:
+        values (array-like): Одномерный или двумерный числовой массив
+        float_dtype (str, optional): 'f4' или 'f8'. Defaults to 'f4'.
+
+    Returns:
+        dict: Объект {"dtype", "bdata"[, "shape"]} или None, если массив не числовой
+    """
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        # Строки разной длины (неровный двумерный список)
+        return None
+
+    if array.dtype.kind in 'iub':
+        array = array.astype(np.int32 if array.dtype.kind != 'u' else np.uint32)
+        dtype = 'i4' if array.dtype.kind == 'i' else 'u4'
+    elif array.dtype.kind == 'f':
+        dtype = float_dtype
+        finite = array[np.isfinite(array)]
+        if dtype == 'f4' and finite.size and np.abs(finite).max() > FLOAT32_MAX:
+            dtype = 'f8'
+        array = array.astype(PLOTLY_DTYPES[dtype])
+    else:
+        return None
+
+    if array.ndim not in (1, 2):
+        return None
+
+    encoded = {
+        'dtype': dtype,
+        'bdata': base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')
+    }
+    if array.ndim == 2:
+        encoded['shape'] = f'{array.shape[0]}, {array.shape[1]}'
+    return encoded
+
+
+def encode_figure_arrays(figure, float_dtype='f4'):
+    """
+    Перевод числовых массивов всех трасс графика в typed array Plotly
+
+    Обрабатывает как списки чисел, так и typed array, которые уже создал plotly.py
+    (они перекодируются в float32).
+
+    Args:
+        figure (dict): График в виде словаря {"data": [...], "layout": {...}}
+        float_dtype (str, optional): 'f4' или 'f8'. Defaults to 'f4'.
+
+    Returns:
+        dict: Тот же словарь с перекодированными массивами
+    """
+    for trace in figure.get('data', []):
+        for key in ARRAY_KEYS:
+            value = trace.get(key)
+            if isinstance(value, dict) and 'bdata' in value:
+                value = decode_typed_array(value)
+            elif not isinstance(value, (list, tuple, np.ndarray)):
+                continue
+
+            if np.size(value) < MIN_TYPED_LENGTH:
+                if isinstance(value, np.ndarray):
+                    trace[key] = value.tolist()
+                continue
+
+            encoded = encode_typed_array(value, float_dtype)
+            if encoded is not None:
+                trace[key] = encoded
+
+    return figure
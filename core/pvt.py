@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Таблица PVT-свойств флюидов с интерполяцией по давлению.
+# Строится один раз из загруженного pvt_data.csv: для каждого свойства создается
+# монотонный интерполянт (core.interpolation), который сохраняет монотонность данных
+# (вязкость не "проседает" между точками) и вычисляется векторно для массива давлений (по ячейкам сетки).
+
+import numpy as np
+
+from core.interpolation import MonotoneInterpolator
+
+# Колонки pvt_data.csv для свойств таблицы
+PVT_COLUMNS = {
+    'oil_viscosity': 'Oil_Viscosity_cP',
+    'water_viscosity': 'Water_Viscosity_cP',
+    'oil_density': 'Oil_Density_kg_m3',
+    'gas_density': 'Gas_Density_kg_m3'
+}
+
+PRESSURE_COLUMN = 'Pressure_MPa'
+
+
+class PVTTable:
+    """PVT-свойства флюидов как функции давления"""
+
+    def __init__(self, pressure, properties):
+        """
+        Args:
+            pressure (array-like): Давления, МПа
+            properties (dict): Значения свойств {имя: массив значений для давлений}
+        """
+        pressure = np.asarray(pressure, dtype=float)
+
+        self._curves = {}
+        for name, values in properties.items():
+            values = np.asarray(values, dtype=float)
+            if not (np.isfinite(pressure) & np.isfinite(values)).any():
+                continue
+            self._curves[name] = MonotoneInterpolator(pressure, values)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Таблица из PVT-данных (pvt_data.csv)
+
+        Returns:
+            PVTTable: Таблица или None, если в данных нет давления
+        """
+        if PRESSURE_COLUMN not in df.columns:
+            return None
+
+        import pandas as pd
+        properties = {name: pd.to_numeric(df[column], errors='coerce').to_numpy()
+                      for name, column in PVT_COLUMNS.items() if column in df.columns}
+        return cls(pd.to_numeric(df[PRESSURE_COLUMN], errors='coerce').to_numpy(), properties)
+
+    def has(self, name):
+        """Есть ли свойство в таблице"""
+        return name in self._curves
+
+    def pressure_range(self, name='oil_viscosity'):
+        """Диапазон давлений свойства, МПа"""
+        x = self._curves[name].x
+        return float(x[0]), float(x[-1])
+
+    def evaluate(self, name, pressure):
+        """
+        Значение свойства при давлении (векторно)
+
+        Args:
+            name (str): Свойство ('oil_viscosity', 'water_viscosity', 'oil_density', 'gas_density')
+            pressure (float or numpy.ndarray): Давление, МПа
+
+        Returns:
+            float or numpy.ndarray: Значение свойства той же формы, что и pressure
+        """
+        return self._curves[name](pressure)
+
+    def oil_viscosity(self, pressure):
+        """Вязкость нефти, мПа·с"""
+        return self.evaluate('oil_viscosity', pressure)
+
+    def water_viscosity(self, pressure):
+        """Вязкость воды, мПа·с"""
+        return self.evaluate('water_viscosity', pressure)
+
+    def oil_density(self, pressure):
+        """Плотность нефти, кг/м³"""
+        return self.evaluate('oil_density', pressure)
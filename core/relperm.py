@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Табличные относительные проницаемости по лабораторным кривым (relative_perm.csv).
+# Монотонные интерполянты Krw(Sw) и Kro(Sw) строятся один раз для образца и вычисляются
+# векторно для строки насыщенностей сетки; производные интерполянтов дают точную
+# производную функции Баклея-Леверетта без численного дифференцирования.
+
+from core.interpolation import MonotoneInterpolator
+
+# Минимальное число точек кривой для табличного режима
+MIN_POINTS = 2
+
+# Малое число в знаменателе функции Баклея-Леверетта (как в OilFiltrationModel.fractional_flow)
+MOBILITY_EPSILON = 1e-10
+
+
+class RelativePermeabilityTable:
+    """Относительные проницаемости воды и нефти как функции водонасыщенности"""
+
+    def __init__(self, Sw, Krw, Kro, sample_id=None):
+        """
+        Args:
+            Sw (array-like): Водонасыщенность
+            Krw (array-like): Относительная проницаемость для воды
+            Kro (array-like): Относительная проницаемость для нефти
+            sample_id (str, optional): Образец, по которому построена таблица. Defaults to None.
+        """
+        self.sample_id = sample_id
+        self._krw = MonotoneInterpolator(Sw, Krw)
+        self._kro = MonotoneInterpolator(Sw, Kro)
+        if len(self._krw.x) < MIN_POINTS or len(self._kro.x) < MIN_POINTS:
+            raise ValueError('Недостаточно точек кривой относительной проницаемости')
+
+    @classmethod
+    def from_arrays(cls, data, sample_id=None):
+        """
+        Таблица из кортежа (Sw, Krw, Kro) (DataLoader.get_relative_permeability_data)
+
+        Returns:
+            RelativePermeabilityTable: Таблица или None, если точек недостаточно
+        """
+        if data is None:
+            return None
+        try:
+            return cls(*data, sample_id=sample_id)
+        except ValueError as e:
+            print(f"Табличные относительные проницаемости не построены: {str(e)}")
+            return None
+
+    def saturation_range(self):
+        """Диапазон водонасыщенности таблицы"""
+        return float(self._krw.x[0]), float(self._krw.x[-1])
+
+    def krw(self, Sw):
+        """Относительная проницаемость для воды (число или массив)"""
+        return self._krw(Sw)
+
+    def kro(self, Sw):
+        """Относительная проницаемость для нефти (число или массив)"""
+        return self._kro(Sw)
+
+    def fractional_flow(self, Sw, mu_oil, mu_water):
+        """Функция Баклея-Леверетта (вязкости - числа или массивы той же формы, что и Sw)"""
+        mobility_water = self._krw(Sw) / mu_water
+        mobility_oil = self._kro(Sw) / mu_oil + MOBILITY_EPSILON
+        return mobility_water / (mobility_water + mobility_oil)
+
+    def fractional_flow_derivative(self, Sw, mu_oil, mu_water):
+        """
+        Производная функции Баклея-Леверетта по водонасыщенности
+
+        df/dSw = (λw' λo - λw λo') / (λw + λo)², λ = kr / μ
+        """
+        mobility_water = self._krw(Sw) / mu_water
+        mobility_oil = self._kro(Sw) / mu_oil + MOBILITY_EPSILON
+        d_water = self._krw.derivative(Sw) / mu_water
+        d_oil = self._kro.derivative(Sw) / mu_oil
+        total = mobility_water + mobility_oil
+        return (d_water * mobility_oil - mobility_water * d_oil) / (total * total)
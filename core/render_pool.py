@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Пул процессов для построения изображений Matplotlib.
+# Воркеры запускаются один раз на процесс приложения и остаются "теплыми":
+# Matplotlib импортирован, бэкенд Agg выбран, стили (rcParams) настроены.
+# Каждая фигура строится один раз и сохраняется во всех форматах; вызывающий код
+# получает управление, как только готовы PNG, а SVG дописываются в фоне.
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+# Разрешение сохраняемых изображений по умолчанию
+DEFAULT_DPI = 300
+
+# Воркеров пула по умолчанию (пул создается в каждом процессе приложения)
+DEFAULT_WORKERS = 2
+
+# Модули, которые загружаются в процесс-шаблон до запуска воркеров
+PRELOAD_MODULES = ['core.render_pool', 'core.matplotlib_visualizer']
+
+# Пул создается лениво в каждом процессе (после форка воркеров сервера)
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+# Очередь уведомлений о сохраненных файлах (общая для всех воркеров пула)
+_events = None
+# Очереди ожидающих заданий этого процесса: {job_id: queue.Queue}
+_waiters = {}
+_waiters_lock = threading.Lock()
+
+# Очередь уведомлений внутри воркера пула
+_worker_events = None
+
+
+def _init_worker(events):
+    """Инициализация воркера пула: бэкенд Agg и стили графиков"""
+    global _worker_events
+    _worker_events = events
+
+    import matplotlib
+    matplotlib.use('Agg')
+    # Импорт модуля применяет стили графиков (plt.rcParams)
+    import core.matplotlib_visualizer  # noqa: F401
+
+
+def _render_figure(job_id, name, figure_data, image_dir, formats, dpi, width=None):
+    """
+    Построение одной фигуры и сохранение во всех форматах (выполняется в воркере пула)
+
+    После сохранения каждого файла в очередь уведомлений отправляется
+    (job_id, name, fmt, путь или None, текст ошибки или None).
+
+    Returns:
+        dict: Словарь {формат: путь к файлу}
+    """
+    import matplotlib.pyplot as plt
+    from core.matplotlib_visualizer import MatplotlibVisualizer, save_figure
+
+    paths = {}
+    fig = None
+    pending = list(formats)
+    try:
+        visualizer = MatplotlibVisualizer(figure_data=figure_data, output_dir=image_dir, image_output_dir=image_dir)
+        fig = visualizer.create_figure(name)
+
+        # Одна и та же фигура сохраняется во всех форматах (PNG - первым)
+        while pending:
+            fmt = pending[0]
+            file_path = os.path.join(image_dir, f"{name}.{fmt}")
+            save_figure(fig, file_path, dpi=dpi, width=width if fmt == 'png' else None)
+            pending.pop(0)
+            paths[fmt] = file_path
+            _worker_events.put((job_id, name, fmt, file_path, None))
+    except Exception as e:
+        traceback.print_exc()
+        for fmt in pending:
+            _worker_events.put((job_id, name, fmt, None, str(e)))
+    finally:
+        if fig is not None:
+            plt.close(fig)
+
+    return paths
+
+
+def _dispatch_events(events):
+    """Фоновый поток: раздача уведомлений из пула ожидающим заданиям"""
+    while True:
+        try:
+            event = events.get()
+        except (EOFError, OSError):
+            return
+        # Пул остановлен или пересоздан: очередь больше не используется
+        if event is None:
+            events.close()
+            return
+
+        with _waiters_lock:
+            waiter = _waiters.get(event[0])
+        if waiter is not None:
+            waiter.put(event)
+
+
+def _get_context():
+    """Контекст multiprocessing: forkserver безопасен для многопоточного сервера"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(PRELOAD_MODULES)
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def get_pool(workers=None):
+    """
+    Пул процессов построения изображений текущего процесса
+
+    Args:
+        workers (int, optional): Число воркеров. Defaults to None (DEFAULT_WORKERS).
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: Пул процессов
+    """
+    global _pool, _pool_pid, _events
+
+    with _pool_lock:
+        # После форка пул родителя недоступен, после аварии воркера пул непригоден - создаем новый
+        if _pool is None or _pool_pid != os.getpid() or getattr(_pool, '_broken', False):
+            if _pool is not None and _pool_pid == os.getpid():
+                _close_pool(wait=False)
+            context = _get_context()
+            _events = context.Queue()
+            _waiters.clear()
+            _pool = ProcessPoolExecutor(
+                max_workers=workers or DEFAULT_WORKERS,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(_events,)
+            )
+            _pool_pid = os.getpid()
+
+            dispatcher = threading.Thread(target=_dispatch_events, args=(_events,),
+                                          name='render-events', daemon=True)
+            dispatcher.start()
+            print(f"Запущен пул построения изображений: {_pool._max_workers} процессов")
+
+        return _pool
+
+
+def _close_pool(wait):
+    """Остановка пула текущего процесса и завершение потока раздачи уведомлений (под _pool_lock)"""
+    global _pool, _pool_pid, _events
+
+    _pool.shutdown(wait=wait)
+    # Поток раздачи ждет уведомлений в очереди пула: пустое уведомление завершает его (и закрывает очередь)
+    try:
+        _events.put(None)
+    except (OSError, ValueError):
+        pass
+    _pool = None
+    _pool_pid = None
+    _events = None
+
+
+def shutdown_pool(wait=True):
+    """Остановка пула процессов (фоновые задания дописываются при wait=True)"""
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _close_pool(wait)
+        _pool = None
+        _pool_pid = None
+
+
+def render_images(figure_data, image_dir, names, formats=None, wait_formats=None,
+                  dpi=DEFAULT_DPI, width=None, workers=None, timeout=None):
+    """
+    Параллельное построение изображений в пуле процессов
+
+    Функция возвращает управление, как только сохранены файлы форматов wait_formats;
+    остальные форматы дописываются воркерами в фоне.
+
+    Args:
+        figure_data (dict): Данные графиков (core.figure_data.build_figure_data)
+        image_dir (str): Директория для изображений
+        names (list): Имена графиков (MatplotlibVisualizer.FIGURE_NAMES)
+        formats (list, optional): Форматы сохранения. Defaults to ['png', 'svg'].
+        wait_formats (list, optional): Форматы, которых нужно дождаться. Defaults to ['png'].
+        dpi (int, optional): Разрешение. Defaults to DEFAULT_DPI.
+        width (int, optional): Ширина PNG в пикселях вместо dpi (уменьшенные копии). Defaults to None.
+        workers (int, optional): Число воркеров пула. Defaults to None (DEFAULT_WORKERS).
+        timeout (float, optional): Максимальное время ожидания, секунд. Defaults to None.
+
+    Returns:
+        dict: Словарь {формат: {имя графика: путь}}; для фоновых форматов - пути,
+            по которым файлы появятся после завершения построения
+    """
+    if formats is None:
+        formats = ['png', 'svg']
+    if wait_formats is None:
+        wait_formats = ['png']
+
+    # PNG сохраняется первым, чтобы страница получила его как можно раньше
+    formats = sorted(formats, key=lambda fmt: fmt not in wait_formats)
+    wait_formats = [fmt for fmt in formats if fmt in wait_formats]
+
+    os.makedirs(image_dir, exist_ok=True)
+    pool = get_pool(workers)
+
+    job_id = uuid.uuid4().hex
+    waiter = queue.Queue()
+    with _waiters_lock:
+        _waiters[job_id] = waiter
+
+    image_paths = {fmt: {} for fmt in formats}
+    try:
+        futures = [
+            pool.submit(_render_figure, job_id, name, figure_data, image_dir, formats, dpi, width)
+            for name in names
+        ]
+
+        expected = {(name, fmt) for name in names for fmt in wait_formats}
+        done_checked = False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while expected:
+            try:
+                _, name, fmt, file_path, error = waiter.get(timeout=0.5)
+            except queue.Empty:
+                # Воркер мог завершиться аварийно, не отправив уведомление
+                if all(future.done() for future in futures):
+                    if done_checked:
+                        for future in futures:
+                            if future.exception() is not None:
+                                print(f"ОШИБКА в пуле построения изображений: {future.exception()}")
+                        break
+                    # Даем время дойти последним уведомлениям
+                    done_checked = True
+                if deadline is not None and time.monotonic() > deadline:
+                    print(f"Превышено время ожидания изображений: {sorted(expected)}")
+                    break
+                continue
+
+            expected.discard((name, fmt))
+            if file_path:
+                image_paths[fmt][name] = file_path
+            else:
+                print(f"ОШИБКА при создании/сохранении визуализации {name} ({fmt}): {error}")
+    finally:
+        with _waiters_lock:
+            _waiters.pop(job_id, None)
+
+    # Фоновые форматы: пути известны заранее, файлы дописываются воркерами
+    # (только для графиков, которые удалось построить)
+    built = set(image_paths[wait_formats[0]]) if wait_formats else set(names)
+    for fmt in formats:
+        if fmt not in wait_formats:
+            image_paths[fmt] = {name: os.path.join(image_dir, f"{name}.{fmt}") for name in names if name in built}
+
+    return image_paths
+
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Индекс таблицы лабораторных данных по ключу (образец, тип породы).
+# Строки один раз упорядочиваются по ключу (и, при необходимости, по насыщенности),
+# после чего данные ключа - непрерывный срез массивов NumPy: выборка без фильтрации таблицы.
+
+import numpy as np
+import pandas as pd
+
+
+class SampleIndex:
+    """Индекс строк таблицы: ключ -> непрерывный срез отсортированных колонок"""
+
+    def __init__(self, df, key, columns, sort_by=None):
+        """
+        Args:
+            df (pandas.DataFrame): Таблица данных
+            key (str): Колонка ключа (например, 'ID_Sample')
+            columns (list): Колонки, доступные через индекс
+            sort_by (str, optional): Колонка сортировки внутри ключа. Defaults to None (порядок файла).
+        """
+        # Строки без ключа не индексируются
+        codes, keys = pd.factorize(df[key])
+        rows = np.flatnonzero(codes >= 0)
+        codes = codes[rows]
+
+        if sort_by is not None:
+            order = np.lexsort((df[sort_by].to_numpy()[rows], codes))
+        else:
+            order = np.argsort(codes, kind='stable')
+        rows = rows[order]
+
+        counts = np.bincount(codes, minlength=len(keys))
+        ends = np.cumsum(counts)
+        self.keys = keys.tolist()
+        self._slices = {k: slice(int(end - count), int(end)) for k, end, count in zip(self.keys, ends, counts)}
+        self._starts = ends - counts
+        self._columns = {}
+        for column in columns:
+            values = df[column].to_numpy()[rows]
+            # Срезы отдаются без копирования, поэтому массивы индекса только для чтения
+            values.setflags(write=False)
+            self._columns[column] = values
+        self._positions = {k: i for i, k in enumerate(self.keys)}
+        # Суммы колонок по ключам: {колонка: (суммы, число значений)}
+        self._sums_cache = {}
+
+    def __contains__(self, key):
+        return key in self._slices
+
+    def __len__(self):
+        return len(self._slices)
+
+    def get(self, key, column):
+        """
+        Значения колонки для ключа (срез без копирования)
+
+        Returns:
+            numpy.ndarray: Значения или None, если ключа нет в индексе
+        """
+        index = self._slices.get(key)
+        if index is None:
+            return None
+        return self._columns[column][index]
+
+    def _sums(self, column):
+        """Суммы и число непропущенных значений колонки по ключам (вычисляются один раз)"""
+        if column not in self._sums_cache:
+            values = pd.to_numeric(self._columns[column], errors='coerce').astype(float)
+            valid = ~np.isnan(values)
+            if len(values):
+                sums = np.add.reduceat(np.where(valid, values, 0.0), self._starts)
+                counts = np.add.reduceat(valid.astype(int), self._starts)
+            else:
+                sums = counts = np.zeros(0)
+            self._sums_cache[column] = (sums, counts)
+        return self._sums_cache[column]
+
+    def mean(self, column, key=None):
+        """
+        Среднее значение колонки для ключа (пропуски не учитываются)
+
+        Args:
+            column (str): Колонка
+            key (optional): Ключ. Defaults to None (среднее по всем строкам индекса).
+
+        Returns:
+            float: Среднее или None, если ключа нет в индексе
+        """
+        sums, counts = self._sums(column)
+        if key is None:
+            total = counts.sum()
+            return float(sums.sum() / total) if total else float('nan')
+
+        position = self._positions.get(key)
+        if position is None:
+            return None
+        return float(sums[position] / counts[position]) if counts[position] else float('nan')
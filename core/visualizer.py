@@ -4,18 +4,28 @@
 import os
 import traceback
 
-import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import json
 
+from core.decimation import DEFAULT_MAX_CELLS
+from core.figure_data import build_figure_data, decimation_meta
+from core.plotly_arrays import encode_figure_arrays
+
 
 class Visualizer:
     """Класс для визуализации результатов моделирования"""
 
-    def __init__(self, model, output_dir=None, image_output_dir=None):
+    def __init__(self, model=None, output_dir=None, image_output_dir=None, max_cells=None, array_dtype='f4',
+                 figure_data=None):
         self.model = model
+        # Ограничение числа значений в контурных графиках (не зависит от разрешения расчета)
+        self.max_cells = max_cells or DEFAULT_MAX_CELLS
+        # Ряды данных для графиков: считаются один раз (core.figure_data) и общие с MatplotlibVisualizer
+        self.data = figure_data if figure_data is not None else build_figure_data(model, max_cells=self.max_cells)
+        # Тип чисел с плавающей точкой в бинарных массивах трасс ('f4' или 'f8')
+        self.array_dtype = array_dtype
         self.output_dir = output_dir or 'data/results'
         # Новый параметр для директории сохранения изображений
         self.image_output_dir = image_output_dir or 'data/images'
@@ -36,19 +46,11 @@ class Visualizer:
 
         # Добавляем линии для каждого дня
         colors = ['blue', 'green', 'red']
-        for i, day in enumerate(days):
-            if day > self.model.days:
-                continue
-
-            time_index = int(day / self.model.dt)
-
-            # Получаем данные из модели через метод get_saturation_profile
-            with_cap_data, without_cap_data = self.get_saturation_profile(time_index)
-
+        for i, (with_cap_data, without_cap_data, day) in enumerate(self.get_saturation_profiles(days)):
             # График насыщенности без учета капиллярных эффектов
             fig.add_trace(
                 go.Scatter(
-                    x=self.model.x,
+                    x=self.data['x'],
                     y=without_cap_data,  # Используем полученные данные
                     mode='lines',
                     name=f'День {day} (без кап. эффектов)',
@@ -60,7 +62,7 @@ class Visualizer:
             # График насыщенности с учетом капиллярных эффектов
             fig.add_trace(
                 go.Scatter(
-                    x=self.model.x,
+                    x=self.data['x'],
                     y=with_cap_data,  # Используем полученные данные
                     mode='lines',
                     name=f'День {day} (с кап. эффектами)',
@@ -82,24 +84,19 @@ class Visualizer:
 
         return fig
 
-    def get_saturation_profile(self, time_index):
-        """Получение профилей насыщенности для заданного момента времени"""
-        # Если используется карбонатная модель
-        if hasattr(self.model, 'Sw_matrix') and hasattr(self.model, 'Sw_fracture'):
-            # Рассчитываем насыщенность с учетом капиллярных эффектов
-            matrix_volume = self.model.matrix_porosity / self.model.porosity
-            fracture_volume = self.model.fracture_porosity / self.model.porosity
-            with_cap_data = matrix_volume * self.model.Sw_matrix[time_index,
-                                            :] + fracture_volume * self.model.Sw_fracture[time_index, :]
-
-            # Для данных без учета капиллярных эффектов используем имеющийся массив
-            without_cap_data = self.model.Sw_without_cap[time_index, :]
-        else:
-            # Для обычной модели используем имеющиеся массивы
-            with_cap_data = self.model.Sw_with_cap[time_index, :]
-            without_cap_data = self.model.Sw_without_cap[time_index, :]
+    def get_saturation_profiles(self, days):
+        """
+        Профили насыщенности для заданных дней из данных графиков
 
-        return with_cap_data, without_cap_data
+        Returns:
+            list: Кортежи (с учетом, без учета капиллярных эффектов, день)
+        """
+        profiles = []
+        for i, day in enumerate(self.data['days']):
+            day = int(day)
+            if day in days:
+                profiles.append((self.data['profiles_with_cap'][i], self.data['profiles_without_cap'][i], day))
+        return profiles
 
     def create_saturation_difference_figure(self, days=[10, 50, 100]):
         """Создание графика разницы насыщенностей"""
@@ -108,22 +105,14 @@ class Visualizer:
 
         # Добавляем линии для каждого дня
         colors = ['blue', 'green', 'red']
-        for i, day in enumerate(days):
-            if day > self.model.days:
-                continue
-
-            time_index = int(day / self.model.dt)
-
-            # Получаем данные из модели через метод get_saturation_profile
-            with_cap_data, without_cap_data = self.get_saturation_profile(time_index)
-
+        for i, (with_cap_data, without_cap_data, day) in enumerate(self.get_saturation_profiles(days)):
             # Вычисляем разницу насыщенностей
             diff = with_cap_data - without_cap_data
 
             # Добавляем график разницы
             fig.add_trace(
                 go.Scatter(
-                    x=self.model.x,
+                    x=self.data['x'],
                     y=diff,
                     mode='lines',
                     name=f'День {day}',
@@ -150,7 +139,8 @@ class Visualizer:
     def create_recovery_factor_figure(self):
         """Создание графика коэффициента нефтеотдачи"""
         # Получаем данные о коэффициенте нефтеотдачи
-        recovery_with_cap, recovery_without_cap = self.model.calculate_recovery_factor()
+        recovery_with_cap = self.data['recovery_with_cap']
+        recovery_without_cap = self.data['recovery_without_cap']
 
         # Создаем фигуру
         fig = go.Figure()
@@ -158,7 +148,7 @@ class Visualizer:
         # Добавляем графики
         fig.add_trace(
             go.Scatter(
-                x=self.model.t,
+                x=self.data['t'],
                 y=recovery_without_cap,
                 mode='lines',
                 name='Без капиллярных эффектов',
@@ -168,7 +158,7 @@ class Visualizer:
 
         fig.add_trace(
             go.Scatter(
-                x=self.model.t,
+                x=self.data['t'],
                 y=recovery_with_cap,
                 mode='lines',
                 name='С капиллярными эффектами',
@@ -191,7 +181,8 @@ class Visualizer:
     def create_breakthrough_time_figure(self):
         """Создание графика времени прорыва воды"""
         # Получаем время прорыва
-        breakthrough_with_cap, breakthrough_without_cap = self.model.get_breakthrough_time()
+        breakthrough_with_cap = float(self.data['breakthrough_with_cap'])
+        breakthrough_without_cap = float(self.data['breakthrough_without_cap'])
 
         # Создаем фигуру с гистограммой
         fig = go.Figure()
@@ -222,8 +213,12 @@ class Visualizer:
 
     def create_saturation_evolution_figure(self):
         """Создание контурного графика эволюции насыщенности"""
-        # Создаем сетку времени и пространства
-        X, T = np.meshgrid(self.model.x, self.model.t)
+        # Поля прорежены до ограниченного числа ячеек с сохранением фронта (core.figure_data)
+        sw_without_cap = self.data['evolution_without_cap']
+        sw_with_cap = self.data['evolution_with_cap']
+        t = self.data['evolution_t']
+        x = self.data['evolution_x']
+        decimation = decimation_meta(self.data)
 
         # Создаем фигуру с подграфиками
         fig = make_subplots(
@@ -237,9 +232,9 @@ class Visualizer:
         # Добавляем контурные графики
         fig.add_trace(
             go.Contour(
-                z=self.model.Sw_without_cap,
-                x=self.model.x,
-                y=self.model.t,
+                z=sw_without_cap,
+                x=x,
+                y=t,
                 colorscale='Viridis',
                 colorbar=dict(title='Водонасыщенность, д.ед.', x=-0.07),
                 contours=dict(
@@ -253,9 +248,9 @@ class Visualizer:
 
         fig.add_trace(
             go.Contour(
-                z=self.model.Sw_with_cap,
-                x=self.model.x,
-                y=self.model.t,
+                z=sw_with_cap,
+                x=x,
+                y=t,
                 colorscale='Viridis',
                 colorbar=dict(title='Водонасыщенность, д.ед.', x=1.07),
                 contours=dict(
@@ -275,20 +270,17 @@ class Visualizer:
         fig.update_layout(
             title_text='Эволюция насыщенности во времени и пространстве',
             height=600,
-            hovermode='closest'
+            hovermode='closest',
+            meta={'decimation': decimation}
         )
 
         return fig
 
     def create_capillary_pressure_curve(self):
         """Создание графика кривой капиллярного давления"""
-        # Создаем массив насыщенностей (больше точек для плавной кривой)
-        sw_values = np.linspace(0.0, 1.0, 150)
-        pc_values = np.zeros_like(sw_values)
-
-        # Вычисляем капиллярное давление для каждой насыщенности
-        for i, sw in enumerate(sw_values):
-            pc_values[i] = self.model.capillary_pressure(sw)
+        # Кривая рассчитана заранее (core.figure_data)
+        sw_values = self.data['sw_curve']
+        pc_values = self.data['pc_curve']
 
         # Создаем фигуру
         fig = go.Figure()
@@ -333,15 +325,10 @@ class Visualizer:
 
     def create_relative_permeability_curves(self):
         """Создание графика кривых относительной проницаемости"""
-        # Создаем массив насыщенностей (100 РАВНОМЕРНЫХ точек)
-        sw_values = np.linspace(0.0, 1.0, 100)
-        krw_values = np.zeros_like(sw_values)
-        kro_values = np.zeros_like(sw_values)
-
-        # Вычисляем относительные проницаемости для каждой насыщенности
-        for i, sw in enumerate(sw_values):
-            krw_values[i] = self.model.relative_permeability_water(sw)
-            kro_values[i] = self.model.relative_permeability_oil(sw)
+        # Кривые рассчитаны заранее (core.figure_data)
+        sw_values = self.data['sw_curve']
+        krw_values = self.data['krw_curve']
+        kro_values = self.data['kro_curve']
 
         # Создаем фигуру
         fig = go.Figure()
@@ -390,13 +377,9 @@ class Visualizer:
 
     def create_fractional_flow_curve(self):
         """Создание графика функции Баклея-Леверетта"""
-        # Создаем массив насыщенностей
-        sw_values = np.linspace(0.0, 1.0, 100)
-        f_values = np.zeros_like(sw_values)
-
-        # Вычисляем функцию Баклея-Леверетта для каждой насыщенности
-        for i, sw in enumerate(sw_values):
-            f_values[i] = self.model.fractional_flow(sw)
+        # Кривая рассчитана заранее (core.figure_data)
+        sw_values = self.data['sw_curve']
+        f_values = self.data['fw_curve']
 
         # Создаем фигуру
         fig = go.Figure()
@@ -426,7 +409,7 @@ class Visualizer:
     def create_visualizations(self):
         """Создание всех визуализаций и возврат словаря с JSON-представлениями графиков"""
         days = [10, 50, 100]
-        days = [day for day in days if day <= self.model.days]
+        days = [day for day in days if day <= float(self.data['model_days'])]
 
         print("Создание визуализаций...")
 
@@ -464,31 +447,11 @@ class Visualizer:
             fig = self.create_fractional_flow_curve()
             visualizations['fractional_flow'] = fig.to_json()
 
-            # Добавление оригинальных данных для каждой визуализации
+            # Числовые массивы трасс передаются в бинарном виде (typed array Plotly)
             for key, json_data in visualizations.items():
                 try:
-                    # Преобразуем JSON в словарь
-                    data = json.loads(json_data)
-
-                    # Если data содержит бинарные данные, добавляем оригинальные данные
-                    if 'data' in data:
-                        for trace in data['data']:
-                            if 'x' in trace and isinstance(trace['x'], dict) and 'bdata' in trace['x']:
-                                # Сохраняем оригинальные данные x
-                                if isinstance(trace['x'].get('original'), list):
-                                    pass  # Уже есть оригинальные данные
-                                elif 'original' not in trace['x'] and 'data' in trace['x']:
-                                    trace['x']['original'] = trace['x']['data']
-
-                            if 'y' in trace and isinstance(trace['y'], dict) and 'bdata' in trace['y']:
-                                # Сохраняем оригинальные данные y
-                                if isinstance(trace['y'].get('original'), list):
-                                    pass  # Уже есть оригинальные данные
-                                elif 'original' not in trace['y'] and 'data' in trace['y']:
-                                    trace['y']['original'] = trace['y']['data']
-
-                    # Сохраняем обновленный JSON
-                    visualizations[key] = json.dumps(data)
+                    data = encode_figure_arrays(json.loads(json_data), self.array_dtype)
+                    visualizations[key] = json.dumps(data, separators=(',', ':'))
                 except Exception as e:
                     print(f"Ошибка при обработке JSON для {key}: {e}")
 
@@ -499,17 +462,16 @@ class Visualizer:
         print(f"Создано {len(visualizations)} визуализаций")
         return visualizations
 
-    def save_visualizations(self, project_id):
-        """Сохранение всех визуализаций в формате JSON"""
-        project_dir = os.path.join(self.output_dir, str(project_id))
-        os.makedirs(project_dir, exist_ok=True)
-
-        visualizations = {}
+    def create_figures(self):
+        """
+        Построение всех графиков Plotly в виде словарей для записи в JSON
 
-        # ВАЖНОЕ ИЗМЕНЕНИЕ: используем простую сериализацию данных
-        print(f"Создание визуализаций для проекта {project_id}...")
+        Числовые массивы трасс переводятся в бинарный вид (typed array Plotly):
+        файл в несколько раз меньше, браузер декодирует массивы без разбора текста.
 
-        # Создаем визуализации
+        Returns:
+            dict: Словарь {имя визуализации: график}
+        """
         figs = {
             'saturation_profiles': self.create_saturation_profiles_figure([10, 50, 100]),
             'saturation_difference': self.create_saturation_difference_figure([10, 50, 100]),
@@ -521,36 +483,35 @@ class Visualizer:
             'relative_permeability': self.create_relative_permeability_curves()
         }
 
+        figures = {}
         for name, fig in figs.items():
-            file_path = os.path.join(project_dir, f'{name}.json')
-
             try:
-                # Используем стандартную сериализацию без сложных структур
-                json_data = fig.to_json()
+                figures[name] = encode_figure_arrays(json.loads(fig.to_json()), self.array_dtype)
+            except Exception as e:
+                print(f"ОШИБКА при подготовке визуализации {name}: {str(e)}")
+
+        return figures
 
-                # Проверяем валидность JSON перед сохранением
-                data = json.loads(json_data)
+    def save_visualizations(self, project_id, directory=None):
+        """
+        Сохранение всех визуализаций в формате JSON с манифестом (utils.visualization_store)
 
-                # Удаляем любые бинарные данные, если они есть
-                if 'data' in data:
-                    for trace in data['data']:
-                        for key in ['x', 'y', 'z']:
-                            if key in trace and isinstance(trace[key], dict) and 'bdata' in trace[key]:
-                                # Заменяем бинарные данные обычными массивами
-                                if 'data' in trace[key] and isinstance(trace[key]['data'], list):
-                                    trace[key] = trace[key]['data']
+        Args:
+            project_id (int): ID проекта
+            directory (str, optional): Директория визуализаций. Defaults to None (<output_dir>/<project_id>).
 
-                # Сохраняем чистый JSON
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f)
+        Returns:
+            dict: Манифест визуализаций
+        """
+        from utils.visualization_store import write_visualizations
 
-                visualizations[name] = json_data
-                print(f"Успешно сохранена визуализация: {name}")
+        project_dir = directory or os.path.join(self.output_dir, str(project_id))
 
-            except Exception as e:
-                print(f"ОШИБКА при сохранении визуализации {name}: {str(e)}")
+        print(f"Создание визуализаций для проекта {project_id}...")
+        manifest = write_visualizations(project_dir, self.create_figures())
+        print(f"Сохранено визуализаций: {len(manifest['visualizations'])}")
 
-        return visualizations
+        return manifest
 
     def convert_to_plotly_format(fig, title=None):
         """Конвертирует график Matplotlib в формат Plotly JSON"""
@@ -835,7 +796,7 @@ class Visualizer:
         # Сохраняем JSON визуализации
         try:
             json_results = self.save_visualizations(project_id)
-            results['json'] = {name: True for name in json_results}
+            results['json'] = {name: True for name in json_results['visualizations']}
         except Exception as e:
             print(f"ОШИБКА при сохранении JSON-визуализаций: {str(e)}")
             traceback.print_exc()
@@ -3,7 +3,11 @@
 
 from datetime import datetime
 import json
+import os
+from flask import current_app
 from extensions import db
+from utils.result_storage import (ARRAYS_FILENAME, get_result_dir, join_results, load_arrays,
+                                  save_arrays, split_results)
 
 
 class Project(db.Model):
@@ -35,8 +39,8 @@ class Project(db.Model):
     def get_results_data(self):
         """Возвращает данные последнего результата моделирования"""
         results = self.results.order_by(ProjectResult.created_at.desc()).first()
-        if results and results.result_data:
-            return json.loads(results.result_data)
+        if results and (results.metrics_data or results.result_data):
+            return results.get_results()
         return None
 
     def __repr__(self):
@@ -51,11 +55,15 @@ class ProjectData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, unique=True)
     model_parameters = db.Column(db.Text)  # JSON-строка с параметрами модели
+    # Пути к файлам: store/<..>/<хэш содержимого><расширение> относительно UPLOAD_FOLDER
+    # (в старых проектах - имя файла в UPLOAD_FOLDER/<ID проекта>)
     rock_properties_file = db.Column(db.String(255))  # путь к файлу свойств породы
     capillary_pressure_file = db.Column(db.String(255))  # путь к файлу капиллярного давления
     relative_perm_file = db.Column(db.String(255))  # путь к файлу относительной проницаемости
     pvt_data_file = db.Column(db.String(255))  # путь к файлу PVT-данных
     production_data_file = db.Column(db.String(255))  # путь к файлу данных добычи
+    file_dialects = db.Column(db.Text)  # JSON-строка: формат CSV-файлов {поле: {encoding, sep, decimal}}
+    file_names = db.Column(db.Text)  # JSON-строка: исходные имена загруженных файлов {поле: имя}
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -74,6 +82,44 @@ class ProjectData(db.Model):
             files['production_data'] = self.production_data_file
         return files
 
+    def get_file_paths(self, upload_folder):
+        """Возвращает полные пути к загруженным файлам {поле: путь}"""
+        paths = {}
+        for field, stored_path in self.get_uploaded_files().items():
+            if os.path.dirname(stored_path):
+                paths[field] = os.path.join(upload_folder, stored_path)
+            else:
+                paths[field] = os.path.join(upload_folder, str(self.project_id), stored_path)
+        return paths
+
+    def get_file_names(self):
+        """Возвращает исходные имена загруженных файлов {поле: имя} (для старых проектов - имя сохраненного файла)"""
+        names = json.loads(self.file_names) if self.file_names else {}
+        return {field: names.get(field, os.path.basename(stored_path))
+                for field, stored_path in self.get_uploaded_files().items()}
+
+    def set_uploaded_file(self, field, stored_path, file_name):
+        """Сохраняет ссылку на файл поля в хранилище и исходное имя файла"""
+        setattr(self, f'{field}_file', stored_path)
+        names = json.loads(self.file_names) if self.file_names else {}
+        names[field] = file_name
+        self.file_names = json.dumps(names, ensure_ascii=False)
+
+    def get_file_dialects(self):
+        """Возвращает форматы загруженных CSV-файлов {поле: {encoding, sep, decimal}}"""
+        if self.file_dialects:
+            return json.loads(self.file_dialects)
+        return {}
+
+    def set_file_dialect(self, field, dialect):
+        """Сохраняет формат CSV-файла поля (None - файл Excel или формат неизвестен)"""
+        dialects = self.get_file_dialects()
+        if dialect:
+            dialects[field] = dialect
+        else:
+            dialects.pop(field, None)
+        self.file_dialects = json.dumps(dialects)
+
     def __repr__(self):
         return f'<ProjectData for project_id={self.project_id}>'
 
@@ -86,49 +132,137 @@ class ProjectResult(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
     run_date = db.Column(db.DateTime, default=datetime.utcnow)
-    result_data = db.Column(db.Text)  # JSON-строка с данными результатов
+    result_data = db.Column(db.Text)  # JSON-строка с полными результатами (устаревший формат)
+    metrics_data = db.Column(db.Text)  # JSON-строка со скалярными показателями (без рядов данных)
+    arrays_file = db.Column(db.String(255))  # путь к .npz-файлу с рядами данных относительно RESULTS_FOLDER
+    # Основные показатели для сортировки и фильтрации результатов
+    final_recovery_with_cap = db.Column(db.Float, index=True)
+    final_recovery_without_cap = db.Column(db.Float, index=True)
+    breakthrough_with_cap = db.Column(db.Float, index=True)
+    breakthrough_without_cap = db.Column(db.Float, index=True)
     runtime = db.Column(db.Float)  # время выполнения в секундах
     status = db.Column(db.String(64), default='success')  # success, error, warning
     error_message = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def save_results(self, results_dict, runtime):
-        """Сохраняет результаты моделирования"""
-        self.result_data = json.dumps(results_dict)
+        """Сохраняет результаты моделирования: показатели в базу, ряды данных в .npz-файл"""
+        summary, arrays = split_results(results_dict)
+
+        if arrays:
+            relative_path = os.path.join(get_result_dir(self.project_id, self.id), ARRAYS_FILENAME)
+            save_arrays(os.path.join(current_app.config['RESULTS_FOLDER'], relative_path), arrays)
+            self.arrays_file = relative_path
+
+        final_recovery = summary.get('final_recovery', {})
+        breakthrough = summary.get('breakthrough_time', {})
+        self.final_recovery_with_cap = final_recovery.get('with_cap')
+        self.final_recovery_without_cap = final_recovery.get('without_cap')
+        self.breakthrough_with_cap = breakthrough.get('with_cap')
+        self.breakthrough_without_cap = breakthrough.get('without_cap')
+
+        self.metrics_data = json.dumps(summary)
+        self.result_data = None
         self.runtime = runtime
         db.session.commit()
 
+    def get_summary(self):
+        """
+        Возвращает скалярные показатели результата без рядов данных
+
+        Достаточно для страниц результатов и сводной таблицы: разбирается
+        только небольшая JSON-строка, файл с рядами не читается.
+        """
+        try:
+            if self.metrics_data:
+                summary = json.loads(self.metrics_data)
+            elif self.result_data:
+                summary, _ = split_results(json.loads(self.result_data))
+            else:
+                return {}
+            return self._complete_results(summary)
+        except Exception as e:
+            print(f"Ошибка при обработке JSON результатов: {e}")
+            return {
+                'error': str(e),
+                'visualizations': {}
+            }
+
+    def get_arrays(self, names=None):
+        """
+        Возвращает ряды данных результата в виде массивов NumPy
+
+        Args:
+            names (list, optional): Разделы, например ['recovery_factor']. Defaults to None (все).
+
+        Returns:
+            dict: Словарь {'recovery_factor/time': numpy.ndarray, ...}
+        """
+        if not self.arrays_file:
+            return {}
+        return load_arrays(os.path.join(current_app.config['RESULTS_FOLDER'], self.arrays_file), names)
+
+    def get_history_dir(self):
+        """Директория полной истории насыщенности результата"""
+        from utils.history_store import HISTORY_DIRNAME
+        return os.path.join(current_app.config['RESULTS_FOLDER'],
+                            get_result_dir(self.project_id, self.id), HISTORY_DIRNAME)
+
+    def save_history(self, model):
+        """Сохраняет полную историю насыщенности модели (время × ячейки)"""
+        from utils.history_store import collect_history, save_history
+
+        return save_history(
+            self.get_history_dir(), collect_history(model), model.t, model.x,
+            dtype=current_app.config['HISTORY_DTYPE'],
+            compress=current_app.config['HISTORY_COMPRESSION'],
+            block_steps=current_app.config['HISTORY_BLOCK_STEPS']
+        )
+
+    def get_figure_data_path(self):
+        """Путь к файлу с рядами данных для графиков результата"""
+        from core.figure_data import FIGURE_DATA_FILENAME
+        return os.path.join(current_app.config['RESULTS_FOLDER'],
+                            get_result_dir(self.project_id, self.id), FIGURE_DATA_FILENAME)
+
+    def save_figure_data(self, figure_data):
+        """Сохраняет ряды данных для графиков (строятся один раз на результат)"""
+        from core.figure_data import save_figure_data
+        save_figure_data(self.get_figure_data_path(), figure_data)
+
+    def get_figure_data(self):
+        """Возвращает ряды данных для графиков или None, если они не сохранялись"""
+        from core.figure_data import load_figure_data
+        return load_figure_data(self.get_figure_data_path())
+
+    def get_visualization_dir(self):
+        """Директория JSON-визуализаций результата"""
+        from utils.visualization_store import VISUALIZATIONS_DIRNAME
+        return os.path.join(current_app.config['RESULTS_FOLDER'],
+                            get_result_dir(self.project_id, self.id), VISUALIZATIONS_DIRNAME)
+
+    def save_visualizations(self, figures):
+        """Проверяет, нормализует и сохраняет JSON-визуализации результата с манифестом"""
+        from utils.visualization_store import write_visualizations
+        return write_visualizations(self.get_visualization_dir(), figures, result_id=self.id,
+                                    precompress=current_app.config['PRECOMPRESS_ARTIFACTS'])
+
+    def get_visualization_manifest(self):
+        """Возвращает манифест визуализаций или None, если они сохранены в старом формате"""
+        from utils.visualization_store import load_manifest
+        return load_manifest(self.get_visualization_dir())
+
     def get_results(self):
         """Возвращает результаты моделирования в виде словаря"""
+        if self.metrics_data:
+            summary = self.get_summary()
+            if 'error' in summary:
+                return summary
+            return join_results(summary, self.get_arrays())
+
         if self.result_data:
             try:
-                result_data = json.loads(self.result_data)
-
-                # Проверяем наличие ключа visualizations и корректируем если нужно
-                if 'visualizations' not in result_data or not result_data['visualizations']:
-                    # Добавляем все возможные визуализации
-                    result_data['visualizations'] = {
-                        'saturation_profiles': True,
-                        'saturation_difference': True,
-                        'recovery_factor': True,
-                        'breakthrough_time': True,
-                        'saturation_evolution': True,
-                        'capillary_pressure': True,
-                        'fractional_flow': True,
-                        'relative_permeability': True
-                    }
-
-                # Убеждаемся, что у нас есть параметры модели
-                if 'parameters' not in result_data or not result_data['parameters']:
-                    # Получаем параметры из проекта
-                    project = Project.query.get(self.project_id)
-                    if project and project.data and project.data.model_parameters:
-                        try:
-                            result_data['parameters'] = json.loads(project.data.model_parameters)
-                        except:
-                            pass
-
-                return result_data
+                return self._complete_results(json.loads(self.result_data))
             except Exception as e:
                 print(f"Ошибка при обработке JSON результатов: {e}")
 
@@ -139,5 +273,33 @@ class ProjectResult(db.Model):
                 }
         return {}
 
+    def _complete_results(self, result_data):
+        """Дополняет результаты списком визуализаций и параметрами модели"""
+        # Проверяем наличие ключа visualizations и корректируем если нужно
+        if 'visualizations' not in result_data or not result_data['visualizations']:
+            # Добавляем все возможные визуализации
+            result_data['visualizations'] = {
+                'saturation_profiles': True,
+                'saturation_difference': True,
+                'recovery_factor': True,
+                'breakthrough_time': True,
+                'saturation_evolution': True,
+                'capillary_pressure': True,
+                'fractional_flow': True,
+                'relative_permeability': True
+            }
+
+        # Убеждаемся, что у нас есть параметры модели
+        if 'parameters' not in result_data or not result_data['parameters']:
+            # Получаем параметры из проекта
+            project = Project.query.get(self.project_id)
+            if project and project.data and project.data.model_parameters:
+                try:
+                    result_data['parameters'] = json.loads(project.data.model_parameters)
+                except:
+                    pass
+
+        return result_data
+
     def __repr__(self):
         return f'<ProjectResult {self.id} for project_id={self.project_id}>'
\ No newline at end of file
@@ -1,18 +1,17 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for
 from flask_login import login_required, current_user
 from extensions import db, csrf  # Добавьте импорт csrf отсюда
 import os
 import json
+import re
+import uuid
 from werkzeug.utils import secure_filename
-import pandas as pd
-import numpy as np
 
 from models.project import Project, ProjectData, ProjectResult
-from core.data_loader import DataLoader
-from utils.file_handlers import allowed_file, save_uploaded_file
+from utils.file_handlers import PREVIEW_FOLDER, allowed_file, remove_stale_files, save_uploaded_file
 
 api_bp = Blueprint('api', __name__)
 
@@ -69,6 +68,119 @@ def get_latest_results(project_id):
     })
 
 
+@api_bp.route('/project/<int:project_id>/results/<int:result_id>/history')
+@login_required
+def get_history_info(project_id, result_id):
+    """Описание сохраненной истории насыщенности результата"""
+    project = Project.query.get_or_404(project_id)
+    result = ProjectResult.query.get_or_404(result_id)
+
+    # Проверяем, что проект принадлежит текущему пользователю и результат принадлежит проекту
+    if project.user_id != current_user.id or result.project_id != project_id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    from utils.history_store import load_history_meta
+
+    meta = load_history_meta(result.get_history_dir())
+    if meta is None:
+        return jsonify({'error': 'История насыщенности для этого результата не сохранялась'}), 404
+
+    return jsonify(meta)
+
+
+@api_bp.route('/project/<int:project_id>/results/<int:result_id>/history/<field>')
+@login_required
+def get_history_slice(project_id, result_id, field):
+    """
+    Срез истории насыщенности без перезапуска моделирования
+
+    Параметры запроса (все необязательные):
+        day - один момент времени (профиль насыщенности), сут
+        x - одна ячейка (история насыщенности в точке), м
+        t_from, t_to - интервал времени, сут
+        x_from, x_to - интервал координат, м
+        t_step, x_step - шаг прореживания по индексам (целое, >= 1)
+
+    Некорректные значения параметров - ответ 400.
+    """
+    project = Project.query.get_or_404(project_id)
+    result = ProjectResult.query.get_or_404(result_id)
+
+    # Проверяем, что проект принадлежит текущему пользователю и результат принадлежит проекту
+    if project.user_id != current_user.id or result.project_id != project_id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    import numpy as np
+    from utils.history_store import load_axes, load_history_meta, read_history
+
+    history_dir = result.get_history_dir()
+    meta = load_history_meta(history_dir)
+    if meta is None:
+        return jsonify({'error': 'История насыщенности для этого результата не сохранялась'}), 404
+    if field not in meta['fields']:
+        return jsonify({'error': f'Поле не найдено: {field}', 'fields': meta['fields']}), 404
+
+    t, x = load_axes(history_dir)
+
+    def number_arg(name, kind=float):
+        """Числовой параметр запроса (None - не задан); нечисловое значение - ValueError с сообщением"""
+        raw = request.args.get(name)
+        if raw is None:
+            return None
+        try:
+            value = kind(raw)
+        except ValueError:
+            raise ValueError(f"Параметр {name} должен быть {'целым ' if kind is int else ''}числом: '{raw}'")
+        if not np.isfinite(value):
+            raise ValueError(f"Параметр {name} должен быть конечным числом: '{raw}'")
+        return value
+
+    def axis_slice(axis, point_arg, from_arg, to_arg, step_arg):
+        """Перевод физических координат из запроса в срез индексов"""
+        point = number_arg(point_arg)
+        if point is not None:
+            index = int(np.abs(axis - point).argmin())
+            return slice(index, index + 1)
+
+        start = number_arg(from_arg)
+        stop = number_arg(to_arg)
+        step = number_arg(step_arg, int)
+        if step is None:
+            step = 1
+        elif step < 1:
+            raise ValueError(f"Параметр {step_arg} должен быть не меньше 1")
+        if start is not None and stop is not None and start > stop:
+            raise ValueError(f"Параметр {from_arg} не может быть больше {to_arg}")
+        start_index = int(np.searchsorted(axis, start, side='left')) if start is not None else 0
+        stop_index = int(np.searchsorted(axis, stop, side='right')) if stop is not None else len(axis)
+        return slice(start_index, stop_index, step)
+
+    # Ошибка в параметрах не должна превращаться в запрос всей истории
+    try:
+        time_slice = axis_slice(t, 'day', 't_from', 't_to', 't_step')
+        cell_slice = axis_slice(x, 'x', 'x_from', 'x_to', 'x_step')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    t_selected = t[time_slice]
+    x_selected = x[cell_slice]
+    if len(t_selected) * len(x_selected) > current_app.config['HISTORY_MAX_VALUES']:
+        return jsonify({
+            'error': 'Запрошен слишком большой фрагмент истории, уменьшите интервал или увеличьте шаг',
+            'max_values': current_app.config['HISTORY_MAX_VALUES']
+        }), 400
+
+    values = read_history(history_dir, field, time_slice, cell_slice, meta=meta)
+
+    return jsonify({
+        'field': field,
+        'shape': list(values.shape),
+        't': t_selected.tolist(),
+        'x': x_selected.tolist(),
+        'values': values.tolist()
+    })
+
+
 @api_bp.route('/file/validate', methods=['POST'])
 @login_required
 def validate_file():
@@ -95,79 +207,41 @@ def validate_file():
             print(f"Ошибка: недопустимое расширение файла {file.filename}")
             return jsonify({'error': 'File extension not allowed'}), 400
 
-        # Вместо сохранения файла, читаем его содержимое напрямую
-        file_content = file.read()
-        print(f"Прочитано {len(file_content)} байт из файла")
-
-        # Определяем кодировку
-        try:
-            import chardet
-            result = chardet.detect(file_content)
-            detected_encoding = result['encoding'] or 'utf-8'
-            confidence = result['confidence']
-            print(f"Определена кодировка: {detected_encoding} с уверенностью {confidence}")
-        except ImportError:
-            detected_encoding = 'utf-8'  # По умолчанию
-            print("Модуль chardet не установлен, используем кодировку по умолчанию")
-
-        # Пробуем разные кодировки для декодирования
-        encodings = [detected_encoding, 'utf-8', 'cp1251', 'latin1', 'windows-1252']
-        separators = [',', ';', '\t']
-
-        df = None
-        success_info = ""
-
-        for encoding in encodings:
-            for sep in separators:
-                try:
-                    print(f"Пробуем прочитать с кодировкой {encoding} и разделителем '{sep}'")
-                    # Преобразуем байты в строку и используем StringIO
-                    from io import StringIO
-                    decoded_content = file_content.decode(encoding)
-                    df = pd.read_csv(StringIO(decoded_content), sep=sep, engine='python')
-
-                    if len(df.columns) > 1:
-                        success_info = f"Файл успешно прочитан с кодировкой {encoding} и разделителем '{sep}'"
-                        print(success_info)
-                        print(f"Колонки: {list(df.columns)}")
-                        break
-                except Exception as e:
-                    print(f"Ошибка при чтении с кодировкой {encoding} и разделителем '{sep}': {str(e)}")
-                    continue
-
-            if df is not None and len(df.columns) > 1:
-                break
-
-        # Определяем требуемые колонки в зависимости от типа файла
-        required_columns = {
-            'rock_properties': ['ID_Sample', 'Porosity_fr', 'Permeability_mD', 'Rock_Type'],
-            'capillary_pressure': ['ID_Sample', 'Water_Saturation', 'Pc_Drainage_MPa'],
-            'relative_perm': ['ID_Sample', 'Water_Saturation', 'Krw_Drainage', 'Kro_Drainage'],
-            'pvt_data': ['Pressure_MPa', 'Oil_Viscosity_cP'],
-            'production_data': ['Date', 'Oil_Rate_m3_day', 'Water_Rate_m3_day']
-        }
+        # Файл сохраняется во временную директорию и проверяется по схеме типа за один разбор;
+        # разобранная таблица и отчет кэшируются по хэшу содержимого и используются при загрузке в проект
+        from utils.csv_dialect import detect_file_dialect
+        from utils.file_schema import validate_file as validate_data_file
 
-        # Проверяем, есть ли указанный тип файла в списке допустимых типов
-        columns = required_columns.get(file_type, [])
+        temp_filename, file_path = save_uploaded_file(file, current_app.config['TEMP_FOLDER'], 'validate')
+        if not temp_filename:
+            return jsonify({'error': 'Error saving file'}), 500
 
-        if df is None:
-            return jsonify({
-                'valid': False,
-                'message': "Не удалось прочитать файл. Проверьте формат и кодировку файла."
-            })
+        try:
+            dialect = detect_file_dialect(file_path)
+            report = validate_data_file(file_path, file_type, current_app.config['DATASET_CACHE_FOLDER'], dialect)
+        finally:
+            os.remove(file_path)
 
-        # Проверяем наличие необходимых колонок
-        missing_columns = [col for col in columns if col not in df.columns]
+        if dialect:
+            success_info = (f"Файл успешно прочитан с кодировкой {dialect['encoding']} "
+                            f"и разделителем '{dialect['sep']}'")
+        else:
+            success_info = "Файл Excel успешно прочитан"
 
-        if missing_columns:
+        if not report['valid']:
             return jsonify({
                 'valid': False,
-                'message': f"В файле отсутствуют следующие обязательные колонки: {', '.join(missing_columns)}. Доступные колонки: {', '.join(df.columns)}"
+                'message': report['message'],
+                'errors': report['errors'],
+                'warnings': report['warnings']
             })
 
+        print(success_info)
         return jsonify({
             'valid': True,
-            'message': f"Файл соответствует требованиям. {success_info}"
+            'message': f"Файл соответствует требованиям. {success_info}",
+            'errors': [],
+            'warnings': report['warnings']
         })
 
     except Exception as e:
@@ -197,50 +271,45 @@ def preview_file():
         return jsonify({'error': 'File extension not allowed'}), 400
 
     # Сохраняем файл во временную директорию
-    temp_filename = save_uploaded_file(file, current_app.config['TEMP_FOLDER'], 'temp')
+    temp_filename, file_path = save_uploaded_file(file, current_app.config['TEMP_FOLDER'], 'temp')
 
     if not temp_filename:
         return jsonify({'error': 'Error saving file'}), 500
 
-    # Путь к временному файлу
-    file_path = os.path.join(current_app.config['TEMP_FOLDER'], temp_filename)
-
     try:
-        # Читаем данные из файла
-        df = pd.read_csv(file_path)
+        from utils.chunked_reader import read_preview
+        from utils.csv_dialect import detect_file_dialect
+        from utils.dataset_cache import load_table_stats
 
-        # Получаем первые 10 строк для предварительного просмотра
-        preview_data = df.head(10).to_dict(orient='records')
+        # Формат CSV определяется по началу файла; для просмотра читаются только первые строки
+        dialect = detect_file_dialect(file_path)
+        preview_df = read_preview(file_path, dialect)
+        preview_data = preview_df.to_dict(orient='records')
 
         # Получаем информацию о колонках
-        columns = list(df.columns)
-
-        # Получаем статистику по данным
-        stats = {}
-        for col in df.columns:
-            if pd.api.types.is_numeric_dtype(df[col]):
-                stats[col] = {
-                    'min': float(df[col].min()),
-                    'max': float(df[col].max()),
-                    'mean': float(df[col].mean()),
-                    'std': float(df[col].std()),
-                    'type': 'numeric'
-                }
-            else:
-                stats[col] = {
-                    'unique': len(df[col].unique()),
-                    'type': 'categorical'
-                }
+        columns = list(preview_df.columns)
 
-        # Удаляем временный файл
-        os.remove(file_path)
-
-        return jsonify({
+        # Статистика по данным - только из кэша разобранных таблиц (файл уже загружался);
+        # иначе файл остается во временной директории, а статистика считается отдельным запросом
+        table_stats = load_table_stats(file_path, current_app.config['DATASET_CACHE_FOLDER'], dialect, parse=False)
+        response = {
             'columns': columns,
             'preview': preview_data,
-            'stats': stats,
-            'total_rows': len(df)
-        })
+            'stats': table_stats['columns'] if table_stats else None,
+            'total_rows': table_stats['rows'] if table_stats else None
+        }
+
+        if table_stats:
+            os.remove(file_path)
+        else:
+            preview_folder = os.path.join(current_app.config['TEMP_FOLDER'], PREVIEW_FOLDER)
+            remove_stale_files(preview_folder, current_app.config['PREVIEW_FILE_MAX_AGE'])
+            token = uuid.uuid4().hex
+            os.makedirs(preview_folder, exist_ok=True)
+            os.replace(file_path, os.path.join(preview_folder, token + os.path.splitext(temp_filename)[1].lower()))
+            response['stats_url'] = url_for('api.preview_file_stats', token=token)
+
+        return jsonify(response)
 
     except Exception as e:
         # Удаляем временный файл в случае ошибки
@@ -252,27 +321,84 @@ def preview_file():
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/file/preview/<token>/stats')
+@login_required
+def preview_file_stats(token):
+    """
+    Статистика файла предварительного просмотра (отдельный запрос после показа первых строк)
+
+    Файл разбирается одним потоковым проходом без сохранения в кэш разобранных таблиц
+    и удаляется после расчета.
+    """
+    if not re.fullmatch(r'[0-9a-f]{32}', token):
+        return jsonify({'error': 'Файл не найден'}), 404
+
+    preview_folder = os.path.join(current_app.config['TEMP_FOLDER'], PREVIEW_FOLDER)
+    file_path = next((os.path.join(preview_folder, token + '.' + ext)
+                      for ext in current_app.config['ALLOWED_EXTENSIONS']
+                      if os.path.exists(os.path.join(preview_folder, token + '.' + ext))), None)
+    if file_path is None:
+        return jsonify({'error': 'Файл не найден, загрузите его для просмотра еще раз'}), 404
+
+    try:
+        from utils.csv_dialect import detect_file_dialect
+        from utils.dataset_cache import parse_file
+
+        table_stats = parse_file(file_path, detect_file_dialect(file_path))[2]
+        return jsonify({'stats': table_stats['columns'], 'total_rows': table_stats['rows']})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
 @api_bp.route('/visualization/<int:project_id>/<name>')
 @login_required
 def get_visualization(project_id, name):
-    """Получение данных визуализации"""
+    """
+    Получение данных визуализации последнего результата
+
+    Файлы результата отдаются из директории визуализаций результата (манифест utils.visualization_store);
+    директория проекта используется только для результатов старого формата.
+    """
+    from utils.compression import send_precompressed
+    from utils.visualization_store import (get_visualization_path, load_manifest,
+                                           read_legacy_visualization)
+
     project = Project.query.get_or_404(project_id)
 
     # Проверяем, что проект принадлежит текущему пользователю
     if project.user_id != current_user.id:
         return jsonify({'error': 'Access denied'}), 403
 
-    # Путь к файлу визуализации
-    file_path = os.path.join(current_app.config['RESULTS_FOLDER'], str(project_id), f'{name}.json')
-
+    # Визуализации последнего результата из манифеста
+    result = project.results.order_by(ProjectResult.created_at.desc()).first()
+    if result is not None:
+        file_path = get_visualization_path(result.get_visualization_dir(), name)
+        if file_path is not None:
+            return send_precompressed(os.path.dirname(file_path), os.path.basename(file_path),
+                                      mimetype='application/json')
+
+    # Визуализации старого формата в директории проекта
+    project_dir = os.path.join(current_app.config['RESULTS_FOLDER'], str(project_id))
+    if load_manifest(project_dir) is not None:
+        file_path = get_visualization_path(project_dir, name)
+        if file_path is None:
+            return jsonify({'error': 'Visualization not found'}), 404
+        return send_precompressed(project_dir, os.path.basename(file_path), mimetype='application/json')
+
+    file_path = os.path.join(project_dir, f'{secure_filename(name)}.json')
     if not os.path.exists(file_path):
         return jsonify({'error': 'Visualization not found'}), 404
 
     # Читаем JSON-данные визуализации
-    with open(file_path, 'r', encoding='utf-8') as f:
-        visualization_data = json.load(f)
-
-    return jsonify(visualization_data)
+    try:
+        return jsonify(read_legacy_visualization(file_path))
+    except Exception as e:
+        return jsonify({'error': f'Error reading visualization: {str(e)}'}), 500
 
 
 @api_bp.route('/parameters/check', methods=['POST'])
@@ -422,14 +548,25 @@ def get_project_images(project_id):
     if not result:
         return jsonify({'error': 'No results found'}), 404
 
-    # Получаем данные результатов
-    results_data = result.get_results()
+    # Получаем показатели результатов (пути к изображениям хранятся в сводке)
+    results_data = result.get_summary()
 
     # Добавляем логирование
     print(f"Запрос изображений для проекта {project_id}")
 
+    # Адрес изображений: для результатов с рядами данных - неизменяемые адреса результата
+    base_url = f"/project/{project_id}/image"
+
     # Проверяем наличие информации о путях к изображениям
-    if 'image_paths' not in results_data:
+    if 'image_paths' not in results_data and os.path.exists(result.get_figure_data_path()):
+        base_url = f"/project/{project_id}/results/{result.id}/image"
+        # Изображения строятся по запросу из рядов данных графиков (utils.image_cache)
+        from core.figure_data import FIGURE_NAMES
+        image_paths = {
+            format_type: {name: f"{name}.{format_type}" for name in FIGURE_NAMES}
+            for format_type in current_app.config['IMAGE_FORMATS']
+        }
+    elif 'image_paths' not in results_data:
         # Если информации нет в результатах, пытаемся найти изображения вручную
         image_paths = {'png': {}, 'svg': {}}
 
@@ -494,5 +631,7 @@ def get_project_images(project_id):
 
     return jsonify({
         'project_id': project_id,
+        'result_id': result.id,
+        'base_url': base_url,
         'images': image_urls
     })
\ No newline at end of file
@@ -10,18 +10,12 @@ import traceback
 import time
 from datetime import datetime
 from werkzeug.utils import secure_filename
-import pandas as pd
-import numpy as np
-from core.matplotlib_visualizer import MatplotlibVisualizer
 from extensions import db, csrf
 from models.user import User
 from models.project import Project, ProjectData, ProjectResult
-from core.model import OilFiltrationModel
-from core.carbonate_model import CarbonateModel
-from core.visualizer import Visualizer
-from core.data_loader import DataLoader
 from routes.api import api_bp
-from utils.file_handlers import save_uploaded_file, allowed_file
+from utils.file_handlers import store_uploaded_file, allowed_file
+from utils.csv_dialect import detect_file_dialect
 
 main_bp = Blueprint('main', __name__)
 
@@ -84,35 +78,25 @@ def new_project():
                 except (ValueError, TypeError):
                     pass
 
-        # Обрабатываем загруженные файлы
-        uploaded_files = {}
-        file_fields = ['rock_properties', 'capillary_pressure', 'relative_perm', 'pvt_data', 'production_data']
-
-        for field in file_fields:
-            if field in request.files and request.files[field].filename:
-                file = request.files[field]
-                if file and allowed_file(file.filename, current_app.config['ALLOWED_EXTENSIONS']):
-                    filename, file_path = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'], project.id)
-                    if filename:
-                        uploaded_files[field] = filename
-
         # Создаем запись данных проекта
         project_data = ProjectData(
             project_id=project.id,
             model_parameters=json.dumps(model_params)
         )
 
-        # Сохраняем пути к загруженным файлам
-        if 'rock_properties' in uploaded_files:
-            project_data.rock_properties_file = uploaded_files['rock_properties']
-        if 'capillary_pressure' in uploaded_files:
-            project_data.capillary_pressure_file = uploaded_files['capillary_pressure']
-        if 'relative_perm' in uploaded_files:
-            project_data.relative_perm_file = uploaded_files['relative_perm']
-        if 'pvt_data' in uploaded_files:
-            project_data.pvt_data_file = uploaded_files['pvt_data']
-        if 'production_data' in uploaded_files:
-            project_data.production_data_file = uploaded_files['production_data']
+        # Обрабатываем загруженные файлы: файлы хранятся по хэшу содержимого,
+        # данные проекта ссылаются на них
+        file_fields = ['rock_properties', 'capillary_pressure', 'relative_perm', 'pvt_data', 'production_data']
+
+        for field in file_fields:
+            if field in request.files and request.files[field].filename:
+                file = request.files[field]
+                if file and allowed_file(file.filename, current_app.config['ALLOWED_EXTENSIONS']):
+                    stored_path, file_path = store_uploaded_file(file, current_app.config['UPLOAD_FOLDER'])
+                    if stored_path:
+                        project_data.set_uploaded_file(field, stored_path, file.filename)
+                        # Формат CSV определяется, а файл разбирается и проверяется один раз при загрузке
+                        project_data.set_file_dialect(field, check_uploaded_file(field, file.filename, file_path))
 
         # Добавляем данные проекта в базу данных
         db.session.add(project_data)
@@ -138,16 +122,22 @@ def project_details(project_id):
         flash('У вас нет доступа к этому проекту', 'danger')
         return redirect(url_for('main.dashboard'))
 
-    # Исправляем файлы визуализаций
-    fix_all_visualization_files(project_id)
+    # Сервер не дождался окончания расчета (server.SimulationRouter), но расчет продолжается
+    if request.args.get('simulation') == 'running':
+        flash('Моделирование выполняется дольше обычного. Результат появится на этой странице '
+              'после завершения расчета - обновите страницу позже.', 'info')
 
     # Получаем параметры модели
     model_params = project.get_model_parameters()
 
     # Получаем последний результат моделирования
     results = project.results.order_by(ProjectResult.created_at.desc()).first()
+    results_summary = results.get_summary() if results else None
 
-    return render_template('project_details.html', project=project, model_params=model_params, results=results)
+    return render_template('project_details.html', project=project, model_params=model_params,
+                           results=results, results_summary=results_summary,
+                           visualization_urls=get_visualization_urls(results),
+                           visualization_bundle_url=get_visualization_bundle_url(results))
 
 
 @main_bp.route('/project/<int:project_id>/run', methods=['POST'])
@@ -177,6 +167,15 @@ def run_project(project_id):
         # Используем сохраненные параметры модели
         model_params = project.get_model_parameters()
 
+    # Расчетное ядро и визуализаторы тянут NumPy, pandas, Plotly и Matplotlib,
+    # поэтому импортируются только при первом запуске моделирования, а не при старте воркера
+    from core.model import OilFiltrationModel
+    from core.carbonate_model import CarbonateModel
+    from core.data_loader import DataLoader
+    from utils.file_schema import FILE_SCHEMAS
+    from core.visualizer import Visualizer
+    from core.figure_data import build_figure_data
+
     # Создаем объект результата
     result = ProjectResult(project_id=project.id)
     db.session.add(result)
@@ -186,9 +185,15 @@ def run_project(project_id):
         start_time = time.time()
 
         # Загружаем данные из файлов, если они есть
+        pvt_table = None
+        kr_table = None
+        user_viscosities = {}
         if project.data:
-            data_files = project.data.get_uploaded_files()
-            data_loader = DataLoader(data_dir=current_app.config['UPLOAD_FOLDER'])
+            # Файлы проекта хранятся в UPLOAD_FOLDER по хэшу содержимого; разобранные таблицы - в кэше
+            data_files = project.data.get_file_paths(current_app.config['UPLOAD_FOLDER'])
+            data_loader = DataLoader(data_dir=os.path.join(current_app.config['UPLOAD_FOLDER'], str(project.id)),
+                                     cache_dir=current_app.config['DATASET_CACHE_FOLDER'],
+                                     dialects=project.data.get_file_dialects())
 
             # Определяем пути к файлам
             rock_file = data_files.get('rock_properties')
@@ -197,8 +202,11 @@ def run_project(project_id):
             pvt_file = data_files.get('pvt_data')
             prod_file = data_files.get('production_data')
 
-            # Загружаем данные
-            data_loader.load_all_data(rock_file, cap_file, perm_file, pvt_file, prod_file)
+            # Файлы разбираются при первом обращении: загружаются только таблицы, нужные расчету
+            data_loader.set_data_files(rock_file, cap_file, perm_file, pvt_file, prod_file)
+
+            # Вязкости, заданные пользователем, сохраняются и при вязкостях из PVT-таблицы
+            user_viscosities = {key: model_params[key] for key in ('mu_oil', 'mu_water') if key in model_params}
 
             # Извлекаем параметры из данных, если они не были указаны пользователем
             data_params = data_loader.extract_model_parameters(project.rock_type)
@@ -208,24 +216,55 @@ def run_project(project_id):
                 if key not in model_params:
                     model_params[key] = value
 
+            # Вязкости по давлению в ячейках из PVT-таблицы
+            if current_app.config['PVT_PRESSURE_DEPENDENT_VISCOSITY']:
+                pvt_table = data_loader.get_pvt_table()
+
+            # Относительные проницаемости по лабораторной кривой образца
+            if current_app.config['TABULATED_RELATIVE_PERMEABILITY']:
+                kr_table = data_loader.get_kr_table(project.rock_type)
+
+            # Файлы, которые не удалось загрузить, в расчете не используются
+            for file_type, message in data_loader.get_load_errors().items():
+                flash(f"Файл {FILE_SCHEMAS[file_type]['title']} не загружен и не использован в расчете: {message}",
+                      'warning')
+
         # Выбираем тип модели в зависимости от проекта
         if project.model_type == 'carbonate':
-            model = CarbonateModel(model_params)
+            model = CarbonateModel(model_params, kr_table=kr_table)
+            if pvt_table is not None:
+                model.set_pvt_table(pvt_table, user_viscosities)
             # Запускаем моделирование с двойной пористостью
             model.run_dual_porosity_simulation()
         else:
-            model = OilFiltrationModel(model_params)
+            model = OilFiltrationModel(model_params, kr_table=kr_table)
+            if pvt_table is not None:
+                model.set_pvt_table(pvt_table, user_viscosities)
             # Запускаем обычное моделирование
             model.run_simulation()
 
         # Извлекаем результаты
         results_data = model.extract_results()
 
+        # Полная история насыщенности: новые срезы и профили строятся без перезапуска расчета
+        if current_app.config['SAVE_SATURATION_HISTORY']:
+            try:
+                result.save_history(model)
+            except Exception as e:
+                print(f"ОШИБКА при сохранении истории насыщенности: {str(e)}")
+
+        # Ряды данных для всех графиков считаются один раз и сохраняются вместе с результатом
+        figure_data = build_figure_data(model, results_data, max_cells=current_app.config['VISUALIZATION_MAX_CELLS'])
+        result.save_figure_data(figure_data)
+
         # Создаем визуализатор Plotly для JSON-представлений (для фронтенда)
         visualizer = Visualizer(
             model,
             output_dir=current_app.config['RESULTS_FOLDER'],
-            image_output_dir=current_app.config['IMAGES_FOLDER']
+            image_output_dir=current_app.config['IMAGES_FOLDER'],
+            max_cells=current_app.config['VISUALIZATION_MAX_CELLS'],
+            array_dtype=current_app.config['VISUALIZATION_ARRAY_DTYPE'],
+            figure_data=figure_data
         )
 
         # Добавляем визуализации к результатам
@@ -240,39 +279,45 @@ def run_project(project_id):
             'relative_permeability': True
         }
 
-        # Сохраняем JSON-визуализации для веб-интерфейса
-        visualizer.save_visualizations(project_id)
-
-        # Используем MatplotlibVisualizer для создания и сохранения изображений
-        try:
-                        # Создаем экземпляр MatplotlibVisualizer
-            mpl_visualizer = MatplotlibVisualizer(
-                model,
-                output_dir=current_app.config['RESULTS_FOLDER'],
-                image_output_dir=current_app.config['IMAGES_FOLDER']
-            )
-
-            # Сохраняем изображения в форматах PNG и SVG
-            image_paths = mpl_visualizer.save_visualizations_as_images(
-                project_id,
-                user_id=current_user.id,
-                formats=['png', 'svg']
-            )
-
-            # Добавляем информацию о сохраненных изображениях в результаты
-            results_data['image_paths'] = {
-                format_type: {name: os.path.relpath(path, current_app.config['IMAGES_FOLDER'])
-                              for name, path in paths.items()}
-                for format_type, paths in image_paths.items()
-            }
+        # Сохраняем JSON-визуализации для веб-интерфейса (проверка схемы и манифест - при записи)
+        result.save_visualizations(visualizer.create_figures())
+
+        # Изображения PNG/SVG по умолчанию строятся при первом запросе (utils.image_cache);
+        # при EAGER_IMAGE_RENDERING все изображения сохраняются сразу после расчета
+        if current_app.config['EAGER_IMAGE_RENDERING']:
+            try:
+                # Создаем экземпляр MatplotlibVisualizer
+                from core.matplotlib_visualizer import MatplotlibVisualizer
+                mpl_visualizer = MatplotlibVisualizer(
+                    model,
+                    output_dir=current_app.config['RESULTS_FOLDER'],
+                    image_output_dir=current_app.config['IMAGES_FOLDER'],
+                    figure_data=figure_data
+                )
+
+                # Сохраняем изображения в форматах PNG и SVG
+                image_paths = mpl_visualizer.save_visualizations_as_images(
+                    project_id,
+                    user_id=current_user.id,
+                    formats=['png', 'svg'],
+                    dpi=current_app.config['IMAGE_DPI'],
+                    workers=current_app.config['RENDER_WORKERS']
+                )
+
+                # Добавляем информацию о сохраненных изображениях в результаты
+                results_data['image_paths'] = {
+                    format_type: {name: os.path.relpath(path, current_app.config['IMAGES_FOLDER'])
+                                  for name, path in paths.items()}
+                    for format_type, paths in image_paths.items()
+                }
 
-            print(f"Сохранено изображений: PNG - {len(image_paths['png'])}, SVG - {len(image_paths['svg'])}")
+                print(f"Сохранено изображений: PNG - {len(image_paths['png'])}, SVG - {len(image_paths['svg'])} (SVG может дописываться в фоне)")
 
-        except Exception as e:
-            print(f"ОШИБКА при сохранении изображений: {str(e)}")
-            traceback.print_exc()
-            # Обеспечиваем, чтобы в результатах была пустая структура даже в случае ошибки
-            results_data['image_paths'] = {'png': {}, 'svg': {}}
+            except Exception as e:
+                print(f"ОШИБКА при сохранении изображений: {str(e)}")
+                traceback.print_exc()
+                # Обеспечиваем, чтобы в результатах была пустая структура даже в случае ошибки
+                results_data['image_paths'] = {'png': {}, 'svg': {}}
 
         # Рассчитываем время выполнения
         end_time = time.time()
@@ -308,19 +353,27 @@ def view_results(project_id, result_id):
         flash('У вас нет доступа к этим результатам', 'danger')
         return redirect(url_for('main.dashboard'))
 
-    # Исправляем файлы визуализаций
-    fix_all_visualization_files(project_id)
-
-    # Получаем данные результатов
-    results_data = result.get_results()
+    # Получаем показатели результатов (ряды данных страница загружает через визуализации)
+    results_data = result.get_summary()
 
-    return render_template('results.html', project=project, result=result, results_data=results_data)
+    return render_template('results.html', project=project, result=result, results_data=results_data,
+                           visualization_urls=get_visualization_urls(result),
+                           visualization_bundle_url=get_visualization_bundle_url(result))
 
 
 @main_bp.route('/project/<int:project_id>/visualization/<name>')
 @login_required
 def get_visualization(project_id, name):
-    """Получение JSON-данных визуализации"""
+    """
+    Получение JSON-данных визуализации последнего результата
+
+    Файлы проверяются и нормализуются при записи (utils.visualization_store),
+    поэтому отдаются как есть; файлы старого формата нормализуются только в памяти.
+    """
+    from utils.compression import send_precompressed
+    from utils.visualization_store import (get_visualization_path, load_manifest,
+                                           read_legacy_visualization)
+
     print(f"=== Запрос визуализации: project_id={project_id}, name={name} ===")
 
     project = Project.query.get_or_404(project_id)
@@ -330,11 +383,23 @@ def get_visualization(project_id, name):
         print(f"Доступ запрещен: проект принадлежит пользователю {project.user_id}, а запрос от {current_user.id}")
         return jsonify({'error': 'Access denied'}), 403
 
-    # Исправляем файл визуализации перед чтением
-    fix_visualization_file(project_id, name)
-
-    # Путь к файлу визуализации
-    file_path = os.path.join(current_app.config['RESULTS_FOLDER'], str(project_id), f'{name}.json')
+    # Визуализации последнего результата из манифеста
+    result = project.results.order_by(ProjectResult.created_at.desc()).first()
+    if result is not None:
+        file_path = get_visualization_path(result.get_visualization_dir(), name)
+        if file_path is not None:
+            return send_precompressed(os.path.dirname(file_path), os.path.basename(file_path),
+                                      mimetype='application/json')
+
+    # Визуализации старого формата в директории проекта
+    project_dir = os.path.join(current_app.config['RESULTS_FOLDER'], str(project_id))
+    if load_manifest(project_dir) is not None:
+        file_path = get_visualization_path(project_dir, name)
+        if file_path is None:
+            return jsonify({'error': 'Visualization not found'}), 404
+        return send_precompressed(project_dir, os.path.basename(file_path), mimetype='application/json')
+
+    file_path = os.path.join(project_dir, f'{secure_filename(name)}.json')
     print(f"Путь к файлу визуализации: {file_path}")
 
     if not os.path.exists(file_path):
@@ -343,50 +408,135 @@ def get_visualization(project_id, name):
 
     # Читаем JSON-данные визуализации
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            visualization_data = json.load(f)
-            print(f"Файл визуализации успешно загружен, размер данных: {len(str(visualization_data))} символов")
-
-            # Проверяем структуру данных
-            if 'data' not in visualization_data:
-                print(f"ОШИБКА: В данных визуализации отсутствует ключ 'data'")
-                # Создаем базовую структуру
-                visualization_data = {'data': [], 'layout': {}}
-            elif not isinstance(visualization_data['data'], list):
-                print(f"ОШИБКА: visualization_data['data'] не является списком: {type(visualization_data['data'])}")
-                # Корректируем тип данных
-                visualization_data['data'] = []
-            else:
-                print(f"visualization_data['data'] содержит {len(visualization_data['data'])} элементов")
-
-            if 'layout' not in visualization_data:
-                print(f"ОШИБКА: В данных визуализации отсутствует ключ 'layout'")
-                visualization_data['layout'] = {}
-
-            # Улучшаем стиль графиков
-            if 'layout' in visualization_data:
-                layout = visualization_data['layout']
-
-                # Добавляем отступы, если их нет
-                if 'margin' not in layout:
-                    layout['margin'] = {'l': 60, 'r': 40, 't': 60, 'b': 60}
-
-                # Устанавливаем шрифт
-                if 'font' not in layout:
-                    layout['font'] = {'family': 'Roboto, sans-serif', 'size': 14}
-
-                # Устанавливаем цвет фона
-                if 'plot_bgcolor' not in layout:
-                    layout['plot_bgcolor'] = '#f8f8f8'
-                if 'paper_bgcolor' not in layout:
-                    layout['paper_bgcolor'] = '#ffffff'
-
-            return jsonify(visualization_data)
+        return jsonify(read_legacy_visualization(file_path))
     except Exception as e:
         print(f"ОШИБКА при чтении файла визуализации: {str(e)}")
         return jsonify({'error': f'Error reading visualization: {str(e)}'}), 500
 
 
+@main_bp.route('/project/<int:project_id>/results/<int:result_id>/visualization/<name>')
+@login_required
+def get_result_visualization(project_id, result_id, name):
+    """
+    JSON-данные визуализации конкретного результата
+
+    Файл результата не меняется после записи: при совпадении параметра v
+    с хэшем из манифеста ответ кэшируется браузером бессрочно.
+    """
+    from utils.compression import send_precompressed
+    from utils.http_cache import mark_immutable
+
+    project = Project.query.get_or_404(project_id)
+    result = ProjectResult.query.get_or_404(result_id)
+
+    # Проверяем, что проект принадлежит текущему пользователю и результат принадлежит проекту
+    if project.user_id != current_user.id or result.project_id != project_id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    manifest = result.get_visualization_manifest()
+    entry = manifest['visualizations'].get(name) if manifest else None
+    if entry is None:
+        return jsonify({'error': 'Visualization not found'}), 404
+
+    response = send_precompressed(result.get_visualization_dir(), entry['file'],
+                                  mimetype='application/json', etag=entry['sha256'])
+    if request.args.get('v') == entry['sha256'][:16]:
+        mark_immutable(response)
+    return response
+
+
+@main_bp.route('/project/<int:project_id>/results/<int:result_id>/visualizations')
+@login_required
+def get_result_visualizations(project_id, result_id):
+    """
+    Все JSON-визуализации результата одним ответом
+
+    Параметр names (через запятую) ограничивает набор визуализаций. Полный набор
+    хранится заранее собранным и сжатым, выборка собирается из файлов без разбора JSON.
+    """
+    from utils.compression import send_precompressed
+    from utils.http_cache import mark_immutable
+    from utils.visualization_store import assemble_bundle
+
+    project = Project.query.get_or_404(project_id)
+    result = ProjectResult.query.get_or_404(result_id)
+
+    # Проверяем, что проект принадлежит текущему пользователю и результат принадлежит проекту
+    if project.user_id != current_user.id or result.project_id != project_id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    manifest = result.get_visualization_manifest()
+    if not manifest:
+        return jsonify({'error': 'Visualizations not found'}), 404
+
+    names = [name for name in request.args.get('names', '').split(',') if name]
+    unknown = [name for name in names if name not in manifest['visualizations']]
+    if unknown:
+        return jsonify({'error': f"Unknown visualizations: {', '.join(unknown)}"}), 404
+
+    directory = result.get_visualization_dir()
+    bundle = manifest.get('bundle')
+    if not names and bundle:
+        response = send_precompressed(directory, bundle['file'], mimetype='application/json',
+                                      etag=bundle['sha256'])
+    else:
+        # Выборка (или манифест без собранного файла): сжатие и ETag - при отправке
+        response = current_app.response_class(assemble_bundle(directory, manifest, names or None),
+                                              mimetype='application/json')
+
+    # Содержимое результата не меняется: адрес с версией кэшируется бессрочно
+    if bundle and request.args.get('v') == bundle['sha256'][:16]:
+        mark_immutable(response)
+    return response
+
+
+def get_visualization_bundle_url(result):
+    """Адрес всех визуализаций результата с версией по хэшу содержимого (None для старых результатов)"""
+    manifest = result.get_visualization_manifest() if result else None
+    if not manifest or 'bundle' not in manifest:
+        return None
+
+    return url_for('main.get_result_visualizations', project_id=result.project_id, result_id=result.id,
+                   v=manifest['bundle']['sha256'][:16])
+
+
+def get_visualization_urls(result):
+    """
+    Адреса JSON-визуализаций результата с версией по хэшу содержимого
+
+    Returns:
+        dict: Словарь {имя визуализации: URL}; пустой для результатов без манифеста
+    """
+    manifest = result.get_visualization_manifest() if result else None
+    if not manifest:
+        return {}
+
+    return {
+        name: url_for('main.get_result_visualization', project_id=result.project_id, result_id=result.id,
+                      name=name, v=entry['sha256'][:16])
+        for name, entry in manifest['visualizations'].items()
+    }
+
+
+def check_uploaded_file(field, file_name, file_path):
+    """
+    Разбор и проверка загруженного файла по схеме типа (utils.file_schema)
+
+    Разобранная таблица и отчет проверки сохраняются в кэш по хэшу содержимого,
+    поэтому при запуске расчета файл повторно не разбирается. Замечания показываются пользователю.
+
+    Returns:
+        dict: Формат CSV-файла (None для файлов Excel)
+    """
+    from utils.file_schema import validate_file
+
+    dialect = detect_file_dialect(file_path)
+    report = validate_file(file_path, field, current_app.config['DATASET_CACHE_FOLDER'], dialect)
+    for message in report['errors'] + report['warnings']:
+        flash(f"Файл {file_name}: {message}", 'warning')
+    return dialect
+
+
 @main_bp.route('/project/<int:project_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_project(project_id):
@@ -435,11 +585,12 @@ def edit_project(project_id):
             if field in request.files and request.files[field].filename:
                 file = request.files[field]
                 if file and allowed_file(file.filename, current_app.config['ALLOWED_EXTENSIONS']):
-                    filename = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'], project.id)
-                    if filename:
-                        # Обновляем путь к файлу
+                    stored_path, file_path = store_uploaded_file(file, current_app.config['UPLOAD_FOLDER'])
+                    if stored_path:
+                        # Обновляем ссылку на файл и его формат
                         if project.data:
-                            setattr(project.data, f'{field}_file', filename)
+                            project.data.set_uploaded_file(field, stored_path, file.filename)
+                            project.data.set_file_dialect(field, check_uploaded_file(field, file.filename, file_path))
 
         # Обновляем параметры модели
         if project.data:
@@ -521,147 +672,23 @@ def about():
     return render_template('about.html')
 
 
-def fix_visualization_file(project_id, viz_name):
-    """Исправление структуры конкретного файла визуализации"""
-    results_folder = current_app.config['RESULTS_FOLDER']
-    file_path = os.path.join(results_folder, str(project_id), f'{viz_name}.json')
-
-    if not os.path.exists(file_path):
-        print(f"Файл визуализации не найден: {file_path}")
-        return False
-
-    try:
-        print(f"Проверка файла визуализации: {file_path}")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            json_data = json.load(f)
-
-        # Проверяем структуру
-        fixed = False
-
-        # Создаем правильную структуру данных
-        corrected_data = {
-            "data": [],
-            "layout": {}
-        }
-
-        # Проверяем наличие данных и наполняем структуру
-        if 'data' in json_data and isinstance(json_data['data'], list):
-            corrected_data["data"] = json_data["data"]
-        elif 'traces' in json_data and isinstance(json_data['traces'], list):
-            corrected_data["data"] = json_data["traces"]
-        elif 'frames' in json_data and isinstance(json_data['frames'], list) and len(json_data['frames']) > 0:
-            if 'data' in json_data['frames'][0] and isinstance(json_data['frames'][0]['data'], list):
-                corrected_data["data"] = json_data["frames"][0]["data"]
-
-        # Проверяем макет
-        if 'layout' in json_data and isinstance(json_data['layout'], dict):
-            corrected_data["layout"] = json_data["layout"]
-
-        # Исправляем данные трасс
-        for i, trace in enumerate(corrected_data["data"]):
-            # Обработка координат x, y, z
-            for key in ['x', 'y', 'z']:
-                if key in trace and isinstance(trace[key], dict):
-                    # Преобразуем объекты с бинарными данными в обычные массивы
-                    if 'data' in trace[key] and isinstance(trace[key]['data'], list):
-                        corrected_data["data"][i][key] = trace[key]['data']
-                    elif 'original' in trace[key] and isinstance(trace[key]['original'], list):
-                        corrected_data["data"][i][key] = trace[key]['original']
-                    # Сохраняем ссылку на бинарные данные, если других нет
-                    elif 'bdata' in trace[key] and not corrected_data["data"][i][key]:
-                        # Просто оставим объект как есть, JavaScript-код попытается его обработать
-                        pass
-
-            # Убеждаемся, что trace имеет тип
-            if 'type' not in trace:
-                if 'mode' in trace and 'markers' in trace['mode']:
-                    corrected_data["data"][i]['type'] = 'scatter'
-                elif 'z' in trace and isinstance(trace['z'], list):
-                    corrected_data["data"][i]['type'] = 'contour'
-                else:
-                    corrected_data["data"][i]['type'] = 'scatter'
-
-        # Определяем, были ли внесены изменения
-        if corrected_data != json_data:
-            fixed = True
-            # Сохраняем исправленный файл
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(corrected_data, f, indent=2)
-            print(f"Файл визуализации исправлен и сохранен: {viz_name}")
-
-        return fixed
-    except Exception as e:
-        print(f"ОШИБКА при обработке файла визуализации {viz_name}: {str(e)}")
-        import traceback
-        traceback.print_exc()
-
-        # В случае ошибки создаем минимальный рабочий JSON
-        try:
-            minimal_data = {
-                "data": [{
-                    "type": "scatter",
-                    "mode": "lines",
-                    "x": [0, 1, 2, 3, 4, 5],
-                    "y": [0, 1, 0, 1, 0, 1],
-                    "name": "Данные недоступны"
-                }],
-                "layout": {
-                    "title": f"Ошибка загрузки: {viz_name}",
-                    "xaxis": {"title": "X"},
-                    "yaxis": {"title": "Y"}
-                }
-            }
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(minimal_data, f, indent=2)
-            print(f"Создан минимальный файл визуализации для {viz_name}")
-            return True
-        except:
-            return False
-
-
-def fix_all_visualization_files(project_id=None):
-    """Исправление всех файлов визуализации в директории результатов"""
-    results_folder = current_app.config['RESULTS_FOLDER']
-
-    if not os.path.exists(results_folder):
-        print(f"Директория результатов не найдена: {results_folder}")
-        return
-
-    print(f"Сканирование директории результатов: {results_folder}")
-
-    # Если указан конкретный проект, проверяем только его
-    if project_id:
-        project_dirs = [str(project_id)]
-    else:
-        # Сканируем все поддиректории проектов
-        project_dirs = [d for d in os.listdir(results_folder) if os.path.isdir(os.path.join(results_folder, d))]
-
-    print(f"Найдено {len(project_dirs)} директорий проектов")
-
-    for project_dir in project_dirs:
-        project_path = os.path.join(results_folder, project_dir)
-        try:
-            json_files = [f for f in os.listdir(project_path) if f.endswith('.json')]
-            print(f"Проект {project_dir}: найдено {len(json_files)} JSON-файлов")
-
-            for json_file in json_files:
-                viz_name = json_file.replace('.json', '')
-                fix_visualization_file(project_dir, viz_name)
-        except Exception as e:
-            print(f"Ошибка при сканировании проекта {project_dir}: {str(e)}")
-
-
 @main_bp.route('/project/<int:project_id>/image/<path:image_path>')
 @login_required
 def get_project_image(project_id, image_path):
     """
     Получение изображения визуализации для проекта
 
+    Изображения последнего результата строятся при первом запросе и хранятся
+    в кэше (utils.image_cache); изображения, сохраненные при расчете, отдаются из IMAGES_FOLDER.
+    Размер PNG выбирается параметром size: thumb, preview или full (по умолчанию).
+
     Args:
         project_id (int): ID проекта
         image_path (str): Относительный путь к изображению
     """
+    from utils.compression import send_precompressed
+    from utils.image_cache import FULL_SIZE, get_image_sizes
+
     project = Project.query.get_or_404(project_id)
 
     # Проверяем, что проект принадлежит текущему пользователю
@@ -673,40 +700,24 @@ def get_project_image(project_id, image_path):
 
     # Получаем только имя файла без путей
     filename = os.path.basename(image_path)
-    print(f"Имя файла: {filename}")
-
-    # Путь к папке пользователя
-    user_project_path = os.path.join(
-        current_app.config['IMAGES_FOLDER'],
-        f"user_{current_user.id}",
-        f"project_{project_id}"
-    )
+    name, extension = os.path.splitext(filename)
 
-    # Путь к файлу в папке пользователя
-    file_path = os.path.join(user_project_path, filename)
-    print(f"Ищем файл: {file_path}")
+    size = request.args.get('size', FULL_SIZE)
+    if size not in get_image_sizes():
+        return jsonify({'error': 'Invalid image size'}), 400
 
-    if os.path.exists(file_path):
-        print(f"Файл найден: {file_path}")
-        return send_from_directory(user_project_path, filename)
-
-    # Проверяем общую папку проекта
-    project_path = os.path.join(
-        current_app.config['IMAGES_FOLDER'],
-        f"project_{project_id}"
-    )
-
-    file_path = os.path.join(project_path, filename)
-    print(f"Ищем файл в общей директории: {file_path}")
-
-    if os.path.exists(file_path):
-        print(f"Файл найден: {file_path}")
-        return send_from_directory(project_path, filename)
-
-    print(f"Файл не найден")
-    return jsonify({'error': 'Image not found'}), 404
+    try:
+        file_path = find_project_image(project, name, extension.lstrip('.'), size)
+    except Exception as e:
+        print(f"ОШИБКА при построении изображения {filename}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Image rendering failed'}), 500
 
+    if file_path is None:
+        print(f"Файл не найден")
+        return jsonify({'error': 'Image not found'}), 404
 
+    return send_precompressed(os.path.dirname(file_path), os.path.basename(file_path))
 
 
 @main_bp.route('/project/<int:project_id>/download/image/<image_type>/<image_name>')
@@ -731,24 +742,15 @@ def download_project_image(project_id, image_type, image_name):
     if image_type not in ['png', 'svg']:
         return jsonify({'error': 'Invalid image type'}), 400
 
-    # Строим путь к изображению для конкретного пользователя и проекта
-    user_project_path = os.path.join(
-        current_app.config['IMAGES_FOLDER'],
-        f"user_{current_user.id}",
-        f"project_{project_id}"
-    )
-
-    # Если директории нет или изображения нет в папке пользователя, ищем в общей папке проекта
-    file_path = os.path.join(user_project_path, f"{image_name}.{image_type}")
-    if not os.path.exists(file_path):
-        user_project_path = os.path.join(
-            current_app.config['IMAGES_FOLDER'],
-            f"project_{project_id}"
-        )
-        file_path = os.path.join(user_project_path, f"{image_name}.{image_type}")
+    try:
+        file_path = find_project_image(project, image_name, image_type)
+    except Exception as e:
+        print(f"ОШИБКА при построении изображения {image_name}.{image_type}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Image rendering failed'}), 500
 
     # Проверяем существование файла
-    if not os.path.exists(file_path):
+    if file_path is None:
         return jsonify({'error': 'Image not found'}), 404
 
     # Более понятное имя файла для скачивания
@@ -756,8 +758,92 @@ def download_project_image(project_id, image_type, image_name):
 
     # Возвращаем изображение для скачивания с attachment_filename
     return send_from_directory(
-        user_project_path,
-        f"{image_name}.{image_type}",
+        os.path.dirname(file_path),
+        os.path.basename(file_path),
         as_attachment=True,
         download_name=download_name
-    )
\ No newline at end of file
+    )
+
+
+@main_bp.route('/project/<int:project_id>/results/<int:result_id>/image/<path:image_path>')
+@login_required
+def get_result_image(project_id, result_id, image_path):
+    """
+    Изображение визуализации конкретного результата
+
+    Изображение строится из рядов данных результата и не меняется,
+    поэтому ответ кэшируется браузером бессрочно.
+
+    Args:
+        project_id (int): ID проекта
+        result_id (int): ID результата
+        image_path (str): Имя файла изображения (<график>.<формат>)
+    """
+    from utils.compression import send_precompressed
+    from utils.http_cache import mark_immutable
+    from utils.image_cache import FULL_SIZE, get_image, get_image_sizes
+
+    project = Project.query.get_or_404(project_id)
+    result = ProjectResult.query.get_or_404(result_id)
+
+    # Проверяем, что проект принадлежит текущему пользователю и результат принадлежит проекту
+    if project.user_id != current_user.id or result.project_id != project_id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    name, extension = os.path.splitext(os.path.basename(image_path))
+    size = request.args.get('size', FULL_SIZE)
+    if size not in get_image_sizes():
+        return jsonify({'error': 'Invalid image size'}), 400
+
+    try:
+        file_path = get_image(result, name, extension.lstrip('.'), size)
+    except Exception as e:
+        print(f"ОШИБКА при построении изображения {image_path}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Image rendering failed'}), 500
+
+    if file_path is None:
+        return jsonify({'error': 'Image not found'}), 404
+
+    return mark_immutable(send_precompressed(os.path.dirname(file_path), os.path.basename(file_path)))
+
+
+def find_project_image(project, name, image_type, size='full'):
+    """
+    Поиск изображения последнего результата проекта
+
+    Если изображения были сохранены при расчете (в сводке есть image_paths), файл полного
+    размера берется из папки пользователя или общей папки проекта. Иначе изображение берется
+    из кэша и при необходимости строится из сохраненных рядов данных графиков.
+    Для результатов без рядов данных вместо уменьшенного размера отдается полный.
+
+    Args:
+        project (Project): Проект
+        name (str): Имя графика
+        image_type (str): Формат ('png' или 'svg')
+        size (str, optional): Размер изображения. Defaults to 'full'.
+
+    Returns:
+        str: Путь к файлу или None, если изображение недоступно
+    """
+    from utils.image_cache import get_image
+
+    filename = f"{name}.{image_type}"
+    result = project.results.order_by(ProjectResult.created_at.desc()).first()
+
+    if result is not None and (size != 'full' or 'image_paths' not in result.get_summary()):
+        file_path = get_image(result, name, image_type, size)
+        if file_path is not None:
+            return file_path
+
+    # Изображения, сохраненные при расчете: папка пользователя, затем общая папка проекта
+    for image_dir in (
+        os.path.join(current_app.config['IMAGES_FOLDER'], f"user_{project.user_id}", f"project_{project.id}"),
+        os.path.join(current_app.config['IMAGES_FOLDER'], f"project_{project.id}")
+    ):
+        file_path = os.path.join(image_dir, filename)
+        print(f"Ищем файл: {file_path}")
+        if os.path.exists(file_path):
+            return file_path
+
+    return None
@@ -0,0 +1,423 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Production-запуск приложения с предварительным форком воркеров.
+# Родительский процесс один раз загружает приложение и тяжелые модули, открывает сокеты
+# и запускает воркеры двух классов:
+#   web        - страницы и API, принимают внешние соединения;
+#   simulation - запуск моделирования, слушают внутренний порт на 127.0.0.1.
+# Web-воркеры передают запросы моделирования воркерам моделирования, поэтому долгий
+# расчет не блокирует остальных пользователей. Воркеры перезапускаются после
+# заданного числа запросов или при превышении порога RSS.
+# Запуск: python server.py (настройки SERVER_* в config.py)
+
+import http.client
+import os
+import re
+import resource
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from config import Config, ProductionConfig
+
+# Период проверки завершившихся воркеров и перезапуска в основном цикле, секунд
+WAIT_INTERVAL = 0.2
+
+# Заголовки, которые не передаются через прокси (hop-by-hop)
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailers', 'transfer-encoding', 'upgrade'
+}
+
+
+def get_config_class():
+    """Класс конфигурации с учетом FLASK_ENV (как в app.py)"""
+    return ProductionConfig if os.environ.get('FLASK_ENV') == 'production' else Config
+
+
+def get_rss_mb():
+    """Текущий RSS процесса в мегабайтах"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Нет /proc (например, macOS): используем пиковый RSS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+
+class RequestCounter:
+    """WSGI-обертка для подсчета обработанных воркером запросов"""
+
+    def __init__(self, app):
+        self.app = app
+        self.handled = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.handled += 1
+        return self.app(environ, start_response)
+
+
+class SimulationRouter:
+    """
+    WSGI-обертка web-воркера: запросы моделирования передаются воркерам моделирования
+
+    Запрос пересылается целиком, с исходными заголовками (Host, Cookie), поэтому
+    сессия, CSRF-токен и перенаправления работают так же, как без прокси.
+
+    Если ответ не получен за timeout секунд, расчет в воркере моделирования не прерывается
+    и сохранит результат. Поэтому вместо ошибки пользователь перенаправляется (303) на страницу
+    проекта с параметром simulation=running; результат появится на ней после завершения расчета.
+    """
+
+    def __init__(self, app, host, port, routes, timeout):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.routes = [re.compile(pattern) for pattern in routes]
+        self.timeout = timeout
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not any(route.match(path) for route in self.routes):
+            return self.app(environ, start_response)
+
+        return self.proxy(environ, start_response)
+
+    def proxy(self, environ, start_response):
+        """Пересылка запроса воркеру моделирования"""
+        path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+        if environ.get('QUERY_STRING'):
+            path += '?' + environ['QUERY_STRING']
+
+        headers = {}
+        for key, value in environ.items():
+            if key.startswith('HTTP_'):
+                name = key[5:].replace('_', '-').title()
+                if name.lower() not in HOP_BY_HOP_HEADERS:
+                    headers[name] = value
+        if environ.get('CONTENT_TYPE'):
+            headers['Content-Type'] = environ['CONTENT_TYPE']
+
+        try:
+            content_length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        body = environ['wsgi.input'].read(content_length) if content_length > 0 else None
+
+        forwarded_for = environ.get('HTTP_X_FORWARDED_FOR')
+        remote_addr = environ.get('REMOTE_ADDR', '')
+        headers['X-Forwarded-For'] = f'{forwarded_for}, {remote_addr}' if forwarded_for else remote_addr
+
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request(environ['REQUEST_METHOD'], path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except TimeoutError:
+            print(f"Нет ответа воркера моделирования за {self.timeout} с, расчет {path} продолжается")
+            return self.redirect_running(environ, start_response)
+        except (OSError, http.client.HTTPException) as e:
+            print(f"Ошибка передачи запроса воркеру моделирования: {e}")
+            start_response('503 Service Unavailable', [('Content-Type', 'text/plain; charset=utf-8')])
+            return ['Сервис моделирования временно недоступен'.encode('utf-8')]
+        finally:
+            connection.close()
+
+        response_headers = [
+            (name, value) for name, value in response.getheaders()
+            if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != 'content-length'
+        ]
+        response_headers.append(('Content-Length', str(len(data))))
+        start_response(f'{response.status} {response.reason}', response_headers)
+        return [data]
+
+    @staticmethod
+    def redirect_running(environ, start_response):
+        """Перенаправление на страницу проекта, пока расчет продолжается в воркере моделирования"""
+        path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+        location = re.sub(r'/run/?$', '', path) + '?simulation=running'
+        body = 'Расчет продолжается, результат появится на странице проекта'.encode('utf-8')
+        start_response('303 See Other', [
+            ('Location', location),
+            ('Content-Type', 'text/plain; charset=utf-8'),
+            ('Content-Length', str(len(body)))
+        ])
+        return [body]
+
+
+class PreforkServer:
+    """
+    Родительский процесс: предзагрузка приложения, форк и перезапуск воркеров
+
+    Args:
+        config_class (type): Класс конфигурации с настройками SERVER_*
+    """
+
+    def __init__(self, config_class):
+        self.config = config_class
+        self.sockets = {}
+        self.worker_counts = {
+            'web': max(1, config_class.SERVER_WORKERS),
+            'simulation': max(0, config_class.SERVER_SIMULATION_WORKERS)
+        }
+        self.workers = {}  # pid -> класс воркера
+        self.app = None
+        self.stopping = False
+        # Поочередный перезапуск (SIGHUP): воркеры, ожидающие замены, и воркеры, уже замененные новыми
+        self.reload_queue = []
+        self.retiring = set()
+
+    def load_app(self):
+        """Загрузка приложения в родительском процессе (создание таблиц выполняется один раз)"""
+        from app import app
+        from utils.startup import preload_shared_modules
+
+        # Тяжелые модули загружаются до форка и используются воркерами совместно (copy-on-write)
+        if not app.config['PRELOAD_HEAVY_MODULES']:
+            preload_shared_modules()
+
+        self.app = app
+
+    def open_sockets(self):
+        """Открытие сокетов до форка, чтобы все воркеры класса принимали соединения с одного сокета"""
+        self.sockets['web'] = socket.create_server(
+            (self.config.SERVER_HOST, self.config.SERVER_PORT), backlog=128
+        )
+        if self.worker_counts['simulation']:
+            self.sockets['simulation'] = socket.create_server(
+                ('127.0.0.1', self.config.SERVER_SIMULATION_PORT), backlog=128
+            )
+
+    def run(self):
+        """Запуск сервера и контроль воркеров до получения SIGTERM/SIGINT"""
+        self.load_app()
+        self.open_sockets()
+
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+
+        print(f"Сервер запущен на {self.config.SERVER_HOST}:{self.config.SERVER_PORT}: "
+              f"web-воркеров {self.worker_counts['web']}, "
+              f"воркеров моделирования {self.worker_counts['simulation']}")
+
+        for worker_class, count in self.worker_counts.items():
+            for _ in range(count):
+                self.spawn_worker(worker_class)
+
+        while self.workers:
+            if self.reload_queue and not self.stopping:
+                self.replace_worker(self.reload_queue.pop(0))
+
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            if pid == 0:
+                time.sleep(WAIT_INTERVAL)
+                continue
+
+            worker_class = self.workers.pop(pid, None)
+            if worker_class is None:
+                continue
+
+            # Замененный при перезапуске воркер уже имеет преемника
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+
+            if not self.stopping:
+                if os.waitstatus_to_exitcode(status) != 0:
+                    print(f"Воркер {worker_class} (pid {pid}) завершился с ошибкой, перезапуск")
+                    # Не перезапускаем упавший воркер в цикле без паузы
+                    time.sleep(1)
+                self.spawn_worker(worker_class)
+
+        for sock in self.sockets.values():
+            sock.close()
+        print("Сервер остановлен")
+
+    def spawn_worker(self, worker_class, ready_fd=None):
+        """
+        Форк воркера заданного класса
+
+        Args:
+            worker_class (str): 'web' или 'simulation'
+            ready_fd (int, optional): Канал, в который воркер пишет байт, когда готов принимать запросы.
+                Defaults to None.
+
+        Returns:
+            int: pid воркера
+        """
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = worker_class
+            return pid
+
+        # Дочерний процесс
+        exit_code = 0
+        try:
+            Worker(self, worker_class, ready_fd).run()
+        except Exception as e:
+            print(f"Ошибка воркера {worker_class}: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def handle_stop(self, signum, frame):
+        """Остановка: воркеры завершают текущие запросы и выходят"""
+        self.stopping = True
+        for pid in list(self.workers):
+            self.signal_worker(pid, signal.SIGTERM)
+
+    def handle_reload(self, signum, frame):
+        """
+        Плавный перезапуск всех воркеров (SIGHUP)
+
+        Воркеры заменяются по одному в основном цикле (replace_worker), поэтому
+        число воркеров, принимающих запросы, не уменьшается.
+        """
+        self.reload_queue = [pid for pid in self.workers if pid not in self.retiring]
+        print(f"Поочередный перезапуск воркеров: {len(self.reload_queue)}")
+
+    def replace_worker(self, pid):
+        """
+        Замена воркера: запуск преемника, ожидание его готовности и остановка прежнего воркера
+
+        Прежний воркер получает SIGTERM только после запуска преемника и завершает текущий
+        запрос (в том числе расчет моделирования) перед выходом.
+        """
+        worker_class = self.workers.get(pid)
+        if worker_class is None or pid in self.retiring:
+            return
+
+        read_fd, write_fd = os.pipe()
+        try:
+            new_pid = self.spawn_worker(worker_class, ready_fd=write_fd)
+            os.close(write_fd)
+            write_fd = None
+            ready, _, _ = select.select([read_fd], [], [], self.config.SERVER_WORKER_START_TIMEOUT)
+            if not ready or not os.read(read_fd, 1):
+                print(f"Воркер {worker_class} (pid {new_pid}) не запустился, прежний воркер {pid} оставлен")
+                self.retiring.add(new_pid)
+                self.signal_worker(new_pid, signal.SIGTERM)
+                return
+        finally:
+            os.close(read_fd)
+            if write_fd is not None:
+                os.close(write_fd)
+
+        self.retiring.add(pid)
+        self.signal_worker(pid, signal.SIGTERM)
+
+    @staticmethod
+    def signal_worker(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+class Worker:
+    """
+    Дочерний процесс, обслуживающий запросы до достижения лимитов перезапуска
+
+    Args:
+        server (PreforkServer): Родительский сервер (сокеты, приложение, настройки)
+        worker_class (str): 'web' или 'simulation'
+    """
+
+    def __init__(self, server, worker_class, ready_fd=None):
+        self.server = server
+        self.worker_class = worker_class
+        self.config = server.config
+        self.ready_fd = ready_fd
+        self.stopping = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+
+        # Соединения с БД, открытые родителем, не должны использоваться совместно
+        from extensions import db
+        with self.server.app.app_context():
+            db.engine.dispose(close=False)
+
+        # Сокеты другого класса воркеру не нужны
+        for name, sock in self.server.sockets.items():
+            if name != self.worker_class:
+                sock.close()
+
+        app = self.server.app
+        if self.worker_class == 'web' and 'simulation' in self.server.sockets:
+            app = SimulationRouter(
+                app, '127.0.0.1', self.config.SERVER_SIMULATION_PORT,
+                self.config.SERVER_SIMULATION_ROUTES, self.config.SERVER_SIMULATION_TIMEOUT
+            )
+        counter = RequestCounter(app)
+
+        if self.worker_class == 'simulation':
+            # Один расчет за раз: параллелизм обеспечивается числом воркеров
+            max_requests = self.config.SERVER_SIMULATION_MAX_REQUESTS
+            threaded = False
+            host = '127.0.0.1'
+        else:
+            max_requests = self.config.SERVER_MAX_REQUESTS
+            threaded = True
+            host = self.config.SERVER_HOST
+
+        sock = self.server.sockets[self.worker_class]
+        httpd = make_server(host, sock.getsockname()[1], counter, threaded=threaded, fd=sock.fileno())
+        # Потоки запросов не демонические: перед выходом воркер дожидается их завершения
+        httpd.daemon_threads = False
+        httpd.block_on_close = True
+        # Периодическая проверка лимитов и сигнала остановки при отсутствии запросов
+        httpd.timeout = 1.0
+
+        # Сообщаем родителю о готовности (при поочередном перезапуске)
+        if self.ready_fd is not None:
+            os.write(self.ready_fd, b'1')
+            os.close(self.ready_fd)
+            self.ready_fd = None
+
+        reason = 'остановка сервера'
+        while not self.stopping:
+            httpd.handle_request()
+
+            if counter.handled >= max_requests:
+                reason = f'обработано запросов: {counter.handled}'
+                break
+            rss = get_rss_mb()
+            if rss > self.config.SERVER_MAX_RSS_MB:
+                reason = f'RSS {rss:.0f} МБ'
+                break
+
+        # Ожидаем завершения запросов, выполняющихся в потоках
+        httpd.server_close()
+
+        # Дожидаемся фоновых изображений (SVG) в пуле построения, если он запускался
+        render_pool = sys.modules.get('core.render_pool')
+        if render_pool is not None:
+            render_pool.shutdown_pool(wait=True)
+
+        print(f"Воркер {self.worker_class} (pid {os.getpid()}) завершается: {reason}")
+
+    def handle_stop(self, signum, frame):
+        self.stopping = True
+
+
+if __name__ == '__main__':
+    PreforkServer(get_config_class()).run()
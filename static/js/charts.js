@@ -1,5 +1,40 @@
 // charts.js - Скрипты для визуализации результатов моделирования
 
+// Конструкторы массивов для кодов dtype Plotly
+const TYPED_ARRAY_TYPES = {
+    f8: Float64Array, f4: Float32Array,
+    i4: Int32Array, u4: Uint32Array,
+    i2: Int16Array, u2: Uint16Array,
+    i1: Int8Array, u1: Uint8Array
+};
+
+// Декодирование typed array Plotly ({dtype, bdata, shape}) без разбора чисел из текста
+function decodeTypedArray(value) {
+    const ArrayType = TYPED_ARRAY_TYPES[value.dtype];
+    if (!ArrayType) {
+        throw new Error(`Неподдерживаемый тип данных: ${value.dtype}`);
+    }
+
+    const binary = atob(value.bdata);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    const array = new ArrayType(bytes.buffer);
+
+    if (!value.shape) {
+        return array;
+    }
+
+    // Двумерный массив (z контурного графика): строки - представления одного буфера
+    const shape = Array.isArray(value.shape) ? value.shape : String(value.shape).split(',').map(Number);
+    const rows = [];
+    for (let i = 0; i < shape[0]; i++) {
+        rows.push(array.subarray(i * shape[1], (i + 1) * shape[1]));
+    }
+    return rows;
+}
+
 // Функция для отображения визуализации из JSON
 function renderVisualization(containerId, jsonData, config = {}) {
     const container = document.getElementById(containerId);
@@ -81,34 +116,24 @@ function renderVisualization(containerId, jsonData, config = {}) {
 
     // Обработка данных в трассах (traces)
     plotData.data.forEach(trace => {
-        // Обработка x, y, z координат
-        ['x', 'y', 'z'].forEach(key => {
-            if (trace[key] && typeof trace[key] === 'object' && !Array.isArray(trace[key])) {
-                // Извлекаем данные из бинарных объектов
-                if (trace[key].bdata || trace[key].data || trace[key].original) {
-                    if (Array.isArray(trace[key].data)) {
-                        trace[key] = trace[key].data;
-                    } else if (Array.isArray(trace[key].original)) {
-                        trace[key] = trace[key].original;
-                    } else if (trace[key].bdata) {
-                        // Если у нас только бинарные данные, попробуем восстановить массив
-                        try {
-                            const decodedData = atob(trace[key].bdata);
-                            const values = [];
-                            for (let i = 0; i < decodedData.length; i += 8) {
-                                const value = new DataView(new ArrayBuffer(8));
-                                for (let j = 0; j < 8; j++) {
-                                    value.setUint8(j, decodedData.charCodeAt(i + j));
-                                }
-                                values.push(value.getFloat64(0, true));
-                            }
-                            trace[key] = values;
-                        } catch (e) {
-                            console.error(`Ошибка декодирования бинарных данных для ${key}:`, e);
-                            trace[key] = [0, 1, 2, 3, 4]; // Заполняем фиктивными данными
-                        }
-                    }
+        // Декодируем бинарные массивы (typed array Plotly) и объекты старого формата
+        ['x', 'y', 'z', 'customdata'].forEach(key => {
+            const value = trace[key];
+            if (!value || typeof value !== 'object' || Array.isArray(value) || ArrayBuffer.isView(value)) {
+                return;
+            }
+
+            if (value.bdata) {
+                try {
+                    trace[key] = decodeTypedArray(value);
+                } catch (e) {
+                    console.error(`Ошибка декодирования бинарных данных для ${key}:`, e);
+                    trace[key] = [];
                 }
+            } else if (Array.isArray(value.data)) {
+                trace[key] = value.data;
+            } else if (Array.isArray(value.original)) {
+                trace[key] = value.original;
             }
         });
 
@@ -554,7 +579,7 @@ if (containerId === 'capillary-pressure') {
 }
 
 // Функция для загрузки визуализации с сервера
-function loadVisualization(containerId, projectId, visualizationName, config = {}) {
+function loadVisualization(containerId, projectId, visualizationName, config = {}, url = null) {
     // Показываем индикатор загрузки
     const container = document.getElementById(containerId);
     if (!container) {
@@ -574,11 +599,11 @@ function loadVisualization(containerId, projectId, visualizationName, config = {
         </div>
     `;
 
-    // Добавляем временную метку для предотвращения кэширования
-    const timestamp = new Date().getTime();
+    // Адрес с версией результата кэшируется браузером, адрес последнего результата проверяется по ETag
+    const visualizationUrl = url || `/project/${projectId}/visualization/${visualizationName}`;
 
     // Загружаем данные визуализации
-    fetch(`/project/${projectId}/visualization/${visualizationName}?t=${timestamp}`)
+    fetch(visualizationUrl)
         .then(response => {
             if (!response.ok) {
                 if (response.status === 404) {
@@ -615,8 +640,49 @@ function loadVisualization(containerId, projectId, visualizationName, config = {
         });
 }
 
+// Загрузка всех визуализаций результата одним запросом
+function loadVisualizationBundle(bundleUrl, projectId, items, visualizationUrls = {}) {
+    items.forEach(viz => {
+        const container = document.getElementById(viz.id);
+        if (container) {
+            container.innerHTML = `
+                <div class="d-flex justify-content-center align-items-center" style="height: 300px;">
+                    <div class="spinner-border text-primary" role="status">
+                        <span class="visually-hidden">Загрузка...</span>
+                    </div>
+                </div>
+            `;
+        }
+    });
+
+    fetch(bundleUrl)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Ошибка сервера: ${response.status} ${response.statusText}`);
+            }
+            return response.json();
+        })
+        .then(bundle => {
+            const charts = bundle.visualizations || {};
+            items.forEach(viz => {
+                if (charts[viz.name]) {
+                    renderVisualization(viz.id, charts[viz.name], viz.config);
+                } else {
+                    // Графика нет в наборе - загружаем отдельно
+                    loadVisualization(viz.id, projectId, viz.name, viz.config, visualizationUrls[viz.name]);
+                }
+            });
+        })
+        .catch(error => {
+            console.error('Ошибка загрузки набора визуализаций, загружаем по отдельности:', error);
+            items.forEach(viz => {
+                loadVisualization(viz.id, projectId, viz.name, viz.config, visualizationUrls[viz.name]);
+            });
+        });
+}
+
 // Полностью переработанная функция для создания панели с несколькими визуализациями
-function createVisualizationDashboard(containerId, projectId, visualizations) {
+function createVisualizationDashboard(containerId, projectId, visualizations, visualizationUrls = {}, bundleUrl = null) {
     const container = document.getElementById(containerId);
     if (!container) {
         console.error(`Контейнер с id ${containerId} не найден`);
@@ -893,14 +959,23 @@ function createVisualizationDashboard(containerId, projectId, visualizations) {
     ];
 
     // Загружаем все доступные визуализации
-    allVisualizations.forEach(viz => {
-        if (enhancedContainsVisualization(visualizations, viz.name)) {
-            loadVisualization(viz.id, projectId, viz.name, viz.config);
-        } else {
+    const availableVisualizations = allVisualizations.filter(viz => {
+        const available = enhancedContainsVisualization(visualizations, viz.name);
+        if (!available) {
             console.log(`Визуализация ${viz.name} недоступна или не найдена.`);
         }
+        return available;
     });
 
+    if (bundleUrl) {
+        // Все графики результата одним запросом
+        loadVisualizationBundle(bundleUrl, projectId, availableVisualizations, visualizationUrls);
+    } else {
+        availableVisualizations.forEach(viz => {
+            loadVisualization(viz.id, projectId, viz.name, viz.config, visualizationUrls[viz.name]);
+        });
+    }
+
     // Добавляем обработчики событий для табов
     const tabs = container.querySelectorAll('.nav-link');
     tabs.forEach(tab => {
@@ -940,7 +1015,7 @@ function createResultsSummaryTable(containerId, results) {
     }
 
     // Проверяем наличие данных
-    if (!results || !results.breakthrough_time || !results.recovery_factor) {
+    if (!results || !results.breakthrough_time || !(results.final_recovery || results.recovery_factor)) {
         container.innerHTML = '<div class="alert alert-warning">Нет данных для отображения</div>';
         return;
     }
@@ -957,10 +1032,18 @@ function createResultsSummaryTable(containerId, results) {
     }
 
     // Вычисляем коэффициент нефтеотдачи на 100-й день (или последний доступный)
-    const recoveryTimeIndex = results.recovery_factor.time.length - 1;
-    const recoveryTime = results.recovery_factor.time[recoveryTimeIndex];
-    const recoveryWithCap = results.recovery_factor.with_cap[recoveryTimeIndex];
-    const recoveryWithoutCap = results.recovery_factor.without_cap[recoveryTimeIndex];
+    // Сводка результата содержит только конечные значения (final_recovery), полные ряды - recovery_factor
+    let recoveryTime, recoveryWithCap, recoveryWithoutCap;
+    if (results.final_recovery) {
+        recoveryTime = results.final_recovery.time;
+        recoveryWithCap = results.final_recovery.with_cap;
+        recoveryWithoutCap = results.final_recovery.without_cap;
+    } else {
+        const recoveryTimeIndex = results.recovery_factor.time.length - 1;
+        recoveryTime = results.recovery_factor.time[recoveryTimeIndex];
+        recoveryWithCap = results.recovery_factor.with_cap[recoveryTimeIndex];
+        recoveryWithoutCap = results.recovery_factor.without_cap[recoveryTimeIndex];
+    }
 
     // Получаем время прорыва
     const breakthroughWithCap = results.breakthrough_time.with_cap;
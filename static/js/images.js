@@ -20,11 +20,8 @@ function loadProjectImages(projectId, format = 'png') {
         </div>
     `;
 
-    // Добавляем временную метку для предотвращения кэширования
-    const timestamp = new Date().getTime();
-
-    // Загружаем список изображений
-    fetch(`/api/project/${projectId}/images?t=${timestamp}`)
+    // Загружаем список изображений (актуальность проверяется сервером по ETag)
+    fetch(`/api/project/${projectId}/images`)
         .then(response => {
             console.log('Ответ от сервера:', response.status, response.statusText);
             if (!response.ok) {
@@ -50,13 +47,18 @@ function loadProjectImages(projectId, format = 'png') {
                 return;
             }
 
+            // Адрес изображений результата (неизменяемые адреса кэшируются браузером)
+            const baseUrl = data.base_url || `/project/${projectId}/image`;
+
             // Создаем содержимое с изображениями
             imagesContainer.innerHTML = `
                 <div class="row">
                     ${imageNames.map(name => {
                         // Создаем простой путь только с именем файла
                         const filename = name + '.' + format;
-                        const imageUrl = `/project/${projectId}/image/${filename}`;
+                        const imageUrl = `${baseUrl}/${filename}`;
+                        // На странице показываем превью, полный размер - при увеличении
+                        const previewUrl = format === 'png' ? `${imageUrl}?size=preview` : imageUrl;
                         console.log(`Сформированный URL для ${name}: ${imageUrl}`);
                         
                         return `
@@ -71,8 +73,8 @@ function loadProjectImages(projectId, format = 'png') {
                                 </div>
                                 <div class="card-body text-center">
                                     <div class="position-relative">
-                                        <img src="${imageUrl}" alt="${formatImageName(name)}" 
-                                             class="img-fluid visualization-image" style="max-height: 400px;"
+                                        <img src="${previewUrl}" data-full-src="${imageUrl}" alt="${formatImageName(name)}"
+                                             class="img-fluid visualization-image" style="max-height: 400px;" loading="lazy"
                                              onerror="this.onerror=null; console.error('Ошибка загрузки изображения:', this.src); this.style.display='none'; this.nextElementSibling.style.display='block';">
                                         <div class="alert alert-warning mt-3" style="display:none;">
                                             <i class="fas fa-exclamation-triangle"></i> Не удалось загрузить изображение. 
@@ -90,7 +92,7 @@ function loadProjectImages(projectId, format = 'png') {
             document.querySelectorAll('.visualization-image').forEach(img => {
                 img.addEventListener('click', function() {
                     if (this.style.display !== 'none') {
-                        showFullsizeImage(this.src, this.alt);
+                        showFullsizeImage(this.dataset.fullSrc || this.src, this.alt);
                     }
                 });
             });
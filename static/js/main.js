@@ -101,6 +101,20 @@ function validateModelParameters(parameters) {
     });
 }
 
+// Список статистики файла для предварительного просмотра
+function renderPreviewStats(data) {
+    return `
+        <li>Всего строк: ${data.total_rows}</li>
+        ${Object.entries(data.stats).map(([col, stat]) => {
+            if (stat.type === 'numeric') {
+                return `<li>${col}: мин = ${formatNumber(stat.min)}, макс = ${formatNumber(stat.max)}, среднее = ${formatNumber(stat.mean)}</li>`;
+            } else {
+                return `<li>${col}: ${stat.unique} уникальных значений</li>`;
+            }
+        }).join('')}
+    `;
+}
+
 // Функция для предварительного просмотра загруженного файла
 function previewFile(file, fileType) {
     const formData = new FormData();
@@ -194,15 +208,8 @@ function previewFile(file, fileType) {
                         </div>
                         <div class="mt-3">
                             <h6>Статистика:</h6>
-                            <ul>
-                                <li>Всего строк: ${data.total_rows}</li>
-                                ${Object.entries(data.stats).map(([col, stat]) => {
-                                    if (stat.type === 'numeric') {
-                                        return `<li>${col}: мин = ${formatNumber(stat.min)}, макс = ${formatNumber(stat.max)}, среднее = ${formatNumber(stat.mean)}</li>`;
-                                    } else {
-                                        return `<li>${col}: ${stat.unique} уникальных значений</li>`;
-                                    }
-                                }).join('')}
+                            <ul id="${modalId}-stats">
+                                ${data.stats ? renderPreviewStats(data) : '<li class="text-muted">Статистика рассчитывается...</li>'}
                             </ul>
                         </div>
                     </div>
@@ -220,6 +227,22 @@ function previewFile(file, fileType) {
         const modalElement = new bootstrap.Modal(modal);
         modalElement.show();
 
+        // Первые строки показываются сразу, статистика по всему файлу запрашивается отдельно
+        if (!data.stats && data.stats_url) {
+            const statsList = document.getElementById(`${modalId}-stats`);
+            fetch(data.stats_url)
+                .then(response => response.json())
+                .then(stats => {
+                    statsList.innerHTML = stats.error
+                        ? `<li class="text-danger">${stats.error}</li>`
+                        : renderPreviewStats(stats);
+                })
+                .catch(error => {
+                    console.error('Ошибка при расчете статистики файла:', error);
+                    statsList.innerHTML = '<li class="text-danger">Не удалось рассчитать статистику</li>';
+                });
+        }
+
         return data;
     })
     .catch(error => {
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Потоковое чтение больших таблиц (история добычи по скважинам и т.п.).
+# CSV читается C-парсером pandas блоками по CHUNK_ROWS строк; по каждому блоку обновляется
+# статистика колонок (мин/макс/среднее/СКО - слиянием моментов блоков, число уникальных значений),
+# так что таблица и ее статистика получаются за один проход по файлу.
+# Для предварительного просмотра читаются только первые строки файла.
+
+import numpy as np
+import pandas as pd
+
+from utils.csv_dialect import detect_dialect, is_excel, read_csv
+
+# Строк в одном блоке чтения
+CHUNK_ROWS = 100000
+
+# Строк в предварительном просмотре
+PREVIEW_ROWS = 10
+
+
+class ColumnStats:
+    """Накапливаемая статистика колонки"""
+
+    def __init__(self):
+        self.kinds = set()
+        # Числовые значения: число, среднее, сумма квадратов отклонений, минимум, максимум
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        # Нечисловые значения: уникальные значения и наличие пропусков
+        self.values = set()
+        self.has_missing = False
+
+    def update(self, column):
+        """Учет очередного блока значений колонки"""
+        if pd.api.types.is_numeric_dtype(column):
+            self.kinds.add('numeric')
+            values = column.to_numpy(dtype=float, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            if not len(values):
+                return
+
+            # Слияние моментов блока с накопленными (Chan et al.)
+            n = len(values)
+            mean = values.mean()
+            m2 = ((values - mean) ** 2).sum()
+            total = self.count + n
+            delta = mean - self.mean
+            self.mean += delta * n / total
+            self.m2 += m2 + delta * delta * self.count * n / total
+            self.count = total
+            self.min = np.fmin(self.min, values.min())
+            self.max = np.fmax(self.max, values.max())
+        else:
+            self.kinds.add('categorical')
+            missing = column.isna()
+            self.has_missing = self.has_missing or bool(missing.any())
+            self.values.update(column[~missing].unique().tolist())
+
+    def to_dict(self):
+        """Статистика в формате предварительного просмотра файла"""
+        if self.kinds == {'numeric'}:
+            return {
+                'min': float(self.min),
+                'max': float(self.max),
+                'mean': float(self.mean) if self.count else float('nan'),
+                'std': float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan'),
+                'type': 'numeric'
+            }
+        return {
+            'unique': len(self.values) + int(self.has_missing),
+            'type': 'categorical'
+        }
+
+
+class TableStats:
+    """Статистика колонок таблицы, накапливаемая по блокам"""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        """Учет очередного блока строк"""
+        self.rows += len(chunk)
+        for i, name in enumerate(chunk.columns):
+            self.columns.setdefault(name, ColumnStats()).update(chunk.iloc[:, i])
+
+    def mixed_columns(self):
+        """Колонки, разобранные в разных блоках как числовые и нечисловые"""
+        return [name for name, stats in self.columns.items() if len(stats.kinds) > 1]
+
+    def to_dict(self):
+        """Статистика {колонка: {...}}"""
+        return {str(name): stats.to_dict() for name, stats in self.columns.items()}
+
+
+def table_stats(df):
+    """Статистика уже прочитанной таблицы"""
+    stats = TableStats()
+    stats.update(df)
+    return stats
+
+
+def read_chunked(file_path, dialect=None, chunk_rows=CHUNK_ROWS):
+    """
+    Чтение CSV-файла блоками со статистикой колонок за один проход
+
+    Args:
+        file_path (str): Путь к файлу
+        dialect (dict, optional): Формат CSV (utils.csv_dialect). Defaults to None (определяется по файлу).
+        chunk_rows (int, optional): Строк в блоке. Defaults to CHUNK_ROWS.
+
+    Returns:
+        tuple: (pandas.DataFrame, dict) - данные и статистика {'rows': ..., 'columns': {...}}
+    """
+    if dialect is None:
+        dialect = detect_dialect(file_path)
+
+    stats = TableStats()
+    chunks = []
+    with read_csv(file_path, dialect, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            stats.update(chunk)
+            chunks.append(chunk)
+
+    if len(chunks) == 1:
+        df = chunks[0]
+    elif chunks:
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = read_csv(file_path, dialect)
+
+    # Колонка с числами и текстом в разных блоках объединяется в одну колонку object,
+    # ее статистика пересчитывается по итоговым значениям (как при чтении файла целиком)
+    for name in stats.mixed_columns():
+        stats.columns[name] = ColumnStats()
+        stats.columns[name].update(df[name])
+
+    return df, {'rows': stats.rows, 'columns': stats.to_dict()}
+
+
+def read_file(file_path, dialect=None, chunk_rows=CHUNK_ROWS):
+    """
+    Чтение CSV- или Excel-файла со статистикой колонок
+
+    Returns:
+        tuple: (pandas.DataFrame, dict) - данные и статистика
+    """
+    if is_excel(file_path):
+        df = pd.read_excel(file_path)
+        return df, {'rows': len(df), 'columns': table_stats(df).to_dict()}
+    return read_chunked(file_path, dialect, chunk_rows)
+
+
+def read_preview(file_path, dialect=None, rows=PREVIEW_ROWS):
+    """
+    Первые строки файла без разбора всего файла
+
+    Returns:
+        pandas.DataFrame: Первые строки
+    """
+    if is_excel(file_path):
+        return pd.read_excel(file_path, nrows=rows)
+    return read_csv(file_path, dialect, nrows=rows)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Сжатие ответов (gzip, brotli).
+# Артефакты (JSON-визуализации, SVG) сжимаются один раз при записи: рядом с файлом
+# сохраняются <файл>.gz и <файл>.br, которые отдаются с Content-Encoding, если клиент их принимает.
+# Динамические JSON- и SVG-ответы сжимаются при отправке (after_request).
+# Brotli используется, если установлен пакет brotli; иначе - только gzip.
+
+import gzip
+import os
+import uuid
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Расширения сжатых копий файлов по кодировкам
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# Типы содержимого, которые имеет смысл сжимать
+COMPRESSIBLE_MIMETYPES = {'application/json', 'image/svg+xml', 'text/csv'}
+
+# Ответы меньше этого размера не сжимаются
+MIN_COMPRESS_SIZE = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Для файлов, сжимаемых один раз при записи, - максимальная степень сжатия
+PRECOMPRESS_GZIP_LEVEL = 9
+PRECOMPRESS_BROTLI_QUALITY = 11
+
+
+def available_encodings():
+    """Поддерживаемые кодировки в порядке предпочтения"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress_bytes(content, encoding, precompress=False):
+    """
+    Сжатие данных
+
+    Args:
+        content (bytes): Данные
+        encoding (str): 'gzip' или 'br'
+        precompress (bool, optional): Максимальная степень сжатия. Defaults to False.
+
+    Returns:
+        bytes: Сжатые данные
+    """
+    if encoding == 'br':
+        return brotli.compress(content, quality=PRECOMPRESS_BROTLI_QUALITY if precompress else BROTLI_QUALITY)
+    # mtime=0: одинаковые данные дают одинаковый результат (стабильный ETag)
+    return gzip.compress(content, compresslevel=PRECOMPRESS_GZIP_LEVEL if precompress else GZIP_LEVEL, mtime=0)
+
+
+def precompress_file(file_path, content=None):
+    """
+    Запись сжатых копий файла (<файл>.gz, <файл>.br)
+
+    Args:
+        file_path (str): Путь к файлу
+        content (bytes, optional): Содержимое файла, если уже прочитано. Defaults to None.
+
+    Returns:
+        list: Кодировки, для которых записаны копии
+    """
+    if content is None:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+
+    encodings = []
+    for encoding in available_encodings():
+        compressed_path = file_path + ENCODING_SUFFIXES[encoding]
+        temp_path = f'{compressed_path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(compress_bytes(content, encoding, precompress=True))
+        os.replace(temp_path, compressed_path)
+        encodings.append(encoding)
+    return encodings
+
+
+def remove_compressed_copies(file_path):
+    """Удаление сжатых копий файла"""
+    for suffix in ENCODING_SUFFIXES.values():
+        try:
+            os.remove(file_path + suffix)
+        except OSError:
+            pass
+
+
+def negotiate_encoding(encodings=None):
+    """
+    Выбор кодировки по заголовку Accept-Encoding запроса
+
+    Args:
+        encodings (list, optional): Доступные кодировки. Defaults to None (available_encodings()).
+
+    Returns:
+        str: Кодировка или None, если клиент не принимает ни одну из доступных
+    """
+    best = None
+    best_quality = 0
+    for encoding in encodings or available_encodings():
+        quality = request.accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def send_precompressed(directory, filename, mimetype=None, etag=None, **kwargs):
+    """
+    Отправка файла; при наличии подходящей сжатой копии - копии с Content-Encoding
+
+    Args:
+        directory (str): Директория файла
+        filename (str): Имя файла
+        mimetype (str, optional): Тип содержимого исходного файла. Defaults to None.
+        etag (str, optional): ETag исходного файла (для копии добавляется кодировка). Defaults to None.
+
+    Returns:
+        flask.Response: Ответ
+    """
+    encodings = [encoding for encoding in available_encodings()
+                 if os.path.exists(os.path.join(directory, filename + ENCODING_SUFFIXES[encoding]))]
+    encoding = negotiate_encoding(encodings) if encodings else None
+
+    if encoding is None:
+        response = send_from_directory(directory, filename, mimetype=mimetype,
+                                       etag=etag if etag is not None else True, **kwargs)
+    else:
+        response = send_from_directory(directory, filename + ENCODING_SUFFIXES[encoding],
+                                       mimetype=mimetype, etag=f'{etag}-{encoding}' if etag else True, **kwargs)
+        response.headers['Content-Encoding'] = encoding
+
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_compression(app):
+    """Сжатие динамических JSON- и SVG-ответов"""
+
+    @app.after_request
+    def compress_response(response):
+        """Сжимает ответ, если клиент принимает gzip/brotli"""
+        if not app.config['COMPRESS_RESPONSES']:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if (response.direct_passthrough or response.status_code != 200
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        content = response.get_data()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return response
+
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+
+        response.set_data(compress_bytes(content, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
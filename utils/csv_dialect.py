@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Определение формата CSV-файлов (кодировка, разделитель, десятичный знак).
+# Формат определяется один раз по первым килобайтам файла (BOM, проверка UTF-8 / chardet,
+# csv.Sniffer) и сохраняется вместе с данными проекта (ProjectData.file_dialects).
+# Чтение выполняется одним проходом C-парсера pandas с известными параметрами.
+
+import codecs
+import csv
+import io
+import os
+import re
+
+# Объем начала файла, по которому определяется формат
+SAMPLE_SIZE = 64 * 1024
+
+# Кодировки с маркером порядка байтов
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+]
+
+# Допустимые разделители в порядке предпочтения
+DELIMITERS = ',;\t|'
+
+# Формат по умолчанию
+DEFAULT_DIALECT = {'encoding': 'utf-8', 'sep': ',', 'decimal': '.'}
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+# Число с десятичной запятой: "0,25", "-1,5E-3"
+_COMMA_NUMBER = re.compile(r'^\s*-?\d+,\d+([eE][-+]?\d+)?\s*$')
+
+
+def is_excel(file_name):
+    """Файл Excel (формат CSV для него не определяется)"""
+    return os.path.splitext(file_name)[1].lower() in EXCEL_EXTENSIONS
+
+
+def detect_encoding(sample):
+    """
+    Кодировка по началу файла
+
+    Args:
+        sample (bytes): Начало файла
+
+    Returns:
+        str: Имя кодировки
+    """
+    for bom, encoding in BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+
+    # Корректный UTF-8 (последний символ выборки может быть обрезан)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        import chardet
+        result = chardet.detect(sample)
+        if result['encoding'] and result['confidence'] >= 0.5:
+            return result['encoding'].lower()
+    except ImportError:
+        pass
+
+    # Однобайтовые кодировки: буквы кириллицы в CP1251 занимают диапазон 0xC0-0xFF
+    high = [b for b in sample if b >= 0x80]
+    if high and sum(b >= 0xC0 for b in high) / len(high) > 0.5:
+        return 'cp1251'
+    return 'cp1252'
+
+
+def detect_separator(lines):
+    """Разделитель колонок по первым строкам текста"""
+    # Разделитель, который встречается в каждой строке (включая заголовок) одинаковое число раз;
+    # десятичная запятая в данных так не проходит - ее нет в заголовке
+    for sep in DELIMITERS:
+        counts = {line.count(sep) for line in lines}
+        if len(counts) == 1 and counts.pop() > 0:
+            return sep
+
+    # Поля в кавычках с разделителем внутри
+    try:
+        return csv.Sniffer().sniff('\n'.join(lines), delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return DEFAULT_DIALECT['sep']
+
+
+def detect_decimal(lines, sep):
+    """Десятичный знак: запятая, если числа вида "0,25" встречаются в колонках"""
+    if sep == ',':
+        return '.'
+    for row in csv.reader(lines[1:], delimiter=sep):
+        if any(_COMMA_NUMBER.match(field) for field in row):
+            return ','
+    return '.'
+
+
+def detect_dialect(source):
+    """
+    Определение формата CSV по началу файла
+
+    Args:
+        source (str or bytes): Путь к файлу или содержимое файла
+
+    Returns:
+        dict: {'encoding': ..., 'sep': ..., 'decimal': ...}
+    """
+    if isinstance(source, (bytes, bytearray)):
+        sample = bytes(source[:SAMPLE_SIZE])
+    else:
+        with open(source, 'rb') as f:
+            sample = f.read(SAMPLE_SIZE)
+
+    encoding = detect_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample, final=False)
+
+    # Последняя строка выборки может быть неполной
+    lines = text.splitlines()
+    if len(sample) == SAMPLE_SIZE and len(lines) > 1:
+        lines = lines[:-1]
+    lines = [line for line in lines[:50] if line.strip()]
+    if not lines:
+        return dict(DEFAULT_DIALECT, encoding=encoding)
+
+    sep = detect_separator(lines)
+    return {'encoding': encoding, 'sep': sep, 'decimal': detect_decimal(lines, sep)}
+
+
+def detect_file_dialect(file_path):
+    """
+    Формат загруженного файла для сохранения в ProjectData
+
+    Returns:
+        dict: Формат CSV или None для файлов Excel
+    """
+    if is_excel(file_path):
+        return None
+    return detect_dialect(file_path)
+
+
+def read_csv(source, dialect=None, **kwargs):
+    """
+    Чтение CSV C-парсером pandas с известным форматом
+
+    Args:
+        source (str or bytes): Путь к файлу или содержимое файла
+        dialect (dict, optional): Формат (detect_dialect). Defaults to None (определяется по файлу).
+
+    Returns:
+        pandas.DataFrame: Данные файла
+    """
+    import pandas as pd
+
+    if dialect is None:
+        dialect = detect_dialect(source)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    return pd.read_csv(source, encoding=dialect['encoding'], sep=dialect['sep'],
+                       decimal=dialect['decimal'], engine='c', **kwargs)
+
+
+def read_table(source, file_name, dialect=None, **kwargs):
+    """
+    Чтение CSV- или Excel-файла
+
+    Args:
+        source (str or bytes): Путь к файлу или содержимое файла
+        file_name (str): Имя файла (по расширению выбирается способ чтения)
+        dialect (dict, optional): Формат CSV. Defaults to None (определяется по файлу).
+
+    Returns:
+        pandas.DataFrame: Данные файла
+    """
+    if is_excel(file_name):
+        import pandas as pd
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        return pd.read_excel(source, **kwargs)
+    return read_csv(source, dialect, **kwargs)
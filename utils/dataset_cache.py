@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Кэш разобранных входных таблиц (CSV/Excel).
+# Загруженный файл разбирается один раз и сохраняется в колоночном бинарном виде
+# (npz: по массиву NumPy на колонку с исходным типом) в DATASET_CACHE_FOLDER/<SHA-256 содержимого>.npz.
+# Ключ - хэш содержимого, поэтому повторные запуски моделирования и одинаковые файлы
+# разных проектов читают готовые массивы без разбора текста.
+# CSV разбирается блоками (utils.chunked_reader); статистика колонок, собранная за тот же проход,
+# хранится в метаданных файла кэша и читается без загрузки массивов.
+
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from utils.chunked_reader import read_file
+from utils.csv_dialect import detect_dialect, is_excel
+
+# Версия формата файлов кэша (при изменении старые файлы разбираются заново)
+FORMAT_VERSION = 1
+
+# Хэши файлов текущего процесса: {путь: (размер, mtime_ns, хэш)}
+_file_hashes = {}
+
+
+def file_sha256(file_path):
+    """
+    SHA-256 содержимого файла
+
+    Хэш запоминается в процессе и пересчитывается только при изменении размера или mtime.
+    """
+    stat = os.stat(file_path)
+    cached = _file_hashes.get(file_path)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    sha = digest.hexdigest()
+    _file_hashes[file_path] = (stat.st_size, stat.st_mtime_ns, sha)
+    return sha
+
+
+def remember_file_hash(file_path, sha):
+    """Запоминает хэш файла, посчитанный при его записи (без повторного чтения файла)"""
+    stat = os.stat(file_path)
+    _file_hashes[file_path] = (stat.st_size, stat.st_mtime_ns, sha)
+
+
+def parse_file(file_path, dialect=None):
+    """
+    Разбор CSV- или Excel-файла
+
+    Args:
+        file_path (str): Путь к файлу
+        dialect (dict, optional): Формат CSV (utils.csv_dialect). Defaults to None (определяется по файлу).
+
+    Returns:
+        tuple: (pandas.DataFrame, dict, dict) - данные, параметры разбора и статистика колонок
+    """
+    if is_excel(file_path):
+        df, stats = read_file(file_path)
+        return df, {'format': 'excel'}, stats
+
+    if dialect is None:
+        dialect = detect_dialect(file_path)
+    df, stats = read_file(file_path, dialect)
+    return df, dict(dialect, format='csv'), stats
+
+
+def _encode_frame(df):
+    """
+    Преобразование DataFrame в словарь массивов для npz
+
+    Returns:
+        tuple: (dict, list) - массивы колонок (c<i>) с масками пропусков строк (m<i>)
+            и описания колонок, или None, если в таблице есть колонки, которые нельзя сохранить без pickle
+    """
+    arrays = {}
+    columns = []
+    for i, name in enumerate(df.columns):
+        column = df.iloc[:, i]
+        kind = column.dtype.kind
+        if kind in 'biufM' and isinstance(column.dtype, np.dtype):
+            arrays[f'c{i}'] = column.to_numpy()
+            columns.append({'name': name, 'kind': 'array'})
+        elif kind == 'O':
+            mask = column.isna().to_numpy()
+            values = column[~mask]
+            if not all(isinstance(value, str) for value in values):
+                return None
+            arrays[f'c{i}'] = np.array(column.where(~mask, '').tolist(), dtype=str)
+            arrays[f'm{i}'] = mask
+            columns.append({'name': name, 'kind': 'str'})
+        else:
+            return None
+
+    if not all(isinstance(col['name'], (str, int, float)) for col in columns):
+        return None
+    return arrays, columns
+
+
+def _decode_frame(data, columns):
+    """Сборка DataFrame из массивов npz"""
+    series = {}
+    for i, col in enumerate(columns):
+        values = data[f'c{i}']
+        if col['kind'] == 'str':
+            values = values.astype(object)
+            values[data[f'm{i}']] = np.nan
+        series[i] = values
+
+    df = pd.DataFrame(series)
+    df.columns = [col['name'] for col in columns]
+    return df
+
+
+def get_cache_path(cache_dir, sha):
+    """Путь к файлу кэша для хэша содержимого"""
+    return os.path.join(cache_dir, f'{sha}.npz')
+
+
+def _read_cache_file(cache_path, decode):
+    """Метаданные (и, если decode, таблица) файла кэша или None"""
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != FORMAT_VERSION:
+                return None
+            return meta, (_decode_frame(data, meta['columns']) if decode else None)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Поврежденный файл кэша {cache_path}: {str(e)}")
+        return None
+
+
+def read_cached(cache_path):
+    """
+    Чтение таблицы из файла кэша
+
+    Returns:
+        tuple: (pandas.DataFrame, dict) или None, если файла нет или формат устарел
+    """
+    cached = _read_cache_file(cache_path, decode=True)
+    if cached is None:
+        return None
+    meta, df = cached
+    return df, meta['parse']
+
+
+def read_cached_stats(cache_path):
+    """
+    Статистика колонок из метаданных файла кэша (массивы не читаются)
+
+    Returns:
+        tuple: (dict, dict) - статистика и параметры разбора, или None, если статистики нет
+    """
+    cached = _read_cache_file(cache_path, decode=False)
+    if cached is None or 'stats' not in cached[0]:
+        return None
+    return cached[0]['stats'], cached[0]['parse']
+
+
+def write_cached(cache_path, df, parse_info, stats=None):
+    """
+    Запись таблицы в файл кэша (атомарно)
+
+    Args:
+        stats (dict, optional): Статистика колонок (utils.chunked_reader). Defaults to None.
+
+    Returns:
+        bool: True, если таблица сохранена
+    """
+    encoded = _encode_frame(df)
+    if encoded is None:
+        return False
+
+    arrays, columns = encoded
+    meta = {'version': FORMAT_VERSION, 'columns': columns, 'parse': parse_info, 'rows': len(df)}
+    if stats is not None:
+        meta['stats'] = stats
+    arrays['meta'] = np.array(json.dumps(meta, ensure_ascii=False))
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temp_path = f'{cache_path}.{uuid.uuid4().hex}.tmp'
+    try:
+        # Без сжатия: при чтении массивы копируются из файла без распаковки
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, cache_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return True
+
+
+def _dialect_matches(parse_info, dialect):
+    """Таблица разобрана с сохраненным форматом (формат, исправленный вручную, требует нового разбора)"""
+    return dialect is None or all(parse_info.get(key) == value for key, value in dialect.items())
+
+
+def _ingest(file_path, cache_path, dialect):
+    """Разбор файла и сохранение таблицы со статистикой в кэш"""
+    df, parse_info, stats = parse_file(file_path, dialect)
+    try:
+        if not write_cached(cache_path, df, parse_info, stats):
+            print(f"Таблица {os.path.basename(file_path)} не сохранена в кэш: неподдерживаемые типы колонок")
+    except OSError as e:
+        print(f"Ошибка при сохранении таблицы в кэш: {str(e)}")
+    return df, stats
+
+
+def load_dataframe(file_path, cache_dir=None, dialect=None):
+    """
+    Таблица из CSV- или Excel-файла; разобранные данные берутся из кэша
+
+    Args:
+        file_path (str): Путь к файлу
+        cache_dir (str, optional): Директория кэша (DATASET_CACHE_FOLDER). Defaults to None (без кэша).
+        dialect (dict, optional): Сохраненный формат CSV. Defaults to None (определяется по файлу).
+
+    Returns:
+        pandas.DataFrame: Данные файла
+    """
+    if not cache_dir:
+        return parse_file(file_path, dialect)[0]
+
+    cache_path = get_cache_path(cache_dir, file_sha256(file_path))
+    cached = read_cached(cache_path)
+    if cached is not None and _dialect_matches(cached[1], dialect):
+        return cached[0]
+
+    return _ingest(file_path, cache_path, dialect)[0]
+
+
+def load_table_stats(file_path, cache_dir=None, dialect=None, parse=True):
+    """
+    Статистика колонок файла (число строк, мин/макс/среднее/СКО, число уникальных значений)
+
+    Если таблица уже в кэше, статистика читается из метаданных без разбора файла;
+    иначе файл разбирается одним потоковым проходом и сохраняется в кэш.
+
+    Args:
+        parse (bool, optional): Разбирать файл, если таблицы нет в кэше. Defaults to True.
+
+    Returns:
+        dict: {'rows': ..., 'columns': {колонка: {...}}} или None, если таблицы нет в кэше и parse=False
+    """
+    if not cache_dir:
+        return parse_file(file_path, dialect)[2] if parse else None
+
+    cache_path = get_cache_path(cache_dir, file_sha256(file_path))
+    cached = read_cached_stats(cache_path)
+    if cached is not None and _dialect_matches(cached[1], dialect):
+        return cached[0]
+    if not parse:
+        return None
+
+    return _ingest(file_path, cache_path, dialect)[1]
+
+
+def load_derived(cache_dir, file_path, name, build):
+    """
+    Таблица, вычисленная по файлу данных (например, подобранные параметры), из кэша
+
+    Кэшируется по хэшу содержимого исходного файла; name должно включать версию
+    и параметры расчета.
+
+    Args:
+        cache_dir (str): Директория кэша (None - таблица вычисляется без кэша)
+        file_path (str): Путь к исходному файлу
+        name (str): Имя расчета
+        build (callable): Функция без аргументов, возвращающая pandas.DataFrame
+
+    Returns:
+        pandas.DataFrame: Вычисленная таблица
+    """
+    if not cache_dir or not file_path:
+        return build()
+
+    cache_path = get_cache_path(cache_dir, f'{file_sha256(file_path)}.{name}')
+    cached = read_cached(cache_path)
+    if cached is not None:
+        return cached[0]
+
+    df = build()
+    try:
+        write_cached(cache_path, df, {'derived': name})
+    except OSError as e:
+        print(f"Ошибка при сохранении таблицы в кэш: {str(e)}")
+    return df
+
+
+def load_derived_json(cache_dir, file_path, name, build):
+    """
+    Результат проверки или расчета по файлу данных в виде JSON-объекта из кэша
+
+    Кэшируется по хэшу содержимого исходного файла, как load_derived.
+
+    Args:
+        cache_dir (str): Директория кэша (None - результат вычисляется без кэша)
+        file_path (str): Путь к исходному файлу
+        name (str): Имя расчета (с версией и параметрами)
+        build (callable): Функция без аргументов, возвращающая словарь (None не кэшируется)
+
+    Returns:
+        dict: Результат
+    """
+    if not cache_dir or not file_path:
+        return build()
+
+    cache_path = os.path.join(cache_dir, f'{file_sha256(file_path)}.{name}.json')
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Поврежденный файл кэша {cache_path}: {str(e)}")
+
+    result = build()
+    if result is None:
+        return None
+
+    temp_path = f'{cache_path}.{uuid.uuid4().hex}.tmp'
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Ошибка при сохранении результата в кэш: {str(e)}")
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return result
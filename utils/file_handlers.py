@@ -1,11 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import hashlib
 import os
+import time
 import uuid
 from werkzeug.utils import secure_filename
-import pandas as pd
-import numpy as np
+
+# Поддиректория UPLOAD_FOLDER с файлами, хранимыми по хэшу содержимого
+STORE_FOLDER = 'store'
+
+# Размер блока записи загружаемого файла, байт
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Поддиректория TEMP_FOLDER с файлами предварительного просмотра, ожидающими расчета статистики
+PREVIEW_FOLDER = 'preview'
 
 
 def allowed_file(filename, allowed_extensions):
@@ -22,6 +31,24 @@ def allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 
+def _stream_to_file(file, file_path):
+    """
+    Запись загруженного файла на диск блоками с одновременным подсчетом SHA-256
+
+    Returns:
+        tuple: (str, int) - хэш содержимого и размер файла в байтах
+    """
+    digest = hashlib.sha256()
+    size = 0
+    stream = file.stream
+    with open(file_path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            f.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
 def save_uploaded_file(file, upload_folder, project_id):
     """
     Сохраняет загруженный файл в указанную директорию
@@ -37,11 +64,6 @@ def save_uploaded_file(file, upload_folder, project_id):
     try:
         print(f"Сохранение файла {file.filename} в папку {upload_folder}")
 
-        # Проверка существования директории
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder, exist_ok=True)
-            print(f"Создана директория: {upload_folder}")
-
         # Получаем безопасное имя файла
         filename = secure_filename(file.filename)
 
@@ -53,59 +75,109 @@ def save_uploaded_file(file, upload_folder, project_id):
         # Создаем папку для проекта, если она не существует
         project_folder = os.path.join(upload_folder, str(project_id))
         os.makedirs(project_folder, exist_ok=True)
-        print(f"Проверка существования директории проекта: {os.path.exists(project_folder)}")
 
-        # Полный путь к файлу
+        # Файл записывается блоками; хэш содержимого, посчитанный при записи,
+        # используется кэшем разобранных таблиц без повторного чтения файла
+        from utils.dataset_cache import remember_file_hash
+
         file_path = os.path.join(project_folder, unique_filename)
+        sha, size = _stream_to_file(file, file_path)
+        remember_file_hash(file_path, sha)
 
-        # Проверка на доступность пути для записи
-        try:
-            with open(file_path, 'wb') as f:
-                f.write(b'test')
-            os.remove(file_path)
-            print(f"Путь {file_path} доступен для записи")
-        except Exception as e:
-            print(f"Ошибка при проверке доступности пути: {str(e)}")
-            # Пробуем альтернативный путь в текущей директории
-            current_dir = os.getcwd()
-            file_path = os.path.join(current_dir, 'temp_uploads', unique_filename)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            print(f"Используем альтернативный путь: {file_path}")
+        print(f"Файл успешно сохранен по пути: {file_path}. Размер: {size} байт")
+        return unique_filename, file_path
+    except Exception as e:
+        import traceback
+        print(f"Ошибка при сохранении файла: {str(e)}")
+        traceback.print_exc()
+        return None, None
 
-        # Сохраняем файл
-        print(f"Попытка сохранения файла по пути: {file_path}")
-        file.save(file_path)
 
-        # Проверяем, что файл сохранен и существует
+def store_uploaded_file(file, upload_folder):
+    """
+    Сохраняет загруженный файл в хранилище по хэшу содержимого
+
+    Файл записывается во временный файл с одновременным подсчетом SHA-256 и переносится
+    в UPLOAD_FOLDER/store/<2 символа хэша>/<хэш><расширение>. Одинаковые файлы разных проектов
+    хранятся один раз, а их разобранные таблицы и подобранные параметры кэшируются общими.
+
+    Args:
+        file (FileStorage): Объект загруженного файла
+        upload_folder (str): Путь к директории загрузок (UPLOAD_FOLDER)
+
+    Returns:
+        tuple: (str, str) - (путь к файлу относительно upload_folder, полный путь) или (None, None) в случае ошибки
+    """
+    from utils.dataset_cache import remember_file_hash
+
+    temp_path = None
+    try:
+        print(f"Сохранение файла {file.filename} в хранилище {upload_folder}")
+
+        ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+        store_folder = os.path.join(upload_folder, STORE_FOLDER)
+        os.makedirs(store_folder, exist_ok=True)
+
+        temp_path = os.path.join(store_folder, f'{uuid.uuid4().hex}.tmp')
+        sha, size = _stream_to_file(file, temp_path)
+
+        relative_path = os.path.join(STORE_FOLDER, sha[:2], f'{sha}{ext}')
+        file_path = os.path.join(upload_folder, relative_path)
         if os.path.exists(file_path):
-            file_size = os.path.getsize(file_path)
-            print(f"Файл успешно сохранен по пути: {file_path}. Размер: {file_size} байт")
-            # Выводим содержимое директории для отладки
-            dir_path = os.path.dirname(file_path)
-            print(f"Содержимое директории {dir_path}: {os.listdir(dir_path)}")
+            print(f"Файл уже есть в хранилище: {file_path}")
         else:
-            print(f"КРИТИЧЕСКАЯ ОШИБКА: Файл не был сохранен по пути {file_path}")
-            return None, None
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.replace(temp_path, file_path)
+            print(f"Файл успешно сохранен по пути: {file_path}. Размер: {size} байт")
+        remember_file_hash(file_path, sha)
 
-        return unique_filename, file_path
+        return relative_path, file_path
     except Exception as e:
         import traceback
         print(f"Ошибка при сохранении файла: {str(e)}")
         traceback.print_exc()
         return None, None
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def remove_stale_files(folder, max_age):
+    """
+    Удаляет файлы директории, измененные более max_age секунд назад
+
+    Returns:
+        int: Число удаленных файлов
+    """
+    removed = 0
+    threshold = time.time() - max_age
+    try:
+        entries = list(os.scandir(folder))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < threshold:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
 
 
-def read_csv_file(file_path, encoding='utf-8'):
+def read_csv_file(file_path, dialect=None):
     """
     Читает CSV-файл и возвращает DataFrame
 
     Args:
         file_path (str): Путь к файлу
-        encoding (str, optional): Кодировка файла. Defaults to 'utf-8'.
+        dialect (dict, optional): Формат файла (utils.csv_dialect). Defaults to None (определяется по файлу).
 
     Returns:
         pandas.DataFrame: DataFrame с данными из файла или None в случае ошибки
     """
+    from utils.csv_dialect import detect_dialect, read_csv
+
     try:
         print(f"Попытка чтения CSV файла: {file_path}")
 
@@ -114,64 +186,17 @@ def read_csv_file(file_path, encoding='utf-8'):
             print(f"Ошибка: файл не существует по пути {file_path}")
             return None
 
-        # Пробуем различные варианты чтения CSV
-        encodings = ['utf-8', 'cp1251', 'cp1252', 'latin1']
-        separators = [',', ';', '\t']
-
-        for enc in encodings:
-            for sep in separators:
-                try:
-                    print(f"Пробуем прочитать с кодировкой {enc} и разделителем '{sep}'")
-                    df = pd.read_csv(file_path, encoding=enc, sep=sep, quotechar='"', escapechar='\\')
-
-                    # Проверяем, что данные прочитаны корректно (более 1 столбца)
-                    if len(df.columns) > 1:
-                        print(f"Успешно прочитан файл с кодировкой {enc} и разделителем '{sep}'")
-                        print(f"Размер данных: {df.shape}, колонки: {list(df.columns)}")
-                        return df
-                    else:
-                        print(f"Прочитан только один столбец, вероятно, неверный разделитель")
-                except Exception as e:
-                    print(f"Ошибка чтения с кодировкой {enc} и разделителем '{sep}': {str(e)}")
-                    continue
-
-        # Если не удалось прочитать как CSV, пробуем прочитать как текстовый файл
-        print("Не удалось прочитать как CSV, пробуем прочитать как текстовый файл")
-        with open(file_path, 'rb') as f:
-            content = f.read(1024)  # Читаем первые 1024 байта
-
-        # Определяем кодировку
-        detected_encoding = 'utf-8'  # По умолчанию
-        try:
-            import chardet
-            result = chardet.detect(content)
-            detected_encoding = result['encoding']
-            print(f"Обнаружена кодировка: {detected_encoding} с уверенностью {result['confidence']}")
-        except ImportError:
-            print("Модуль chardet не установлен, используем стандартную кодировку")
-
-        # Выводим первые строки файла для диагностики
-        try:
-            with open(file_path, 'r', encoding=detected_encoding, errors='replace') as f:
-                first_lines = [next(f) for _ in range(5)]
-            print(f"Первые 5 строк файла:")
-            for line in first_lines:
-                print(line.strip())
-
-            # Пробуем определить разделитель
-            possible_seps = [sep for sep in separators if any(sep in line for line in first_lines)]
-            print(f"Возможные разделители: {possible_seps}")
+        if dialect is None:
+            dialect = detect_dialect(file_path)
+        print(f"Формат файла: кодировка {dialect['encoding']}, разделитель '{dialect['sep']}', "
+              f"десятичный знак '{dialect['decimal']}'")
 
-        except Exception as e:
-            print(f"Ошибка при чтении первых строк файла: {str(e)}")
-
-        print("Не удалось прочитать файл как CSV")
-        return None
+        df = read_csv(file_path, dialect)
+        print(f"Размер данных: {df.shape}, колонки: {list(df.columns)}")
+        return df
 
     except Exception as e:
-        print(f"Неожиданная ошибка при чтении файла {file_path}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        print(f"Ошибка при чтении файла {file_path}: {str(e)}")
         return None
 
 
@@ -185,6 +210,8 @@ def read_excel_file(file_path):
     Returns:
         pandas.DataFrame: DataFrame с данными из файла или None в случае ошибки
     """
+    import pandas as pd
+
     try:
         df = pd.read_excel(file_path)
         return df
@@ -213,61 +240,50 @@ def save_dataframe_to_csv(df, file_path, encoding='utf-8'):
         return False
 
 
-def extract_data_from_file(file_path, file_type):
+def extract_data_from_file(file_path, file_type, dialect=None, cache_dir=None):
     """
     Извлекает данные из файла в зависимости от его типа
 
     Args:
         file_path (str): Путь к файлу
         file_type (str): Тип файла ('rock_properties', 'capillary_pressure', etc.)
+        dialect (dict, optional): Сохраненный формат CSV-файла. Defaults to None.
+        cache_dir (str, optional): Директория кэша разобранных таблиц. Defaults to None.
 
     Returns:
         dict: Словарь с извлеченными данными или None в случае ошибки
     """
+    import pandas as pd
+    from utils.dataset_cache import load_dataframe
+    from utils.file_schema import FILE_SCHEMAS, match_columns
+
     try:
         # Определяем расширение файла
         ext = os.path.splitext(file_path)[1].lower()
-
-        # Читаем файл в зависимости от расширения
-        if ext == '.csv':
-            df = read_csv_file(file_path)
-        elif ext in ['.xlsx', '.xls']:
-            df = read_excel_file(file_path)
-        else:
+        if ext not in ['.csv', '.xlsx', '.xls']:
             print(f"Неподдерживаемое расширение файла: {ext}")
             return None
 
-        if df is None:
+        # Файл разбирается один раз (повторно - из кэша разобранных таблиц)
+        try:
+            df = load_dataframe(file_path, cache_dir=cache_dir, dialect=dialect)
+        except Exception as e:
+            print(f"Ошибка при чтении файла {file_path}: {str(e)}")
+            return None
+
+        if file_type not in FILE_SCHEMAS:
+            print(f"Неизвестный тип файла: {file_type}")
             return None
 
-        # Проверим и преобразуем колонки, если нужно
-        if file_type == 'rock_properties':
-            # Проверяем наличие обязательных колонок или близких к ним вариантов
-            required_columns = ['ID_Sample', 'Porosity_fr', 'Permeability_mD', 'Rock_Type']
-            column_mapping = {}
-
-            for req_col in required_columns:
-                if req_col in df.columns:
-                    column_mapping[req_col] = req_col
-                else:
-                    # Ищем похожие колонки
-                    for col in df.columns:
-                        if req_col.lower() in col.lower() or col.lower() in req_col.lower():
-                            column_mapping[req_col] = col
-                            break
-
-            # Если не нашли соответствия для обязательных колонок
-            missing_cols = [col for col in required_columns if col not in column_mapping]
-            if missing_cols:
-                print(f"В файле отсутствуют обязательные колонки: {missing_cols}")
-                return None
-
-            # Переименовываем колонки, если нужно
-            if column_mapping:
-                reversed_mapping = {v: k for k, v in column_mapping.items() if v != k}
-                if reversed_mapping:
-                    df = df.rename(columns=reversed_mapping)
+        # Проверяем наличие обязательных колонок или близких к ним вариантов (схема типа файла)
+        required_columns = FILE_SCHEMAS[file_type]['required']
+        df, missing_cols = match_columns(df, required_columns)
+        if missing_cols:
+            print(f"В файле отсутствуют обязательные колонки: {missing_cols}")
+            return None
 
+        # Извлекаем данные в зависимости от типа файла
+        if file_type == 'rock_properties':
             # Извлекаем средние значения по каждому типу породы
             rock_types = df['Rock_Type'].unique()
             data = {}
@@ -286,32 +302,6 @@ def extract_data_from_file(file_path, file_type):
             return data
 
         elif file_type == 'capillary_pressure':
-            # Проверяем наличие обязательных колонок или их вариантов
-            required_columns = ['ID_Sample', 'Water_Saturation', 'Pc_Drainage_MPa']
-            column_mapping = {}
-
-            for req_col in required_columns:
-                if req_col in df.columns:
-                    column_mapping[req_col] = req_col
-                else:
-                    # Ищем похожие колонки
-                    for col in df.columns:
-                        if req_col.lower() in col.lower() or col.lower() in req_col.lower():
-                            column_mapping[req_col] = col
-                            break
-
-            # Если не нашли соответствия для обязательных колонок
-            missing_cols = [col for col in required_columns if col not in column_mapping]
-            if missing_cols:
-                print(f"В файле отсутствуют обязательные колонки: {missing_cols}")
-                return None
-
-            # Переименовываем колонки, если нужно
-            if column_mapping:
-                reversed_mapping = {v: k for k, v in column_mapping.items() if v != k}
-                if reversed_mapping:
-                    df = df.rename(columns=reversed_mapping)
-
             # Группируем данные по образцам
             samples = df['ID_Sample'].unique()
             data = {}
@@ -335,32 +325,6 @@ def extract_data_from_file(file_path, file_type):
             return data
 
         elif file_type == 'relative_perm':
-            # Проверяем наличие обязательных колонок или их вариантов
-            required_columns = ['ID_Sample', 'Water_Saturation', 'Krw_Drainage', 'Kro_Drainage']
-            column_mapping = {}
-
-            for req_col in required_columns:
-                if req_col in df.columns:
-                    column_mapping[req_col] = req_col
-                else:
-                    # Ищем похожие колонки
-                    for col in df.columns:
-                        if req_col.lower() in col.lower() or col.lower() in req_col.lower():
-                            column_mapping[req_col] = col
-                            break
-
-            # Если не нашли соответствия для обязательных колонок
-            missing_cols = [col for col in required_columns if col not in column_mapping]
-            if missing_cols:
-                print(f"В файле отсутствуют обязательные колонки: {missing_cols}")
-                return None
-
-            # Переименовываем колонки, если нужно
-            if column_mapping:
-                reversed_mapping = {v: k for k, v in column_mapping.items() if v != k}
-                if reversed_mapping:
-                    df = df.rename(columns=reversed_mapping)
-
             # Группируем данные по образцам
             samples = df['ID_Sample'].unique()
             data = {}
@@ -386,32 +350,6 @@ def extract_data_from_file(file_path, file_type):
             return data
 
         elif file_type == 'pvt_data':
-            # Проверяем наличие обязательных колонок или их вариантов
-            required_columns = ['Pressure_MPa', 'Oil_Viscosity_cP']
-            column_mapping = {}
-
-            for req_col in required_columns:
-                if req_col in df.columns:
-                    column_mapping[req_col] = req_col
-                else:
-                    # Ищем похожие колонки
-                    for col in df.columns:
-                        if req_col.lower() in col.lower() or col.lower() in req_col.lower():
-                            column_mapping[req_col] = col
-                            break
-
-            # Если не нашли соответствия для обязательных колонок
-            missing_cols = [col for col in required_columns if col not in column_mapping]
-            if missing_cols:
-                print(f"В файле отсутствуют обязательные колонки: {missing_cols}")
-                return None
-
-            # Переименовываем колонки, если нужно
-            if column_mapping:
-                reversed_mapping = {v: k for k, v in column_mapping.items() if v != k}
-                if reversed_mapping:
-                    df = df.rename(columns=reversed_mapping)
-
             # Преобразуем колонки в числовой формат
             for col in required_columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
@@ -434,32 +372,6 @@ def extract_data_from_file(file_path, file_type):
             return data
 
         elif file_type == 'production_data':
-            # Проверяем наличие обязательных колонок или их вариантов
-            required_columns = ['Date', 'Oil_Rate_m3_day', 'Water_Rate_m3_day']
-            column_mapping = {}
-
-            for req_col in required_columns:
-                if req_col in df.columns:
-                    column_mapping[req_col] = req_col
-                else:
-                    # Ищем похожие колонки
-                    for col in df.columns:
-                        if req_col.lower() in col.lower() or col.lower() in req_col.lower():
-                            column_mapping[req_col] = col
-                            break
-
-            # Если не нашли соответствия для обязательных колонок
-            missing_cols = [col for col in required_columns if col not in column_mapping]
-            if missing_cols:
-                print(f"В файле отсутствуют обязательные колонки: {missing_cols}")
-                return None
-
-            # Переименовываем колонки, если нужно
-            if column_mapping:
-                reversed_mapping = {v: k for k, v in column_mapping.items() if v != k}
-                if reversed_mapping:
-                    df = df.rename(columns=reversed_mapping)
-
             # Преобразуем числовые колонки в правильный формат
             numeric_cols = ['Oil_Rate_m3_day', 'Water_Rate_m3_day']
             for col in numeric_cols:
@@ -491,10 +403,6 @@ def extract_data_from_file(file_path, file_type):
 
             return data
 
-        else:
-            print(f"Неизвестный тип файла: {file_type}")
-            return None
-
     except Exception as e:
         print(f"Ошибка при извлечении данных из файла {file_path}: {str(e)}")
         import traceback
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Схемы входных файлов проекта и их проверка.
+# FILE_SCHEMAS - единый реестр требований к пяти типам файлов (обязательные колонки, числовые
+# колонки и их диапазоны, даты, минимальное число точек и монотонность кривых образца).
+# Файл разбирается один раз (через кэш разобранных таблиц utils.dataset_cache), проверка
+# выполняется векторно по всей таблице; отчет кэшируется по хэшу содержимого файла
+# и используется повторно при загрузке данных для расчета.
+
+import numpy as np
+import pandas as pd
+
+from utils.dataset_cache import load_dataframe, load_derived_json
+
+# Версия правил проверки (входит в ключ кэша отчетов)
+SCHEMA_VERSION = 1
+
+# Реестр схем: {тип файла: схема}
+#   title - название файла в сообщениях
+#   required - обязательные колонки
+#   numeric - числовые колонки и допустимые значения: min, max, exclusive (строгая нижняя граница)
+#   dates - колонки с датами
+#   sample - колонка образца и минимальное число точек образца
+#   saturation, monotonic - колонки, монотонные внутри образца с ростом насыщенности
+#       (1 - не убывает, -1 - не возрастает)
+FILE_SCHEMAS = {
+    'rock_properties': {
+        'title': 'свойств породы',
+        'required': ['ID_Sample', 'Porosity_fr', 'Permeability_mD', 'Rock_Type'],
+        'numeric': {
+            'Porosity_fr': {'min': 0, 'max': 1},
+            'Permeability_mD': {'min': 0}
+        }
+    },
+    'capillary_pressure': {
+        'title': 'капиллярного давления',
+        'required': ['ID_Sample', 'Water_Saturation', 'Pc_Drainage_MPa'],
+        'numeric': {
+            'Water_Saturation': {'min': 0, 'max': 1},
+            'Pc_Drainage_MPa': {}
+        },
+        'sample': {'column': 'ID_Sample', 'min_points': 3},
+        'saturation': 'Water_Saturation',
+        'monotonic': {'Pc_Drainage_MPa': -1}
+    },
+    'relative_perm': {
+        'title': 'относительной проницаемости',
+        'required': ['ID_Sample', 'Water_Saturation', 'Krw_Drainage', 'Kro_Drainage'],
+        'numeric': {
+            'Water_Saturation': {'min': 0, 'max': 1},
+            'Krw_Drainage': {'min': 0, 'max': 1},
+            'Kro_Drainage': {'min': 0, 'max': 1}
+        },
+        'sample': {'column': 'ID_Sample', 'min_points': 3},
+        'saturation': 'Water_Saturation',
+        'monotonic': {'Krw_Drainage': 1, 'Kro_Drainage': -1}
+    },
+    'pvt_data': {
+        'title': 'PVT-данных',
+        'required': ['Pressure_MPa', 'Oil_Viscosity_cP'],
+        'numeric': {
+            'Pressure_MPa': {'min': 0, 'exclusive': True},
+            'Oil_Viscosity_cP': {'min': 0, 'exclusive': True}
+        }
+    },
+    'production_data': {
+        'title': 'данных добычи',
+        'required': ['Date', 'Oil_Rate_m3_day', 'Water_Rate_m3_day'],
+        'numeric': {
+            'Oil_Rate_m3_day': {'min': 0},
+            'Water_Rate_m3_day': {'min': 0}
+        },
+        'dates': ['Date']
+    }
+}
+
+# Образцов, перечисляемых в сообщении
+MAX_LISTED_SAMPLES = 5
+
+SUCCESS_MESSAGE = "Файл соответствует требованиям"
+
+
+def _range_message(column, limits):
+    """Сообщение о нарушении допустимого диапазона значений колонки"""
+    low, high = limits.get('min'), limits.get('max')
+    if low is not None and high is not None:
+        return f"Значения в колонке '{column}' должны быть в диапазоне от {low} до {high}"
+    if low == 0:
+        kind = 'положительными' if limits.get('exclusive') else 'неотрицательными'
+        return f"Значения в колонке '{column}' должны быть {kind}"
+    if low is not None:
+        return f"Значения в колонке '{column}' должны быть {'больше' if limits.get('exclusive') else 'не меньше'} {low}"
+    return f"Значения в колонке '{column}' должны быть не больше {high}"
+
+
+def _list_samples(samples):
+    """Перечень образцов для сообщения"""
+    samples = [str(sample) for sample in samples]
+    listed = ', '.join(samples[:MAX_LISTED_SAMPLES])
+    if len(samples) > MAX_LISTED_SAMPLES:
+        listed += f" и еще {len(samples) - MAX_LISTED_SAMPLES}"
+    return listed
+
+
+def match_columns(df, required_columns):
+    """
+    Сопоставление обязательных колонок с колонками таблицы (точное или по вхождению имени)
+
+    Returns:
+        tuple: (pandas.DataFrame, list) - таблица с переименованными колонками и ненайденные колонки
+    """
+    column_mapping = {}
+    for req_col in required_columns:
+        if req_col in df.columns:
+            column_mapping[req_col] = req_col
+            continue
+        # Ищем похожие колонки
+        for col in df.columns:
+            if req_col.lower() in str(col).lower() or str(col).lower() in req_col.lower():
+                column_mapping[req_col] = col
+                break
+
+    missing = [col for col in required_columns if col not in column_mapping]
+    reversed_mapping = {v: k for k, v in column_mapping.items() if v != k}
+    if reversed_mapping:
+        df = df.rename(columns=reversed_mapping)
+    return df, missing
+
+
+def validate_dataframe(df, file_type):
+    """
+    Проверка таблицы по схеме типа файла (все проверки за один проход по колонкам)
+
+    Args:
+        df (pandas.DataFrame): Разобранная таблица
+        file_type (str): Тип файла (ключ FILE_SCHEMAS)
+
+    Returns:
+        dict: Отчет {'file_type', 'valid', 'message', 'errors', 'warnings', 'rows', 'columns'}
+    """
+    report = {
+        'file_type': file_type,
+        'rows': int(len(df)),
+        'columns': [str(col) for col in df.columns],
+        'errors': [],
+        'warnings': []
+    }
+    errors, warnings = report['errors'], report['warnings']
+    schema = FILE_SCHEMAS.get(file_type)
+
+    if schema is not None:
+        # Обязательные колонки
+        missing = [col for col in schema['required'] if col not in df.columns]
+        if missing:
+            errors.append(f"В файле отсутствуют следующие обязательные колонки: {', '.join(missing)}. "
+                          f"Доступные колонки: {', '.join(report['columns'])}")
+        else:
+            _check_columns(df, schema, errors)
+            if not errors and 'sample' in schema:
+                report['samples'] = _check_samples(df, schema, errors, warnings)
+
+    report['valid'] = not errors
+    report['message'] = errors[0] if errors else SUCCESS_MESSAGE
+    return report
+
+
+def _check_columns(df, schema, errors):
+    """Типы и диапазоны значений колонок"""
+    for column, limits in schema.get('numeric', {}).items():
+        if column not in df.columns:
+            continue
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            errors.append(f"Колонка '{column}' должна содержать числовые значения")
+            continue
+
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            continue
+        low, high = limits.get('min'), limits.get('max')
+        below = low is not None and (values.min() <= low if limits.get('exclusive') else values.min() < low)
+        above = high is not None and values.max() > high
+        if below or above:
+            errors.append(_range_message(column, limits))
+
+    for column in schema.get('dates', []):
+        values = df[column]
+        present = values.notna()
+        try:
+            parsed = pd.to_datetime(values, errors='coerce')
+        except (TypeError, ValueError):
+            parsed = pd.Series(pd.NaT, index=values.index)
+        if (present & parsed.isna()).any():
+            errors.append(f"Колонка '{column}' должна содержать даты в формате YYYY-MM-DD")
+
+
+def _check_samples(df, schema, errors, warnings):
+    """
+    Число точек и монотонность кривых по образцам
+
+    Returns:
+        int: Число образцов
+    """
+    sample_column = schema['sample']['column']
+    codes, samples = pd.factorize(df[sample_column])
+    rows = codes >= 0
+    codes = codes[rows]
+    counts = np.bincount(codes, minlength=len(samples))
+
+    min_points = schema['sample']['min_points']
+    short = samples[counts < min_points]
+    if len(short) == 1:
+        errors.append(f"Для образца {short[0]} требуется не менее {min_points} точек")
+    elif len(short):
+        errors.append(f"Для образцов {_list_samples(short)} требуется не менее {min_points} точек")
+
+    # Строки упорядочиваются по образцу и насыщенности; соседние строки одного образца сравниваются
+    saturation = df[schema['saturation']].to_numpy(dtype=float, na_value=np.nan)[rows]
+    order = np.lexsort((saturation, codes))
+    same_sample = codes[order][1:] == codes[order][:-1]
+    for column, direction in schema.get('monotonic', {}).items():
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)[rows][order]
+        with np.errstate(invalid='ignore'):
+            violation = same_sample & (np.diff(values) * direction < 0)
+        if violation.any():
+            bad = samples[np.unique(codes[order][1:][violation])]
+            trend = 'не убывать' if direction > 0 else 'не возрастать'
+            warnings.append(f"Значения в колонке '{column}' должны {trend} с ростом водонасыщенности "
+                            f"(образцы: {_list_samples(bad)})")
+
+    return int(len(samples))
+
+
+def _dialect_key(dialect):
+    """Часть ключа кэша отчета: формат, с которым разобран файл"""
+    if not dialect:
+        return 'auto'
+    return f"{dialect['encoding']}.{ord(dialect['sep'])}.{ord(dialect['decimal'])}"
+
+
+def validate_file(file_path, file_type, cache_dir=None, dialect=None, df=None):
+    """
+    Проверка файла по схеме; таблица и отчет берутся из кэша по хэшу содержимого
+
+    Args:
+        file_path (str): Путь к файлу
+        file_type (str): Тип файла (ключ FILE_SCHEMAS)
+        cache_dir (str, optional): Директория кэша (DATASET_CACHE_FOLDER). Defaults to None (без кэша).
+        dialect (dict, optional): Формат CSV (utils.csv_dialect). Defaults to None (определяется по файлу).
+        df (pandas.DataFrame, optional): Уже разобранная таблица файла. Defaults to None.
+
+    Returns:
+        dict: Отчет проверки (validate_dataframe)
+    """
+    def build():
+        data = df
+        if data is None:
+            try:
+                data = load_dataframe(file_path, cache_dir=cache_dir, dialect=dialect)
+            except Exception as e:
+                print(f"Ошибка при чтении файла {file_path}: {str(e)}")
+                return None
+        return validate_dataframe(data, file_type)
+
+    name = f'validation.v{SCHEMA_VERSION}.{file_type}.{_dialect_key(dialect)}'
+    report = load_derived_json(cache_dir, file_path, name, build)
+    if report is None:
+        message = "Не удалось прочитать файл. Проверьте формат и кодировку файла."
+        return {'file_type': file_type, 'valid': False, 'message': message, 'errors': [message], 'warnings': []}
+    return report
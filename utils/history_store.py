@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Хранение полной истории насыщенности (время × ячейки) для каждого результата.
+# Без сжатия каждое поле - отдельный .npy-файл, который открывается через memmap:
+# при чтении среза с диска загружаются только нужные страницы.
+# Со сжатием поле делится на блоки по времени (.npz), распаковываются только
+# блоки, попадающие в запрошенный интервал времени.
+
+import json
+import os
+
+import numpy as np
+
+# Поля истории насыщенности моделей (карбонатная модель добавляет матрицу и трещины)
+HISTORY_FIELDS = ('Sw_with_cap', 'Sw_without_cap', 'Sw_matrix', 'Sw_fracture')
+
+# Имя поддиректории истории в директории результата
+HISTORY_DIRNAME = 'history'
+
+# Файл с описанием сохраненной истории
+META_FILENAME = 'meta.json'
+
+
+def collect_history(model):
+    """
+    Сбор массивов истории насыщенности из модели
+
+    Args:
+        model (OilFiltrationModel): Модель после расчета
+
+    Returns:
+        dict: Словарь {имя поля: массив (nt, nx + 1)}
+    """
+    return {name: getattr(model, name) for name in HISTORY_FIELDS
+            if isinstance(getattr(model, name, None), np.ndarray)}
+
+
+def save_history(history_dir, fields, t, x, dtype='float32', compress=False, block_steps=200):
+    """
+    Сохранение истории насыщенности
+
+    Args:
+        history_dir (str): Директория истории
+        fields (dict): Словарь {имя поля: массив (nt, nx + 1)}
+        t (numpy.ndarray): Моменты времени, сут
+        x (numpy.ndarray): Координаты ячеек, м
+        dtype (str, optional): Тип данных значений. Defaults to 'float32'.
+        compress (bool, optional): Сжатие блоками по времени. Defaults to False.
+        block_steps (int, optional): Число шагов по времени в блоке. Defaults to 200.
+
+    Returns:
+        dict: Описание сохраненной истории
+    """
+    os.makedirs(history_dir, exist_ok=True)
+
+    np.save(os.path.join(history_dir, 't.npy'), np.asarray(t, dtype=np.float64))
+    np.save(os.path.join(history_dir, 'x.npy'), np.asarray(x, dtype=np.float64))
+
+    nt = len(t)
+    for name, values in fields.items():
+        values = np.asarray(values, dtype=dtype)
+        if compress:
+            blocks = {f'block_{i:05d}': values[start:start + block_steps]
+                      for i, start in enumerate(range(0, nt, block_steps))}
+            np.savez_compressed(os.path.join(history_dir, f'{name}.npz'), **blocks)
+        else:
+            np.save(os.path.join(history_dir, f'{name}.npy'), values)
+
+    meta = {
+        'fields': list(fields.keys()),
+        'shape': [nt, len(x)],
+        'dtype': str(np.dtype(dtype)),
+        'compressed': bool(compress),
+        'block_steps': int(block_steps),
+        'time_range': [float(t[0]), float(t[-1])],
+        'x_range': [float(x[0]), float(x[-1])]
+    }
+    with open(os.path.join(history_dir, META_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    return meta
+
+
+def load_history_meta(history_dir):
+    """Описание сохраненной истории или None, если история не сохранялась"""
+    meta_path = os.path.join(history_dir, META_FILENAME)
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_axes(history_dir):
+    """Моменты времени и координаты ячеек истории"""
+    t = np.load(os.path.join(history_dir, 't.npy'), mmap_mode='r')
+    x = np.load(os.path.join(history_dir, 'x.npy'), mmap_mode='r')
+    return t, x
+
+
+def read_history(history_dir, field, time_slice=slice(None), cell_slice=slice(None), meta=None):
+    """
+    Чтение прямоугольного фрагмента истории (интервал времени × интервал ячеек)
+
+    Args:
+        history_dir (str): Директория истории
+        field (str): Имя поля, например 'Sw_with_cap'
+        time_slice (slice, optional): Индексы по времени. Defaults to slice(None).
+        cell_slice (slice, optional): Индексы ячеек. Defaults to slice(None).
+        meta (dict, optional): Описание истории, если уже загружено. Defaults to None.
+
+    Returns:
+        numpy.ndarray: Массив (len(time), len(cells))
+    """
+    meta = meta or load_history_meta(history_dir)
+    if meta is None or field not in meta['fields']:
+        raise KeyError(f"Поле истории не найдено: {field}")
+
+    if not meta['compressed']:
+        values = np.load(os.path.join(history_dir, f'{field}.npy'), mmap_mode='r')
+        return np.array(values[time_slice, cell_slice])
+
+    # Распаковываем только блоки, содержащие запрошенные моменты времени
+    nt = meta['shape'][0]
+    block_steps = meta['block_steps']
+    time_indices = np.arange(nt)[time_slice]
+    parts = []
+    with np.load(os.path.join(history_dir, f'{field}.npz')) as blocks:
+        for block in np.unique(time_indices // block_steps):
+            in_block = time_indices[time_indices // block_steps == block]
+            values = blocks[f'block_{block:05d}']
+            parts.append(values[in_block - block * block_steps][:, cell_slice])
+
+    if not parts:
+        return np.empty((0, len(np.arange(meta['shape'][1])[cell_slice])), dtype=meta['dtype'])
+    return np.concatenate(parts)
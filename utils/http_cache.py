@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Политика HTTP-кэширования.
+# - Статические файлы получают в URL версию (хэш содержимого) и кэшируются бессрочно.
+# - Артефакты результата (JSON-визуализации, изображения) адресуются по ID результата
+#   и хэшу содержимого, поэтому тоже неизменяемы (views вызывают mark_immutable).
+# - HTML-страницы авторизованного пользователя не сохраняются в кэше (no-store).
+# - Остальные ответы на GET проверяются по ETag: повторный запрос получает 304 без тела.
+
+import hashlib
+import os
+
+from flask import request
+from flask_login import current_user
+
+# Срок хранения неизменяемых ответов (год)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Версии статических файлов: {путь: (mtime, версия)}
+_static_versions = {}
+
+
+def static_version(file_path):
+    """
+    Версия статического файла - начало SHA-256 содержимого
+
+    Returns:
+        str: Версия или None, если файла нет
+    """
+    try:
+        mtime = os.path.getmtime(file_path)
+    except OSError:
+        return None
+
+    cached = _static_versions.get(file_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(file_path, 'rb') as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:12]
+    _static_versions[file_path] = (mtime, version)
+    return version
+
+
+def mark_immutable(response, private=True):
+    """
+    Разрешение бессрочного кэширования ответа (URL меняется вместе с содержимым)
+
+    Args:
+        response (flask.Response): Ответ
+        private (bool, optional): Только кэш браузера (данные пользователя). Defaults to True.
+
+    Returns:
+        flask.Response: Тот же ответ
+    """
+    response.cache_control.no_cache = None
+    response.cache_control.no_store = None
+    response.cache_control.public = not private
+    response.cache_control.private = private or None
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+def init_http_cache(app):
+    """Регистрация версий статических файлов и заголовков кэширования"""
+
+    @app.url_defaults
+    def add_static_version(endpoint, values):
+        """Добавляет версию к URL статических файлов: /static/js/charts.js?v=<хэш>"""
+        if endpoint != 'static' or 'v' in values or not values.get('filename'):
+            return
+        version = static_version(os.path.join(app.static_folder, values['filename']))
+        if version:
+            values['v'] = version
+
+    @app.after_request
+    def set_cache_headers(response):
+        """Заголовки кэширования в зависимости от типа ответа"""
+        # Ответ уже помечен как неизменяемый (артефакты результата)
+        if response.cache_control.immutable:
+            return response
+
+        if request.endpoint == 'static' and request.args.get('v'):
+            return mark_immutable(response, private=False)
+
+        if response.mimetype == 'text/html' and current_user.is_authenticated:
+            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+            response.headers["Pragma"] = "no-cache"
+            response.headers["Expires"] = "0"
+            return response
+
+        # Остальные ответы кэшируются с обязательной проверкой по ETag
+        response.cache_control.no_cache = True
+        response.cache_control.private = current_user.is_authenticated or None
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            if not response.direct_passthrough and not response.get_etag()[0]:
+                response.add_etag()
+            response.make_conditional(request)
+        return response
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Дисковый кэш изображений результатов моделирования.
+# Изображения строятся по запросу из сохраненных рядов данных графиков (core.figure_data)
+# и хранятся в IMAGE_CACHE_FOLDER/result_<id>/<график>[.<размер>].<формат>.
+# Кроме изображения для печати (IMAGE_DPI) PNG строится в уменьшенных размерах
+# (IMAGE_SIZES: миниатюра и превью для страницы); каждый размер строится при первом запросе.
+# Размер кэша ограничен IMAGE_CACHE_MAX_MB: при превышении удаляются файлы,
+# к которым дольше всего не обращались (время обращения - mtime файла).
+
+import os
+import shutil
+import threading
+import uuid
+
+from flask import current_app
+
+from core.figure_data import FIGURE_NAMES
+from utils.compression import ENCODING_SUFFIXES, precompress_file, remove_compressed_copies
+
+# Поддиректория для временных файлов построения
+TEMP_DIRNAME = '.tmp'
+
+# Размер изображения для печати (разрешение IMAGE_DPI)
+FULL_SIZE = 'full'
+
+# Блокировки построения в текущем процессе: {ключ изображения: Lock}
+_render_locks = {}
+_render_locks_guard = threading.Lock()
+
+# pyplot не потокобезопасен: построение в процессе запроса выполняется по одному
+_pyplot_lock = threading.Lock()
+
+
+def get_cache_dir():
+    """Директория кэша изображений"""
+    return current_app.config['IMAGE_CACHE_FOLDER']
+
+
+def get_cache_path(result_id, name, fmt, size=FULL_SIZE):
+    """Путь к изображению результата в кэше"""
+    filename = f'{name}.{fmt}' if size == FULL_SIZE else f'{name}.{size}.{fmt}'
+    return os.path.join(get_cache_dir(), f'result_{result_id}', filename)
+
+
+def get_image_sizes():
+    """Допустимые размеры изображений"""
+    return (FULL_SIZE,) + tuple(current_app.config['IMAGE_SIZES'])
+
+
+def _get_render_lock(key):
+    with _render_locks_guard:
+        lock = _render_locks.get(key)
+        if lock is None:
+            lock = _render_locks[key] = threading.Lock()
+        return lock
+
+
+def _touch(file_path):
+    """Отметка обращения к файлу для LRU-вытеснения"""
+    try:
+        os.utime(file_path, None)
+    except OSError:
+        pass
+
+
+def _render_to_file(figure_data, name, fmt, file_path, width=None):
+    """
+    Построение изображения и атомарная запись в file_path
+
+    При RENDER_WORKERS > 0 график строится в пуле процессов (core.render_pool),
+    иначе - в текущем процессе.
+    """
+    temp_dir = os.path.join(get_cache_dir(), TEMP_DIRNAME, uuid.uuid4().hex)
+    os.makedirs(temp_dir, exist_ok=True)
+    try:
+        workers = current_app.config['RENDER_WORKERS']
+        dpi = current_app.config['IMAGE_DPI']
+
+        if workers:
+            from core.render_pool import render_images
+            paths = render_images(figure_data, temp_dir, [name], formats=[fmt], wait_formats=[fmt],
+                                  dpi=dpi, width=width, workers=workers)
+            temp_path = paths[fmt].get(name)
+            if temp_path is None:
+                raise RuntimeError(f"Не удалось построить изображение {name}.{fmt}")
+        else:
+            import matplotlib.pyplot as plt
+            from core.matplotlib_visualizer import MatplotlibVisualizer, save_figure
+
+            temp_path = os.path.join(temp_dir, f'{name}.{fmt}')
+            with _pyplot_lock:
+                visualizer = MatplotlibVisualizer(figure_data=figure_data, output_dir=temp_dir,
+                                                  image_output_dir=temp_dir)
+                fig = visualizer.create_figure(name)
+                try:
+                    save_figure(fig, temp_path, dpi=dpi, width=width)
+                finally:
+                    plt.close(fig)
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # Векторные изображения хранятся и в сжатом виде (отдаются с Content-Encoding)
+        if fmt == 'svg' and current_app.config['PRECOMPRESS_ARTIFACTS']:
+            with open(temp_path, 'rb') as f:
+                precompress_file(file_path, f.read())
+
+        # Замена атомарна: параллельные запросы видят либо старый файл, либо готовый новый
+        os.replace(temp_path, file_path)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def get_image(result, name, fmt, size=FULL_SIZE):
+    """
+    Путь к изображению результата; при отсутствии в кэше изображение строится
+
+    Args:
+        result (ProjectResult): Результат моделирования
+        name (str): Имя графика из FIGURE_NAMES
+        fmt (str): Формат ('png' или 'svg')
+        size (str, optional): Размер из get_image_sizes(); для SVG не учитывается. Defaults to FULL_SIZE.
+
+    Returns:
+        str: Путь к файлу изображения или None, если для результата нет данных графиков
+    """
+    if name not in FIGURE_NAMES or fmt not in current_app.config['IMAGE_FORMATS']:
+        return None
+    if size not in get_image_sizes():
+        return None
+
+    # Векторное изображение не зависит от размера
+    if fmt != 'png':
+        size = FULL_SIZE
+    width = current_app.config['IMAGE_SIZES'].get(size)
+
+    file_path = get_cache_path(result.id, name, fmt, size)
+    if os.path.exists(file_path):
+        _touch(file_path)
+        return file_path
+
+    with _get_render_lock(file_path):
+        # Изображение мог построить параллельный запрос
+        if os.path.exists(file_path):
+            _touch(file_path)
+            return file_path
+
+        figure_data = result.get_figure_data()
+        if figure_data is None:
+            return None
+
+        print(f"Построение изображения {name}.{fmt} ({size}) для результата {result.id}")
+        _render_to_file(figure_data, name, fmt, file_path, width)
+
+    evict(current_app.config['IMAGE_CACHE_MAX_MB'] * 1024 * 1024)
+    return file_path
+
+
+def evict(max_bytes, cache_dir=None):
+    """
+    Удаление давно не использованных изображений, пока размер кэша превышает лимит
+
+    Args:
+        max_bytes (int): Максимальный размер кэша в байтах
+        cache_dir (str, optional): Директория кэша. Defaults to None (IMAGE_CACHE_FOLDER).
+
+    Returns:
+        int: Число удаленных файлов
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    compressed_suffixes = tuple(ENCODING_SUFFIXES.values())
+
+    # Изображение и его сжатые копии учитываются и удаляются вместе: {путь: [mtime, размер]}
+    entries = {}
+    total = 0
+    for root, dirs, files in os.walk(cache_dir):
+        # Временные файлы построения не учитываются
+        dirs[:] = [d for d in dirs if d != TEMP_DIRNAME]
+        for filename in files:
+            file_path = os.path.join(root, filename)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+
+            base_path = file_path
+            if filename.endswith(compressed_suffixes):
+                base_path = os.path.splitext(file_path)[0]
+            entry = entries.setdefault(base_path, [stat.st_mtime, 0])
+            if base_path == file_path:
+                entry[0] = stat.st_mtime
+            entry[1] += stat.st_size
+            total += stat.st_size
+
+    removed = 0
+    if total <= max_bytes:
+        return removed
+
+    for file_path, (_, size) in sorted(entries.items(), key=lambda item: item[1][0]):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        remove_compressed_copies(file_path)
+        total -= size
+        removed += 1
+
+        # Удаляем опустевшую директорию результата
+        directory = os.path.dirname(file_path)
+        try:
+            if directory != cache_dir and not os.listdir(directory):
+                os.rmdir(directory)
+        except OSError:
+            pass
+
+    print(f"Кэш изображений: удалено файлов - {removed}, размер - {total / 1024 / 1024:.1f} МБ")
+    return removed
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Хранение результатов моделирования: скалярные показатели - в базе данных,
+# ряды данных (динамика нефтеотдачи, профили насыщенности) - в сжатом .npz-файле.
+
+import os
+
+# Разделы результатов с рядами данных, которые сохраняются в бинарный файл
+SERIES_SECTIONS = ('recovery_factor', 'saturation_profiles', 'matrix_fracture_profiles')
+
+# Имя файла с рядами данных в директории результата
+ARRAYS_FILENAME = 'arrays.npz'
+
+# Разделитель уровней вложенности в именах массивов: 'saturation_profiles/10/with_cap'
+KEY_SEPARATOR = '/'
+
+
+def get_result_dir(project_id, result_id):
+    """Относительный путь директории результата (относительно RESULTS_FOLDER)"""
+    return os.path.join(str(project_id), f'result_{result_id}')
+
+
+def split_results(results):
+    """
+    Разделение результатов на скалярную сводку и ряды данных
+
+    Args:
+        results (dict): Результаты из extract_results()
+
+    Returns:
+        tuple: (сводка без рядов данных, словарь {имя массива: список значений})
+    """
+    summary = {key: value for key, value in results.items() if key not in SERIES_SECTIONS}
+    arrays = {}
+    for section in SERIES_SECTIONS:
+        if section in results:
+            _flatten_series(results[section], section, arrays)
+
+    # Конечная нефтеотдача нужна сводной таблице без загрузки рядов
+    recovery = results.get('recovery_factor')
+    if recovery and recovery.get('time'):
+        summary['final_recovery'] = {
+            'time': recovery['time'][-1],
+            'with_cap': recovery['with_cap'][-1],
+            'without_cap': recovery['without_cap'][-1]
+        }
+
+    return summary, arrays
+
+
+def join_results(summary, arrays):
+    """
+    Сборка полного словаря результатов из сводки и рядов данных
+
+    Args:
+        summary (dict): Сводка из split_results()
+        arrays (dict): Массивы NumPy или списки по именам из split_results()
+
+    Returns:
+        dict: Результаты в формате extract_results() (ключи дней - строки, как после JSON)
+    """
+    results = dict(summary)
+    for name, values in arrays.items():
+        keys = name.split(KEY_SEPARATOR)
+        node = results
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = values.tolist() if hasattr(values, 'tolist') else values
+    return results
+
+
+def _flatten_series(node, prefix, arrays):
+    """Рекурсивный обход вложенного словаря рядов данных"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            _flatten_series(value, f'{prefix}{KEY_SEPARATOR}{key}', arrays)
+    else:
+        arrays[prefix] = node
+
+
+def save_arrays(file_path, arrays):
+    """
+    Сохранение рядов данных в сжатый .npz-файл
+
+    Args:
+        file_path (str): Путь к файлу
+        arrays (dict): Словарь {имя массива: список значений}
+    """
+    import numpy as np
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    np.savez_compressed(file_path, **{name: np.asarray(values, dtype=np.float64)
+                                      for name, values in arrays.items()})
+
+
+def load_arrays(file_path, names=None):
+    """
+    Загрузка рядов данных из .npz-файла
+
+    Массивы в .npz читаются по отдельности, поэтому при указании names
+    остальные ряды не распаковываются.
+
+    Args:
+        file_path (str): Путь к файлу
+        names (list, optional): Имена или префиксы разделов ('recovery_factor'). Defaults to None (все).
+
+    Returns:
+        dict: Словарь {имя массива: numpy.ndarray}
+    """
+    import numpy as np
+
+    if not os.path.exists(file_path):
+        print(f"Файл с рядами данных не найден: {file_path}")
+        return {}
+
+    with np.load(file_path) as data:
+        selected = data.files
+        if names:
+            selected = [name for name in data.files
+                        if any(name == prefix or name.startswith(prefix + KEY_SEPARATOR) for prefix in names)]
+        return {name: data[name] for name in selected}
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Профилирование времени запуска приложения и предзагрузка тяжелых модулей.
+# Запуск: python -m utils.startup profile [--target app] [--top 25]
+#         python -m utils.startup preload
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+# Корень проекта (для запуска профилируемого процесса)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Тяжелые модули, которые маршруты импортируют лениво при первом обращении
+HEAVY_MODULES = [
+    'numpy',
+    'pandas',
+    'plotly.graph_objects',
+    'plotly.subplots',
+    'matplotlib.pyplot',
+    'seaborn',
+    'core.model',
+    'core.carbonate_model',
+    'core.data_loader',
+    'core.visualizer',
+    'core.matplotlib_visualizer'
+]
+
+
+def preload_shared_modules(modules=None):
+    """
+    Импорт тяжелых модулей заранее, в родительском процессе до форка воркеров
+
+    После форка воркеры используют уже загруженные модули (copy-on-write),
+    поэтому не тратят время на импорт и не дублируют память.
+
+    Args:
+        modules (list, optional): Имена модулей. Defaults to HEAVY_MODULES.
+
+    Returns:
+        dict: Время импорта каждого модуля в секундах
+    """
+    modules = modules or HEAVY_MODULES
+
+    # Воркеры рисуют графики без дисплея
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+    except ImportError:
+        pass
+
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Не удалось предзагрузить модуль {name}: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+
+    print(f"Предзагружено модулей: {len(timings)} за {sum(timings.values()):.2f} с")
+    return timings
+
+
+def parse_importtime(output):
+    """
+    Разбор вывода python -X importtime
+
+    Args:
+        output (str): Содержимое stderr профилируемого процесса
+
+    Returns:
+        list: Список кортежей (модуль, собственное время, суммарное время) в секундах
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+
+        try:
+            self_us = int(parts[0])
+            cumulative_us = int(parts[1])
+        except ValueError:
+            # Строка заголовка
+            continue
+
+        modules.append((parts[2].strip(), self_us / 1e6, cumulative_us / 1e6))
+
+    return modules
+
+
+def profile_startup(target='app', env=None):
+    """
+    Профилирование импорта при запуске в отдельном процессе
+
+    Args:
+        target (str, optional): Импортируемый модуль. Defaults to 'app'.
+        env (dict, optional): Переменные окружения процесса. Defaults to None (текущие).
+
+    Returns:
+        dict: Общее время запуска, пиковый RSS (КБ), список модулей и время по пакетам
+    """
+    code = (
+        f"import {target}\n"
+        "try:\n"
+        "    import resource\n"
+        "    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+        "except ImportError:\n"
+        "    print(0)\n"
+    )
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, env=env
+    )
+    total = time.perf_counter() - start
+
+    if process.returncode != 0:
+        raise RuntimeError(f"Не удалось импортировать {target}:\n{process.stderr[-2000:]}")
+
+    modules = parse_importtime(process.stderr)
+
+    # Суммарное собственное время по пакетам верхнего уровня
+    packages = {}
+    for name, self_time, _ in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0.0) + self_time
+
+    output_lines = process.stdout.strip().splitlines()
+    max_rss_kb = int(output_lines[-1]) if output_lines and output_lines[-1].isdigit() else 0
+
+    return {
+        'total': total,
+        'max_rss_kb': max_rss_kb,
+        'modules': modules,
+        'packages': sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    }
+
+
+def print_profile(profile, top=25):
+    """Вывод отчета профилирования запуска"""
+    print(f"Время запуска процесса: {profile['total']:.3f} с")
+    if profile['max_rss_kb']:
+        print(f"Пиковый RSS: {profile['max_rss_kb'] / 1024:.1f} МБ")
+
+    print(f"\nВремя импорта по пакетам (топ-{top}):")
+    for package, seconds in profile['packages'][:top]:
+        print(f"  {seconds * 1000:9.1f} мс  {package}")
+
+    print(f"\nМодули с наибольшим суммарным временем импорта (топ-{top}):")
+    for name, self_time, cumulative in sorted(profile['modules'], key=lambda item: item[2], reverse=True)[:top]:
+        print(f"  {cumulative * 1000:9.1f} мс  (собств. {self_time * 1000:7.1f} мс)  {name}")
+
+
+def main(argv=None):
+    """Точка входа консольной утилиты"""
+    parser = argparse.ArgumentParser(prog='python -m utils.startup',
+                                     description='Профиль запуска и предзагрузка модулей')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    profile_parser = subparsers.add_parser('profile', help='Время импорта модулей при запуске')
+    profile_parser.add_argument('--target', default='app', help='Импортируемый модуль (по умолчанию app)')
+    profile_parser.add_argument('--top', type=int, default=25, help='Число строк в отчете')
+
+    subparsers.add_parser('preload', help='Время предзагрузки тяжелых модулей')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'profile':
+        print_profile(profile_startup(args.target), args.top)
+    else:
+        for name, seconds in preload_shared_modules().items():
+            print(f"  {seconds * 1000:9.1f} мс  {name}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,6 @@
 # -*- coding: utf-8 -*-
 
 import re
-import pandas as pd
-import numpy as np
 from flask import current_app
 
 
@@ -117,210 +115,93 @@ def validate_model_parameters(parameters, model_type=None):
     return len(errors) == 0, errors
 
 
-def validate_rock_properties_file(file_path):
+def validate_data_file(file_path, file_type, cache_dir=None, dialect=None):
     """
-    Проверяет корректность файла свойств породы
+    Проверяет файл данных по схеме типа файла (utils.file_schema)
 
     Args:
         file_path (str): Путь к файлу
+        file_type (str): Тип файла ('rock_properties', 'capillary_pressure', etc.)
+        cache_dir (str, optional): Директория кэша разобранных таблиц. Defaults to None.
+        dialect (dict, optional): Формат CSV-файла. Defaults to None (определяется по файлу).
 
     Returns:
         tuple: (bool, str) - результат проверки и сообщение
     """
-    try:
-        df = pd.read_csv(file_path)
-
-        # Проверяем наличие обязательных колонок
-        required_columns = ['ID_Sample', 'Porosity_fr', 'Permeability_mD', 'Rock_Type']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-
-        if missing_columns:
-            return False, f"В файле отсутствуют следующие обязательные колонки: {', '.join(missing_columns)}"
-
-        # Проверяем типы данных
-        if not pd.api.types.is_numeric_dtype(df['Porosity_fr']):
-            return False, "Колонка 'Porosity_fr' должна содержать числовые значения"
-
-        if not pd.api.types.is_numeric_dtype(df['Permeability_mD']):
-            return False, "Колонка 'Permeability_mD' должна содержать числовые значения"
-
-        # Проверяем диапазон значений
-        if df['Porosity_fr'].min() < 0 or df['Porosity_fr'].max() > 1:
-            return False, "Значения в колонке 'Porosity_fr' должны быть в диапазоне от 0 до 1"
+    from utils.file_schema import validate_file
 
-        if df['Permeability_mD'].min() < 0:
-            return False, "Значения в колонке 'Permeability_mD' должны быть неотрицательными"
-
-        return True, "Файл соответствует требованиям"
+    try:
+        report = validate_file(file_path, file_type, cache_dir=cache_dir, dialect=dialect)
+        return report['valid'], report['message']
     except Exception as e:
         return False, f"Ошибка при проверке файла: {str(e)}"
 
 
-def validate_capillary_pressure_file(file_path):
+def validate_rock_properties_file(file_path, cache_dir=None):
     """
-    Проверяет корректность файла капиллярного давления
+    Проверяет корректность файла свойств породы
 
     Args:
         file_path (str): Путь к файлу
+        cache_dir (str, optional): Директория кэша разобранных таблиц. Defaults to None.
 
     Returns:
         tuple: (bool, str) - результат проверки и сообщение
     """
-    try:
-        df = pd.read_csv(file_path)
-
-        # Проверяем наличие обязательных колонок
-        required_columns = ['ID_Sample', 'Water_Saturation', 'Pc_Drainage_MPa']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-
-        if missing_columns:
-            return False, f"В файле отсутствуют следующие обязательные колонки: {', '.join(missing_columns)}"
+    return validate_data_file(file_path, 'rock_properties', cache_dir)
 
-        # Проверяем типы данных
-        if not pd.api.types.is_numeric_dtype(df['Water_Saturation']):
-            return False, "Колонка 'Water_Saturation' должна содержать числовые значения"
 
-        if not pd.api.types.is_numeric_dtype(df['Pc_Drainage_MPa']):
-            return False, "Колонка 'Pc_Drainage_MPa' должна содержать числовые значения"
-
-        # Проверяем диапазон значений
-        if df['Water_Saturation'].min() < 0 or df['Water_Saturation'].max() > 1:
-            return False, "Значения в колонке 'Water_Saturation' должны быть в диапазоне от 0 до 1"
+def validate_capillary_pressure_file(file_path, cache_dir=None):
+    """
+    Проверяет корректность файла капиллярного давления
 
-        # Проверяем, что для каждого образца есть не менее 3 точек
-        samples = df['ID_Sample'].unique()
-        for sample in samples:
-            sample_data = df[df['ID_Sample'] == sample]
-            if len(sample_data) < 3:
-                return False, f"Для образца {sample} требуется не менее 3 точек"
+    Args:
+        file_path (str): Путь к файлу
+        cache_dir (str, optional): Директория кэша разобранных таблиц. Defaults to None.
 
-        return True, "Файл соответствует требованиям"
-    except Exception as e:
-        return False, f"Ошибка при проверке файла: {str(e)}"
+    Returns:
+        tuple: (bool, str) - результат проверки и сообщение
+    """
+    return validate_data_file(file_path, 'capillary_pressure', cache_dir)
 
 
-def validate_relative_perm_file(file_path):
+def validate_relative_perm_file(file_path, cache_dir=None):
     """
     Проверяет корректность файла относительной проницаемости
 
     Args:
         file_path (str): Путь к файлу
+        cache_dir (str, optional): Директория кэша разобранных таблиц. Defaults to None.
 
     Returns:
         tuple: (bool, str) - результат проверки и сообщение
     """
-    try:
-        df = pd.read_csv(file_path)
-
-        # Проверяем наличие обязательных колонок
-        required_columns = ['ID_Sample', 'Water_Saturation', 'Krw_Drainage', 'Kro_Drainage']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-
-        if missing_columns:
-            return False, f"В файле отсутствуют следующие обязательные колонки: {', '.join(missing_columns)}"
+    return validate_data_file(file_path, 'relative_perm', cache_dir)
 
-        # Проверяем типы данных
-        for col in ['Water_Saturation', 'Krw_Drainage', 'Kro_Drainage']:
-            if not pd.api.types.is_numeric_dtype(df[col]):
-                return False, f"Колонка '{col}' должна содержать числовые значения"
 
-        # Проверяем диапазон значений
-        if df['Water_Saturation'].min() < 0 or df['Water_Saturation'].max() > 1:
-            return False, "Значения в колонке 'Water_Saturation' должны быть в диапазоне от 0 до 1"
-
-        if df['Krw_Drainage'].min() < 0 or df['Krw_Drainage'].max() > 1:
-            return False, "Значения в колонке 'Krw_Drainage' должны быть в диапазоне от 0 до 1"
-
-        if df['Kro_Drainage'].min() < 0 or df['Kro_Drainage'].max() > 1:
-            return False, "Значения в колонке 'Kro_Drainage' должны быть в диапазоне от 0 до 1"
-
-        # Проверяем, что для каждого образца есть не менее 3 точек
-        samples = df['ID_Sample'].unique()
-        for sample in samples:
-            sample_data = df[df['ID_Sample'] == sample]
-            if len(sample_data) < 3:
-                return False, f"Для образца {sample} требуется не менее 3 точек"
-
-        return True, "Файл соответствует требованиям"
-    except Exception as e:
-        return False, f"Ошибка при проверке файла: {str(e)}"
-
-
-def validate_pvt_data_file(file_path):
+def validate_pvt_data_file(file_path, cache_dir=None):
     """
     Проверяет корректность файла PVT-данных
 
     Args:
         file_path (str): Путь к файлу
+        cache_dir (str, optional): Директория кэша разобранных таблиц. Defaults to None.
 
     Returns:
         tuple: (bool, str) - результат проверки и сообщение
     """
-    try:
-        df = pd.read_csv(file_path)
-
-        # Проверяем наличие обязательных колонок
-        required_columns = ['Pressure_MPa', 'Oil_Viscosity_cP']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-
-        if missing_columns:
-            return False, f"В файле отсутствуют следующие обязательные колонки: {', '.join(missing_columns)}"
-
-        # Проверяем типы данных
-        for col in required_columns:
-            if not pd.api.types.is_numeric_dtype(df[col]):
-                return False, f"Колонка '{col}' должна содержать числовые значения"
-
-        # Проверяем диапазон значений
-        if df['Pressure_MPa'].min() <= 0:
-            return False, "Значения в колонке 'Pressure_MPa' должны быть положительными"
+    return validate_data_file(file_path, 'pvt_data', cache_dir)
 
-        if df['Oil_Viscosity_cP'].min() <= 0:
-            return False, "Значения в колонке 'Oil_Viscosity_cP' должны быть положительными"
 
-        return True, "Файл соответствует требованиям"
-    except Exception as e:
-        return False, f"Ошибка при проверке файла: {str(e)}"
-
-
-def validate_production_data_file(file_path):
+def validate_production_data_file(file_path, cache_dir=None):
     """
     Проверяет корректность файла данных добычи
 
     Args:
         file_path (str): Путь к файлу
+        cache_dir (str, optional): Директория кэша разобранных таблиц. Defaults to None.
 
     Returns:
         tuple: (bool, str) - результат проверки и сообщение
     """
-    try:
-        df = pd.read_csv(file_path)
-
-        # Проверяем наличие обязательных колонок
-        required_columns = ['Date', 'Oil_Rate_m3_day', 'Water_Rate_m3_day']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-
-        if missing_columns:
-            return False, f"В файле отсутствуют следующие обязательные колонки: {', '.join(missing_columns)}"
-
-        # Проверяем типы данных
-        try:
-            # Пробуем преобразовать даты
-            pd.to_datetime(df['Date'])
-        except:
-            return False, "Колонка 'Date' должна содержать даты в формате YYYY-MM-DD"
-
-        for col in ['Oil_Rate_m3_day', 'Water_Rate_m3_day']:
-            if not pd.api.types.is_numeric_dtype(df[col]):
-                return False, f"Колонка '{col}' должна содержать числовые значения"
-
-        # Проверяем диапазон значений
-        if df['Oil_Rate_m3_day'].min() < 0:
-            return False, "Значения в колонке 'Oil_Rate_m3_day' должны быть неотрицательными"
-
-        if df['Water_Rate_m3_day'].min() < 0:
-            return False, "Значения в колонке 'Water_Rate_m3_day' должны быть неотрицательными"
-
-        return True, "Файл соответствует требованиям"
-    except Exception as e:
-        return False, f"Ошибка при проверке файла: {str(e)}"
\ No newline at end of file
+    return validate_data_file(file_path, 'production_data', cache_dir)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Хранение JSON-визуализаций Plotly.
+# Структура графика проверяется и приводится к виду {"data": [...], "layout": {...}} один раз
+# при записи; рядом с файлами сохраняется манифест (имена, размеры, SHA-256, версия схемы).
+# Чтение только читает файлы: страницы не перезаписывают визуализации и не конкурируют за них.
+#
+# Утилита для старых директорий без манифеста:
+#     python -m utils.visualization_store data/results
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+
+from utils.compression import precompress_file
+
+# Версия схемы нормализованных файлов визуализаций
+SCHEMA_VERSION = 1
+
+# Имя файла манифеста в директории визуализаций
+MANIFEST_FILENAME = 'manifest.json'
+
+# Поддиректория визуализаций в директории результата
+VISUALIZATIONS_DIRNAME = 'visualizations'
+
+# Имя файла со всеми визуализациями результата в одном ответе
+BUNDLE_FILENAME = 'bundle.json'
+
+# Оформление по умолчанию (добавляется, если не задано в графике)
+LAYOUT_DEFAULTS = {
+    'margin': {'l': 60, 'r': 40, 't': 60, 'b': 60},
+    'font': {'family': 'Roboto, sans-serif', 'size': 14},
+    'plot_bgcolor': '#f8f8f8',
+    'paper_bgcolor': '#ffffff'
+}
+
+
+def normalize_figure(figure):
+    """
+    Проверка и приведение графика Plotly к схеме {"data": [...], "layout": {...}}
+
+    Поддерживаются старые варианты: трассы в "traces" или в первом кадре "frames",
+    массивы в виде объектов {"data": [...]} / {"original": [...]}. Бинарные массивы
+    (typed array Plotly) не изменяются.
+
+    Args:
+        figure (dict): График в виде словаря
+
+    Returns:
+        dict: Нормализованный график
+
+    Raises:
+        ValueError: Если график не содержит трасс в допустимом виде
+    """
+    if not isinstance(figure, dict):
+        raise ValueError('График должен быть объектом JSON')
+
+    traces = None
+    if isinstance(figure.get('data'), list):
+        traces = figure['data']
+    elif isinstance(figure.get('traces'), list):
+        traces = figure['traces']
+    elif isinstance(figure.get('frames'), list) and figure['frames']:
+        first_frame = figure['frames'][0]
+        if isinstance(first_frame, dict) and isinstance(first_frame.get('data'), list):
+            traces = first_frame['data']
+
+    if traces is None:
+        raise ValueError('В графике нет списка трасс')
+
+    normalized_traces = []
+    for i, trace in enumerate(traces):
+        if not isinstance(trace, dict):
+            raise ValueError(f'Трасса {i} должна быть объектом JSON')
+        trace = dict(trace)
+
+        # Обработка координат x, y, z
+        for key in ('x', 'y', 'z'):
+            value = trace.get(key)
+            if isinstance(value, dict) and 'bdata' not in value:
+                # Старые файлы: объекты с обычными массивами
+                if isinstance(value.get('data'), list):
+                    trace[key] = value['data']
+                elif isinstance(value.get('original'), list):
+                    trace[key] = value['original']
+
+        # Убеждаемся, что trace имеет тип
+        if 'type' not in trace:
+            if 'markers' in str(trace.get('mode', '')):
+                trace['type'] = 'scatter'
+            elif isinstance(trace.get('z'), (list, dict)):
+                trace['type'] = 'contour'
+            else:
+                trace['type'] = 'scatter'
+
+        normalized_traces.append(trace)
+
+    layout = figure.get('layout')
+    layout = dict(layout) if isinstance(layout, dict) else {}
+    for key, value in LAYOUT_DEFAULTS.items():
+        layout.setdefault(key, value)
+
+    return {'data': normalized_traces, 'layout': layout}
+
+
+def _write_atomic(file_path, content):
+    """Запись файла через временный файл: читатели видят либо старую, либо новую версию"""
+    temp_path = f'{file_path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, file_path)
+
+
+def write_visualizations(directory, figures, result_id=None, precompress=True):
+    """
+    Нормализация и запись визуализаций с манифестом
+
+    Графики, не прошедшие проверку, не записываются и не попадают в манифест.
+
+    Args:
+        directory (str): Директория визуализаций
+        figures (dict): Словарь {имя: график в виде словаря}
+        result_id (int, optional): ID результата для манифеста. Defaults to None.
+        precompress (bool, optional): Сохранить сжатые копии (.gz, .br) для отдачи
+            с Content-Encoding. Defaults to True.
+
+    Returns:
+        dict: Манифест
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    entries = {}
+    for name, figure in figures.items():
+        try:
+            normalized = normalize_figure(figure)
+        except ValueError as e:
+            print(f"ОШИБКА: визуализация {name} не соответствует схеме: {str(e)}")
+            continue
+
+        content = json.dumps(normalized, separators=(',', ':')).encode('utf-8')
+        filename = f'{name}.json'
+        file_path = os.path.join(directory, filename)
+        _write_atomic(file_path, content)
+
+        entries[name] = {
+            'file': filename,
+            'size': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'encodings': precompress_file(file_path, content) if precompress else []
+        }
+
+    manifest = {
+        'schema_version': SCHEMA_VERSION,
+        'result_id': result_id,
+        'created_at': datetime.utcnow().isoformat(),
+        'visualizations': entries
+    }
+
+    # Все визуализации в одном файле - для загрузки страницы одним запросом
+    content = assemble_bundle(directory, manifest)
+    bundle_path = os.path.join(directory, BUNDLE_FILENAME)
+    _write_atomic(bundle_path, content)
+    manifest['bundle'] = {
+        'file': BUNDLE_FILENAME,
+        'size': len(content),
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'encodings': precompress_file(bundle_path, content) if precompress else []
+    }
+    _write_atomic(os.path.join(directory, MANIFEST_FILENAME),
+                  json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    return manifest
+
+
+def load_manifest(directory):
+    """
+    Манифест визуализаций
+
+    Returns:
+        dict: Манифест или None, если его нет или версия схемы не совпадает
+    """
+    file_path = os.path.join(directory, MANIFEST_FILENAME)
+    if not os.path.exists(file_path):
+        return None
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('schema_version') != SCHEMA_VERSION:
+        return None
+    return manifest
+
+
+def get_visualization_path(directory, name, manifest=None):
+    """
+    Путь к нормализованному файлу визуализации из манифеста
+
+    Returns:
+        str: Путь к файлу или None, если визуализации нет в манифесте
+    """
+    manifest = manifest if manifest is not None else load_manifest(directory)
+    if not manifest:
+        return None
+
+    entry = manifest['visualizations'].get(name)
+    if entry is None:
+        return None
+    return os.path.join(directory, entry['file'])
+
+
+def assemble_bundle(directory, manifest, names=None):
+    """
+    Сборка ответа с несколькими визуализациями: {"result_id": ..., "visualizations": {имя: график}}
+
+    Файлы уже нормализованы, поэтому объединяются без разбора JSON.
+
+    Args:
+        directory (str): Директория визуализаций
+        manifest (dict): Манифест
+        names (list, optional): Имена визуализаций. Defaults to None (все из манифеста).
+
+    Returns:
+        bytes: JSON-документ
+    """
+    entries = manifest['visualizations']
+    names = list(entries) if names is None else [name for name in names if name in entries]
+
+    parts = []
+    for name in names:
+        with open(os.path.join(directory, entries[name]['file']), 'rb') as f:
+            parts.append(json.dumps(name).encode('utf-8') + b':' + f.read())
+
+    header = json.dumps({'result_id': manifest.get('result_id')}, separators=(',', ':'))[:-1].encode('utf-8')
+    return header + b',"visualizations":{' + b','.join(parts) + b'}}'
+
+
+def read_legacy_visualization(file_path):
+    """
+    Чтение файла визуализации без манифеста (нормализация только в памяти)
+
+    Returns:
+        dict: Нормализованный график
+
+    Raises:
+        ValueError: Если файл не соответствует схеме
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return normalize_figure(json.load(f))
+
+
+def migrate_directory(directory):
+    """
+    Нормализация старых файлов визуализаций директории и запись манифеста
+
+    Args:
+        directory (str): Директория с файлами <имя>.json
+
+    Returns:
+        dict: Манифест
+    """
+    figures = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.json') or filename == MANIFEST_FILENAME:
+            continue
+        try:
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                figures[filename[:-len('.json')]] = json.load(f)
+        except ValueError as e:
+            print(f"ОШИБКА при чтении {filename}: {str(e)}")
+
+    return write_visualizations(directory, figures)
+
+
+def main(argv=None):
+    """Точка входа консольной утилиты"""
+    parser = argparse.ArgumentParser(prog='python -m utils.visualization_store',
+                                     description='Нормализация визуализаций без манифеста')
+    parser.add_argument('results_folder', help='Директория результатов (RESULTS_FOLDER)')
+    args = parser.parse_args(argv)
+
+    for project_dir in sorted(os.listdir(args.results_folder)):
+        directory = os.path.join(args.results_folder, project_dir)
+        if not os.path.isdir(directory) or load_manifest(directory) is not None:
+            continue
+        if not any(filename.endswith('.json') for filename in os.listdir(directory)):
+            continue
+
+        manifest = migrate_directory(directory)
+        print(f"{directory}: визуализаций - {len(manifest['visualizations'])}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())